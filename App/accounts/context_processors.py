@@ -1,20 +1,14 @@
+from factors_Ecom.context import lazy_context
 from .models import UserProfile
 
 def user_profile(request):
     """
-    Context processor to make user profile available in all templates
+    Context processor to make user profile available in all templates.
+    Lazy and read-only: profiles are created with the account (accounts.signals).
     """
-    if request.user.is_authenticated:
-        try:
-            userprofile = UserProfile.objects.get(user=request.user)
-            return {
-                'userprofile': userprofile,
-            }
-        except UserProfile.DoesNotExist:
-            # Create a profile if it doesn't exist
-            userprofile = UserProfile.objects.create(user=request.user)
-            return {
-                'userprofile': userprofile,
-            }
-    
-    return {}
+    def profile():
+        if request.user.is_authenticated:
+            return UserProfile.objects.filter(user=request.user).first()
+        return None
+
+    return lazy_context(request, userprofile=profile)
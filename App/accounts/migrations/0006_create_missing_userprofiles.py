@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:40
+
+from django.db import migrations
+
+
+def create_missing_profiles(apps, schema_editor):
+    # profiles used to be created on first page view; now they come with the account
+    Account = apps.get_model('accounts', 'Account')
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    missing = Account.objects.filter(userprofile__isnull=True).values_list('pk', flat=True)
+    UserProfile.objects.bulk_create([UserProfile(user_id=pk) for pk in missing.iterator()], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_alter_account_is_active'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_profiles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Account, UserProfile
+
+
+@receiver(post_save, sender=Account)
+def create_user_profile(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        UserProfile.objects.get_or_create(user=instance)
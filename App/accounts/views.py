@@ -5,7 +5,8 @@ from .forms import RegistrationForm, UserForm, UserProfileForm
 from .models import Account, UserProfile
 from orders.models import Order, OrderProduct
 from django.contrib import messages, auth
-from cart.views import _cart_id, merge_carts
+from cart.anonymous import AnonymousCart
+from cart.views import merge_carts
 from django.core.mail import EmailMessage
 from django.contrib.sites.shortcuts import get_current_site
 from django.template.loader import render_to_string
@@ -39,9 +40,7 @@ def register(request):
             )
             user.phone_number = phone_number
             user.save()
-
-            profile = UserProfile(user=user)
-            profile.save()
+            # the UserProfile is created by accounts.signals
 
             # Verification email
             email_sent = False
@@ -96,9 +95,11 @@ def login(request):
         if user is not None:
             # Check if user is active
             if user.is_active:
-                session_key_before = _cart_id(request)
+                session_key_before = request.session.session_key
+                anonymous_cart = AnonymousCart(request)
                 auth.login(request, user)
-                merge_carts(user, session_key_before)
+                merge_carts(user, session_key_before, anonymous_cart)
+                anonymous_cart.clear()
 
                 # Vulnerability found: Direct redirect without checking if URL is safe
                     # Malicious users could craft links like:
@@ -112,7 +113,7 @@ def login(request):
                     url = next_url
                 else:
                     url = 'dashboard'
-                return redirect(url)
+                return anonymous_cart.save(redirect(url))
             else:
                 messages.error(request, 'Please verify your email address before logging in.')
                 return redirect('login')
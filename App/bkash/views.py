@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from orders.models import Payment, Order, OrderProduct
 from product.models import Product
 from cart.models import CartItems
+from cart.summary import invalidate_cart_summary
 from django.contrib import messages
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
@@ -54,6 +55,7 @@ def bkash_payment(request, order_number):
             item.product.save()
 
         CartItems.objects.filter(user=request.user).delete()
+        invalidate_cart_summary(request.user)
 
         mail_subject = 'Thank you for your order!'
         message = render_to_string('orders/order_recieved_email.html', {
@@ -0,0 +1,149 @@
+"""
+Carts of visitors who aren't logged in, kept in a signed cookie.
+
+Anonymous carts used to be a session plus Cart and CartItems rows, created
+for every visitor that reached a product page. Now the cart lives in a
+compact signed cookie (a list of [product id, [variation ids], quantity]
+lines, at most settings.ANONYMOUS_CART_MAX_BYTES), and nothing is written to
+the database until login, where cart.views.merge_carts turns the lines into
+CartItems of the user.
+
+Lines are addressed by their 1-based position, which the cart page uses as
+the item id in its remove links.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+
+from product.models import Product, Variation
+
+
+SALT = 'cart.anonymous'
+
+
+class AnonymousCartItem:
+    """Quacks like CartItems for the cart templates."""
+
+    def __init__(self, id, product, variations, quantity):
+        self.id = id
+        self.product = product
+        self.variations = _VariationList(variations)
+        self.quantity = quantity
+        self.is_active = True
+
+    def sub_total(self):
+        return self.product.product_price * self.quantity
+
+
+class _VariationList(list):
+    def all(self):
+        return self
+
+
+class AnonymousCart:
+    def __init__(self, request):
+        self.lines = self._load(request.COOKIES.get(settings.ANONYMOUS_CART_COOKIE))
+        self.changed = False
+
+    def _load(self, value):
+        if not value:
+            return []
+        try:
+            lines = signing.loads(value, salt=SALT, max_age=settings.ANONYMOUS_CART_MAX_AGE)
+            return [[int(product_id), sorted(map(int, variation_ids)), int(quantity)]
+                    for product_id, variation_ids, quantity in lines]
+        except (signing.BadSignature, TypeError, ValueError):
+            return []
+
+    def encode(self):
+        return signing.dumps(self.lines, salt=SALT, compress=True)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    def count(self):
+        return sum(quantity for _, _, quantity in self.lines)
+
+    def product_ids(self):
+        return frozenset(product_id for product_id, _, _ in self.lines)
+
+    def add(self, product_id, variation_ids, quantity):
+        """Add to the matching line or a new one; False when the cookie would get too big."""
+        variation_ids = sorted(variation_ids)
+        previous = [list(line) for line in self.lines]
+        for line in self.lines:
+            if line[0] == product_id and line[1] == variation_ids:
+                line[2] = min(line[2] + quantity, settings.CART_MAX_QUANTITY)
+                break
+        else:
+            self.lines.append([product_id, variation_ids, quantity])
+        if len(self.encode()) > settings.ANONYMOUS_CART_MAX_BYTES:
+            self.lines = previous
+            return False
+        self.changed = True
+        return True
+
+    def _line(self, line_id, product_id):
+        if 1 <= line_id <= len(self.lines) and self.lines[line_id - 1][0] == product_id:
+            return self.lines[line_id - 1]
+        return None
+
+    def decrement(self, line_id, product_id):
+        line = self._line(line_id, product_id)
+        if line is None:
+            return
+        if line[2] > 1:
+            line[2] -= 1
+        else:
+            self.lines.remove(line)
+        self.changed = True
+
+    def remove(self, line_id, product_id):
+        line = self._line(line_id, product_id)
+        if line is not None:
+            self.lines.remove(line)
+            self.changed = True
+
+    def clear(self):
+        self.lines = []
+        self.changed = True
+
+    def items(self):
+        """AnonymousCartItem per line whose product still exists, with two queries."""
+        products = Product.objects.in_bulk(self.product_ids())
+        variations = Variation.objects.in_bulk({pk for _, ids, _ in self.lines for pk in ids})
+        return [
+            AnonymousCartItem(
+                line_id,
+                products[product_id],
+                [variations[pk] for pk in variation_ids if pk in variations],
+                quantity,
+            )
+            for line_id, (product_id, variation_ids, quantity) in enumerate(self.lines, 1)
+            if product_id in products
+        ]
+
+    def subtotal(self):
+        if not self.lines:
+            return Decimal('0.00')
+        prices = dict(Product.objects.filter(pk__in=self.product_ids()).values_list('pk', 'product_price'))
+        return sum((prices[product_id] * quantity for product_id, _, quantity in self.lines if product_id in prices),
+                   Decimal('0.00'))
+
+    def save(self, response):
+        """Write the cart to ``response`` if it changed."""
+        if not self.changed:
+            return response
+        if self.lines:
+            response.set_cookie(
+                settings.ANONYMOUS_CART_COOKIE,
+                self.encode(),
+                max_age=settings.ANONYMOUS_CART_MAX_AGE,
+                httponly=True,
+                samesite='Lax',
+                secure=settings.SESSION_COOKIE_SECURE,
+            )
+        else:
+            response.delete_cookie(settings.ANONYMOUS_CART_COOKIE, samesite='Lax')
+        return response
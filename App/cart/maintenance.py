@@ -0,0 +1,71 @@
+"""
+Purging of expired sessions and abandoned carts.
+
+Each phase deletes the rows of one table that are past their retention
+(settings.PURGE_RETENTION_DAYS) in batches: the primary keys of a batch are
+selected first, then deleted by key in their own short transaction, with a
+pause between batches so the job can run next to live traffic without
+holding long locks.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Cart, CartItems, CheckoutDB
+
+
+def _cutoff(table):
+    return timezone.now() - timedelta(days=settings.PURGE_RETENTION_DAYS[table])
+
+
+def expired_sessions():
+    return Session.objects.filter(expire_date__lt=_cutoff('sessions'))
+
+
+def stale_cart_items():
+    # anonymous items only; signed-in users keep their cart
+    return CartItems.objects.filter(user__isnull=True).filter(
+        Q(cart__isnull=True) | Q(cart__created_at__lt=_cutoff('cart_items'))
+    )
+
+
+def orphaned_carts():
+    # a cart still referenced by a signed-in user's item would take the item with it
+    user_items = CartItems.objects.filter(cart=OuterRef('pk'), user__isnull=False)
+    return Cart.objects.filter(created_at__lt=_cutoff('carts')).filter(~Exists(user_items))
+
+
+def stale_checkouts():
+    return CheckoutDB.objects.filter(updated_at__lt=_cutoff('checkouts'))
+
+
+PHASES = {
+    'sessions': expired_sessions,
+    'cart_items': stale_cart_items,
+    'carts': orphaned_carts,
+    'checkouts': stale_checkouts,
+}
+
+
+def purge(queryset, batch_size=5000, sleep=0.5, dry_run=False):
+    """Delete ``queryset`` ``batch_size`` rows at a time; returns the number of rows."""
+    if dry_run:
+        return queryset.count()
+    model = queryset.model
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        with transaction.atomic():
+            # delete() also clears dependent rows (cart items of a cart, their variations)
+            model.objects.filter(pk__in=pks).delete()
+        deleted += len(pks)
+        if len(pks) < batch_size:
+            return deleted
+        time.sleep(sleep)
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cart.maintenance import PHASES, purge
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions, abandoned anonymous carts and stale checkout data in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='+', choices=list(PHASES), help='Run only these phases')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per transaction (default: %(default)s)')
+        parser.add_argument('--sleep', type=float, default=0.5, help='Seconds to pause between batches (default: %(default)s)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be deleted')
+
+    def handle(self, *args, **options):
+        for name in options['only'] or PHASES:
+            started = time.monotonic()
+            rows = purge(
+                PHASES[name](),
+                batch_size=options['batch_size'],
+                sleep=options['sleep'],
+                dry_run=options['dry_run'],
+            )
+            seconds = time.monotonic() - started
+            verb = 'would delete' if options['dry_run'] else 'deleted'
+            self.stdout.write(f'{name}: {verb} {rows} rows in {seconds:.2f}s')
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0007_remove_cart_cart_cart_id_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkoutdb',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
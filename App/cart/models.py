@@ -31,4 +31,5 @@ class CheckoutDB(models.Model):
     user = models.ForeignKey(Account, on_delete=models.CASCADE)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     delivery_area = models.CharField(max_length=100, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
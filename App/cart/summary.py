@@ -0,0 +1,93 @@
+"""
+Per-cart summary: total quantity, product ids and subtotal.
+
+For signed-in users it is computed with one grouped query and cached under
+a per-user tag (cart:user:<id>) that every cart change bumps, and the
+PRODUCTS tag so price changes reach the subtotal, so the navbar
+counter and the product page's "in your cart" hint read it without touching
+CartItems. Anonymous carts live in a cookie (cart.anonymous): their count
+and product ids are read from it, and only the subtotal needs a query,
+cached per cart content.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import DecimalField, F, Sum
+
+from factors_Ecom.cache import get_or_set_tagged, invalidate_tags
+from product.caching import PRODUCTS
+from .anonymous import AnonymousCart
+from .models import CartItems
+
+
+EMPTY_SUMMARY = {'count': 0, 'product_ids': frozenset(), 'subtotal': Decimal('0.00')}
+
+
+def cart_tag(user_id):
+    return f'cart:user:{user_id}'
+
+
+def build_summary(user_id):
+    rows = (
+        CartItems.objects
+        .filter(user_id=user_id, is_active=True)
+        .values('product_id')
+        .annotate(
+            total_quantity=Sum('quantity'),
+            total_price=Sum(
+                F('quantity') * F('product__product_price'),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+        .order_by()
+    )
+    summary = {'count': 0, 'product_ids': set(), 'subtotal': Decimal('0.00')}
+    for row in rows:
+        summary['count'] += row['total_quantity']
+        summary['product_ids'].add(row['product_id'])
+        summary['subtotal'] += row['total_price'] or 0
+    summary['product_ids'] = frozenset(summary['product_ids'])
+    return summary
+
+
+def anonymous_summary(cart):
+    if not cart:
+        return EMPTY_SUMMARY
+    digest = hashlib.md5(json.dumps(cart.lines).encode()).hexdigest()
+    return {
+        'count': cart.count(),
+        'product_ids': cart.product_ids(),
+        # prices change with the products
+        'subtotal': get_or_set_tagged(
+            f'cart_subtotal:{digest}', [PRODUCTS], cart.subtotal, settings.CART_SUMMARY_TIMEOUT,
+        ),
+    }
+
+
+def get_cart_summary(request):
+    """The request's cart summary, cached until the cart changes."""
+    if not hasattr(request, '_cart_summary'):
+        if request.user.is_authenticated:
+            user_id = request.user.pk
+            request._cart_summary = get_or_set_tagged(
+                f'cart_summary:{user_id}',
+                [cart_tag(user_id), PRODUCTS],
+                lambda: build_summary(user_id),
+                settings.CART_SUMMARY_TIMEOUT,
+            )
+        else:
+            request._cart_summary = anonymous_summary(AnonymousCart(request))
+    return request._cart_summary
+
+
+def invalidate_cart_summary(user):
+    if user is not None and user.is_authenticated:
+        invalidate_tags(cart_tag(user.pk))
+
+
+def invalidate_request_cart(request):
+    """Drop the cached summary of the request's cart after changing it."""
+    invalidate_cart_summary(request.user)
+    request.__dict__.pop('_cart_summary', None)
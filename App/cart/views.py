@@ -1,77 +1,90 @@
+import logging
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from product.models import Product, Variation
+from product.variations import resolve_variations
+from .anonymous import AnonymousCart
 from .models import Cart, CartItems, CheckoutDB
+from .summary import invalidate_cart_summary, invalidate_request_cart
 from django.core.exceptions import ObjectDoesNotExist
+from django.contrib import messages
+from django.db import transaction
 from django.contrib.auth.decorators import login_required
 
+logger = logging.getLogger(__name__)
+
 # Create your views here.
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseBadRequest
 
 
-def merge_carts(user, session_key):
+def merge_carts(user, session_key, anonymous_cart=None):
     """
     Merges anonymous user's cart items with authenticated user's cart items.
     
     Process:
-    Get the anonymous cart by session key
-    Get the user's authenticated cart (or create one)
-    For each item in the anonymous cart:
+    Collect the lines of the anonymous cookie cart (cart.anonymous) and the
+    items of an older session-based Cart, if any
+    For each of them:
     Check if the user already has the same product with same variations
     If yes: sum the quantities
-    If no: transfer the item to the user's cart
-    Optionally delete the anonymous cart after merging
+    If no: create the item for the user (or transfer the old one)
+    Delete the session-based Cart after merging
     
     Args:
         user: The authenticated user object
-        session_key: The session key of the anonymous user
+        session_key: The session key of the anonymous user, may be None
+        anonymous_cart: The AnonymousCart read from the request's cookie
     """
-    try:
-        # Get the anonymous cart by session key
-        anonymous_cart = Cart.objects.get(cart_id=session_key)
-    except Cart.DoesNotExist:
-        # No anonymous cart to merge
+    # (product id, variation ids, quantity, existing CartItems row or None)
+    lines = [(*line, None) for line in anonymous_cart.lines] if anonymous_cart else []
+    if session_key:
+        legacy_items = CartItems.objects.filter(cart__cart_id=session_key, user__isnull=True).prefetch_related('variations')
+        lines.extend(
+            (item.product_id, [v.id for v in item.variations.all()], item.quantity, item)
+            for item in legacy_items
+        )
+    if not lines:
         return
-    
-    # Get or create the user's authenticated cart using the new session key
-    try:
-        user_cart = Cart.objects.get(cart_id=session_key)
-    except Cart.DoesNotExist:
-        user_cart = Cart.objects.create(cart_id=session_key)
-    
-    # Get all items from the anonymous cart
-    anonymous_cart_items = CartItems.objects.filter(cart=anonymous_cart).select_related('product').prefetch_related('variations')
-    
-    for anon_item in anonymous_cart_items:
-        # Get the variations for this anonymous item
-        anon_variations = list(anon_item.variations.all())
-        
-        # Check if user already has this product with the same variations
-        user_cart_items = CartItems.objects.filter(
-            user=user,
-            product=anon_item.product
-        ).select_related('product').prefetch_related('variations')
-        
-        item_found = False
-        
-        for user_item in user_cart_items:
-            user_variations = list(user_item.variations.all())
-            
-            # Compare variations: both list must have same elements
-            if set(anon_variations) == set(user_variations):
+
+    # cookie lines may point at products or variations deleted since
+    product_ids = {line[0] for line in lines}
+    valid_products = set(Product.objects.filter(pk__in=product_ids).values_list('pk', flat=True))
+    valid_variations = set(
+        Variation.objects
+        .filter(pk__in={pk for line in lines for pk in line[1]}, product_id__in=product_ids)
+        .values_list('pk', 'product_id')
+    )
+
+    user_items = {}
+    for item in CartItems.objects.filter(user=user).prefetch_related('variations'):
+        user_items.setdefault((item.product_id, frozenset(v.id for v in item.variations.all())), item)
+
+    with transaction.atomic():
+        for product_id, variation_ids, quantity, legacy_item in lines:
+            if product_id not in valid_products:
+                continue
+            variation_ids = [pk for pk in variation_ids if (pk, product_id) in valid_variations]
+            key = (product_id, frozenset(variation_ids))
+            if key in user_items:
                 # Same product with same variations - merge quantities
-                user_item.quantity += anon_item.quantity
-                user_item.save()
-                item_found = True
-                break
-        
-        if not item_found:
-            anon_item.user = user
-            anon_item.cart = user_cart
-            anon_item.save()
-    
-    
-    if anonymous_cart.cart_id != user_cart.cart_id:
-        anonymous_cart.delete()
+                user_items[key].quantity += quantity
+                user_items[key].save(update_fields=['quantity'])
+                if legacy_item:
+                    legacy_item.delete()
+            elif legacy_item:
+                legacy_item.user = user
+                legacy_item.cart = None
+                legacy_item.save(update_fields=['user', 'cart'])
+                user_items[key] = legacy_item
+            else:
+                item = CartItems.objects.create(user=user, product_id=product_id, quantity=quantity)
+                if variation_ids:
+                    item.variations.add(*variation_ids)
+                user_items[key] = item
+        if session_key:
+            Cart.objects.filter(cart_id=session_key).delete()
+    invalidate_cart_summary(user)
 
 def _cart_id(request):
     cart = request.session.session_key
@@ -80,48 +93,42 @@ def _cart_id(request):
     return cart
 
 def add_cart(request, product_id):
-    print(f"DEBUG: add_cart called with product_id={product_id}")
-    print(f"DEBUG: request.method={request.method}")
-    print(f"DEBUG: POST data={request.POST}")
-    
+    logger.debug('add_cart product_id=%s method=%s', product_id, request.method)
+
     current_user = request.user
     try:
         product = Product.objects.get(id=product_id) 
-        print(f"DEBUG: Product found: {product.product_name}")
+        logger.debug('Product found: %s', product.product_name)
     except Product.DoesNotExist:
-        print(f"DEBUG: Product with id {product_id} does not exist")
+        logger.debug('Product with id %s does not exist', product_id)
         return redirect('cart')
     
     # Get quantity from form, default to 1 if not provided
-    quantity = int(request.POST.get('quantity', 1))
-    print(f"DEBUG: Quantity={quantity}")
-    
     try:
-        cart = Cart.objects.get(cart_id=_cart_id(request))
-        print(f"DEBUG: Existing cart found: {cart.cart_id}")
-    except Cart.DoesNotExist:
-        cart = Cart.objects.create(cart_id=_cart_id(request))
-        print(f"DEBUG: New cart created: {cart.cart_id}")
-    cart.save()
+        quantity = int(request.POST.get('quantity', 1))
+    except (TypeError, ValueError):
+        return HttpResponseBadRequest('Invalid quantity')
+    if not 1 <= quantity <= settings.CART_MAX_QUANTITY:
+        return HttpResponseBadRequest('Invalid quantity')
+    logger.debug('Quantity=%s', quantity)
     
     # If the user is authenticated
     if current_user.is_authenticated:
-        print(f"DEBUG: User is authenticated: {current_user.username}")
+        try:
+            cart = Cart.objects.get(cart_id=_cart_id(request))
+            logger.debug('Existing cart found: %s', cart.cart_id)
+        except Cart.DoesNotExist:
+            cart = Cart.objects.create(cart_id=_cart_id(request))
+            logger.debug('New cart created: %s', cart.cart_id)
+        cart.save()
+
+        logger.debug('User is authenticated: %s', current_user.username)
         product_variation = []
         if request.method == 'POST':
-            for item in request.POST:
-                key = item
-                value = request.POST[key]
-
-                try:
-                    variation = Variation.objects.get(product=product, variation_category__iexact=key, variation_value__iexact=value)
-                    product_variation.append(variation)
-                    print(f"DEBUG: Found variation: {key}={value}")
-                except:
-                    pass
+            product_variation = resolve_variations(product.id, request.POST)
 
         is_cart_item_exists = CartItems.objects.filter(product=product, user=current_user, cart=cart).select_related('product', 'user', 'cart').prefetch_related('variations').exists()
-        print(f"DEBUG: Cart item exists: {is_cart_item_exists}")
+        logger.debug('Cart item exists: %s', is_cart_item_exists)
         
         if is_cart_item_exists:
             cart_item = CartItems.objects.filter(product=product, user=current_user, cart=cart).select_related('product', 'user', 'cart').prefetch_related('variations')
@@ -137,15 +144,15 @@ def add_cart(request, product_id):
             for i, existing_variations in enumerate(ex_var_list):
                 # Compare variation IDs instead of objects
                 existing_ids = sorted([v.id for v in existing_variations])
-                current_ids = sorted([v.id for v in product_variation]) if product_variation else []
+                current_ids = sorted(product_variation)
                 
                 if existing_ids == current_ids:
                     # Found matching item, increase quantity
                     item_id = id[i]
                     item = CartItems.objects.get(product=product, id=item_id)
-                    item.quantity += quantity
+                    item.quantity = min(item.quantity + quantity, settings.CART_MAX_QUANTITY)
                     item.save()
-                    print(f"DEBUG: Updated existing item quantity to {item.quantity}")
+                    logger.debug('Updated existing item quantity to %s', item.quantity)
                     found_matching_item = True
                     break
 
@@ -156,7 +163,7 @@ def add_cart(request, product_id):
                     item.variations.clear()
                     item.variations.add(*product_variation)
                 item.save()
-                print(f"DEBUG: Created new cart item with quantity {quantity}")
+                logger.debug('Created new cart item with quantity %s', quantity)
         else:
             cart_item = CartItems.objects.create(
                 product = product,
@@ -168,94 +175,37 @@ def add_cart(request, product_id):
                 cart_item.variations.clear()
                 cart_item.variations.add(*product_variation)
             cart_item.save()
-            print(f"DEBUG: Created first cart item with quantity {quantity}")
-        print(f"DEBUG: Redirecting to cart")
+            logger.debug('Created first cart item with quantity %s', quantity)
+        logger.debug('Redirecting to cart')
+        invalidate_request_cart(request)
         return redirect('cart')
-    # If user is not authenticated
+    # If user is not authenticated: the cart is a signed cookie, no rows are written
     else:
-        print(f"DEBUG: User is not authenticated")
         product_variation = []
         if request.method == 'POST':
-            for item in request.POST:
-                key = item
-                value = request.POST[key]
-
-                try:
-                    variation = Variation.objects.get(product=product, variation_category__iexact=key, variation_value__iexact=value)
-                    product_variation.append(variation)
-                    print(f"DEBUG: Found variation: {key}={value}")
-                except:
-                    pass
-
-        is_cart_item_exists = CartItems.objects.filter(product=product, cart=cart).select_related('product', 'cart').prefetch_related('variations').exists()
-        print(f"DEBUG: Cart item exists: {is_cart_item_exists}")
-        
-        if is_cart_item_exists:
-            cart_item = CartItems.objects.filter(product=product, cart=cart).select_related('product', 'cart').prefetch_related('variations')
-            # existing_variations -> database
-            # current variation -> product_variation
-            # item_id -> database
-            ex_var_list = []
-            id = []
-            for item in cart_item:
-                existing_variation = item.variations.all()
-                ex_var_list.append(list(existing_variation))
-                id.append(item.id)
+            product_variation = resolve_variations(product.id, request.POST)
 
-            # Check for matching variations
-            found_matching_item = False
-            for i, existing_variations in enumerate(ex_var_list):
-                # Compare variation IDs instead of objects
-                existing_ids = sorted([v.id for v in existing_variations])
-                current_ids = sorted([v.id for v in product_variation]) if product_variation else []
-                
-                if existing_ids == current_ids:
-                    # Found matching item, increase quantity
-                    item_id = id[i]
-                    item = CartItems.objects.get(product=product, id=item_id)
-                    item.quantity += quantity
-                    item.save()
-                    print(f"DEBUG: Updated existing item quantity to {item.quantity}")
-                    found_matching_item = True
-                    break
-
-            if not found_matching_item:
-                # Create new item with different variations
-                item = CartItems.objects.create(product=product, quantity=quantity, cart=cart)
-                if len(product_variation) > 0:
-                    item.variations.clear()
-                    item.variations.add(*product_variation)
-                item.save()
-                print(f"DEBUG: Created new cart item with quantity {quantity}")
-        else:
-            cart_item = CartItems.objects.create(
-                product = product,
-                quantity = quantity,
-                cart = cart,
-            )
-            if len(product_variation) > 0:
-                cart_item.variations.clear()
-                cart_item.variations.add(*product_variation)
-            cart_item.save()
-            print(f"DEBUG: Created first cart item with quantity {quantity}")
-        print(f"DEBUG: Redirecting to cart")
-        return redirect('cart')
+        anonymous_cart = AnonymousCart(request)
+        if not anonymous_cart.add(product.id, product_variation, quantity):
+            messages.warning(request, 'Your cart is full. Please log in to add more products.')
+        return anonymous_cart.save(redirect('cart'))
 
 
 def remove_cart(request, product_id, cart_item_id):
 
     product = get_object_or_404(Product, id=product_id)
     try:
-        if request.user.is_authenticated:
-            cart_item = CartItems.objects.select_related('product', 'user').get(product=product, user=request.user, id=cart_item_id)
-        else:
-            cart = Cart.objects.get(cart_id=_cart_id(request))
-            cart_item = CartItems.objects.select_related('product', 'cart').get(product=product, cart=cart, id=cart_item_id)
+        if not request.user.is_authenticated:
+            anonymous_cart = AnonymousCart(request)
+            anonymous_cart.decrement(cart_item_id, product.id)
+            return anonymous_cart.save(redirect('cart'))
+        cart_item = CartItems.objects.select_related('product', 'user').get(product=product, user=request.user, id=cart_item_id)
         if cart_item.quantity > 1:
             cart_item.quantity -= 1
             cart_item.save()
         else:
             cart_item.delete()
+        invalidate_request_cart(request)
     except:
         pass
     return redirect('cart')
@@ -263,12 +213,13 @@ def remove_cart(request, product_id, cart_item_id):
 
 def remove_cart_item(request, product_id, cart_item_id):
     product = get_object_or_404(Product, id=product_id)
-    if request.user.is_authenticated:
-        cart_item = CartItems.objects.select_related('product', 'user').get(product=product, user=request.user, id=cart_item_id)
-    else:
-        cart = Cart.objects.get(cart_id=_cart_id(request))
-        cart_item = CartItems.objects.select_related('product', 'cart').get(product=product, cart=cart, id=cart_item_id)
+    if not request.user.is_authenticated:
+        anonymous_cart = AnonymousCart(request)
+        anonymous_cart.remove(cart_item_id, product.id)
+        return anonymous_cart.save(redirect('cart'))
+    cart_item = CartItems.objects.select_related('product', 'user').get(product=product, user=request.user, id=cart_item_id)
     cart_item.delete()
+    invalidate_request_cart(request)
     return redirect('cart')
 
 
@@ -298,8 +249,7 @@ def cart(request, total=0, quantity=0, cart_items=None):
         if request.user.is_authenticated:
             cart_items = CartItems.objects.filter(user=request.user, is_active=True).select_related('product').prefetch_related('variations')
         else:
-            cart = Cart.objects.get(cart_id=_cart_id(request))
-            cart_items = CartItems.objects.filter(cart=cart, is_active=True).select_related('product').prefetch_related('variations')
+            cart_items = AnonymousCart(request).items()
 
         for cart_item in cart_items:
             total += cart_item.product.product_price * cart_item.quantity
@@ -353,8 +303,7 @@ def checkout(request, total=0, quantity=0, cart_items=None):
         if request.user.is_authenticated:
             cart_items = CartItems.objects.filter(user=request.user, is_active=True).select_related('product').prefetch_related('variations')
         else:
-            cart = Cart.objects.get(cart_id=_cart_id(request))
-            cart_items = CartItems.objects.filter(cart=cart, is_active=True).select_related('product').prefetch_related('variations')
+            cart_items = AnonymousCart(request).items()
 
         for cart_item in cart_items:
             total += cart_item.product.product_price * cart_item.quantity
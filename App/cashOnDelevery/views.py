@@ -4,6 +4,7 @@ from django.shortcuts import render
 from django.shortcuts import render, redirect, get_object_or_404
 from orders.models import Payment, Order, OrderProduct
 from cart.models import CartItems
+from cart.summary import invalidate_cart_summary
 from django.contrib import messages
 from django.urls import reverse
 from django.utils import timezone
@@ -55,6 +56,7 @@ def cod_payment(request, order_number):
             item.product.save()
 
         cart_items.delete()
+        invalidate_cart_summary(request.user)
 
         messages.success(
             request,
@@ -1,5 +1,5 @@
-from .models import Category
+from factors_Ecom.context import lazy_context
+from .menu import get_menu
 
 def menu_links(request):
-    links = Category.objects.all()
-    return dict(links=links)
\ No newline at end of file
+    return lazy_context(request, links=get_menu)
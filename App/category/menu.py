@@ -0,0 +1,37 @@
+"""
+Category menu shared by the navbar and the store sidebar.
+
+Built with one query (categories with their available-product counts) into
+plain dicts with precomputed URLs, and cached under the catalog tags: it is
+rebuilt only after a category or product is saved or deleted, and rendering
+it costs no query.
+"""
+from django.conf import settings
+from django.db.models import Count, Q
+
+from factors_Ecom.cache import get_or_set_tagged
+from product.caching import CATALOG, PRODUCTS
+from product.images import image_set
+from .models import Category
+
+
+def build_menu():
+    categories = (
+        Category.objects
+        .annotate(product_count=Count('product', filter=Q(product__is_available=True)))
+        .order_by('id')
+    )
+    return [
+        {
+            'category_name': category.category_name,
+            'slug': category.slug,
+            'url': category.get_url(),
+            'product_count': category.product_count,
+            'image': image_set(category.category_img, 'thumb'),
+        }
+        for category in categories
+    ]
+
+
+def get_menu():
+    return get_or_set_tagged('category_menu', [CATALOG, PRODUCTS], build_menu, settings.CATALOG_CACHE_TIMEOUT)
@@ -0,0 +1,91 @@
+"""
+Tag-based cache invalidation.
+
+Every tag (e.g. "product:12", "category:shoes", "catalog") has a version
+stored in the default cache. Cache keys for tagged entries embed the current
+versions of their tags, so bumping a tag's version makes every entry that
+depends on it unreachable at once; the stale entries simply age out. This
+works the same on LocMemCache, Redis or memcached and needs no key scans.
+"""
+import hashlib
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.views.decorators.cache import cache_page
+
+
+TAG_KEY_PREFIX = 'cachetag:'
+
+
+def _tag_key(tag):
+    return f'{TAG_KEY_PREFIX}{tag}'
+
+
+def _new_version():
+    # Versions must never repeat, even if the version key itself gets evicted,
+    # otherwise an old entry could become reachable again.
+    return f'{time.time_ns():x}.{uuid.uuid4().hex[:8]}'
+
+
+def tag_versions(tags):
+    """Return the current version of each tag, creating missing ones."""
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate_tags(*tags):
+    """Make every entry cached under any of ``tags`` stale."""
+    if tags:
+        cache.set_many({_tag_key(tag): _new_version() for tag in set(tags)}, timeout=None)
+
+
+def tagged_key(key, tags):
+    digest = hashlib.md5('|'.join(tag_versions(tags)).encode()).hexdigest()
+    return f'{key}:{digest}'
+
+
+def get_or_set_tagged(key, tags, default, timeout=None):
+    """cache.get_or_set() for an entry that depends on ``tags``."""
+    return cache.get_or_set(tagged_key(key, tags), default, timeout)
+
+
+def is_shared_request(request):
+    """
+    True for requests that carry no per-visitor state: no session (so no
+    signed-in user and no session cart), no cart and no messages cookie.
+    Only these may share a cached page; everything else renders the navbar
+    (user name, cart count, messages) for the visitor.
+    """
+    personal = (settings.SESSION_COOKIE_NAME, settings.ANONYMOUS_CART_COOKIE, CookieStorage.cookie_name)
+    return not any(request.COOKIES.get(name) for name in personal)
+
+
+def cache_page_tagged(timeout, tags):
+    """
+    Like ``cache_page`` but the cached response is dropped as soon as one of
+    its tags is invalidated. ``tags`` is a list, or a callable taking the
+    view's arguments and returning one.
+
+    ``cache_page`` runs inside the view, before SessionMiddleware adds
+    ``Vary: Cookie``, so its key can't tell visitors apart: the cache is only
+    read and written for shared requests (see ``is_shared_request``).
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if not is_shared_request(request):
+                return view_func(request, *args, **kwargs)
+            view_tags = tags(request, *args, **kwargs) if callable(tags) else tags
+            key_prefix = 'tagged.' + hashlib.md5('|'.join(tag_versions(view_tags)).encode()).hexdigest()
+            return cache_page(timeout, key_prefix=key_prefix)(view_func)(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,27 @@
+"""
+Lazy values for context processors.
+
+Context processors run for every render(), whether or not the template uses
+what they return. ``lazy_context`` wraps each value in a SimpleLazyObject so
+its query only runs when a template actually reads the variable. A view can
+opt out of the custom processors entirely with ``@skip_context_processors``
+(for pages that don't extend base.html).
+"""
+from functools import wraps
+
+from django.utils.functional import SimpleLazyObject
+
+
+def skip_context_processors(view_func):
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        request.skip_context_processors = True
+        return view_func(request, *args, **kwargs)
+    return _wrapped_view
+
+
+def lazy_context(request, **values):
+    """{name: SimpleLazyObject(callable)}, or nothing when the view opted out."""
+    if getattr(request, 'skip_context_processors', False):
+        return {}
+    return {name: SimpleLazyObject(func) for name, func in values.items()}
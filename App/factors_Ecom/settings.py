@@ -1,6 +1,7 @@
 from pathlib import Path
 from decouple import config
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 import cloudinary
 
 # environment variables
@@ -156,9 +157,40 @@ cloudinary.config(
     api_secret=config('CLOUDINARY_API_SECRET'),
 )
 
+# Product image variants: 'cloudinary' builds transformation URLs, 'local' resizes
+# files under MEDIA_ROOT with Pillow (development and tests without Cloudinary)
+PRODUCT_IMAGE_BACKEND = config('PRODUCT_IMAGE_BACKEND', default='cloudinary')
+PRODUCT_IMAGE_PRESETS = {
+    'thumb': {'widths': [80, 160], 'sizes': '80px'},
+    'card': {'widths': [200, 300, 400, 600], 'sizes': '(max-width: 576px) 50vw, (max-width: 992px) 33vw, 300px'},
+    'detail': {'widths': [480, 768, 1024], 'sizes': '(max-width: 768px) 100vw, 600px'},
+    'zoom': {'widths': [1600], 'sizes': '100vw'},
+}
+
 # ================= CACHING =================
-CACHES = {
-    'default': {
+# Cache tag versions (factors_Ecom.cache) live in the default cache, so
+# invalidations only reach every worker and management command when it is
+# shared: CACHE_URL=redis://host:6379/0 or db://<table> (run createcachetable).
+# Without it each process has its own LocMemCache and catalog entries are
+# only kept for SHARED_CACHE_FALLBACK_TIMEOUT.
+CACHE_URL = config('CACHE_URL', default='')
+SHARED_CACHE = bool(CACHE_URL)
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    DEFAULT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_URL,
+        'TIMEOUT': 300,
+    }
+elif CACHE_URL.startswith('db://'):
+    DEFAULT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': CACHE_URL[len('db://'):] or 'django_cache',
+        'TIMEOUT': 300,
+    }
+elif CACHE_URL:
+    raise ImproperlyConfigured(f'Unsupported CACHE_URL {CACHE_URL!r}, use redis://, rediss:// or db://')
+else:
+    DEFAULT_CACHE = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
         'TIMEOUT': 300,  # 5 minutes default
@@ -167,8 +199,93 @@ CACHES = {
             'CULL_FREQUENCY': 3,
         }
     }
+SHARED_CACHE_FALLBACK_TIMEOUT = 60 * 15
+
+CACHES = {
+    'default': DEFAULT_CACHE,
+    # Normalized search query -> ordered product ids (product.query_cache).
+    # LocMemCache evicts least recently used entries first once full.
+    'search': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'search-results',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': config('SEARCH_CACHE_MAX_ENTRIES', default=5000, cast=int),
+            'CULL_FREQUENCY': 10,
+        }
+    },
+}
+
+# ================= CATALOG =================
+# Catalog pages are invalidated by product.signals, so they can be cached for
+# long, but only with a shared cache (see CACHE_URL)
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+if not SHARED_CACHE:
+    CATALOG_CACHE_TIMEOUT = min(CATALOG_CACHE_TIMEOUT, SHARED_CACHE_FALLBACK_TIMEOUT)
+# 'offset' keeps numbered pages; 'cursor' switches the store to keyset paging (?after=/?before=)
+STORE_PAGINATION = config('STORE_PAGINATION', default='offset')
+STORE_PAGE_SIZE = config('STORE_PAGE_SIZE', default=12, cast=int)
+# (low, high) price filter buckets in BDT; None means "and above"
+STORE_PRICE_RANGES = [(0, 500), (500, 1000), (1000, 5000), (5000, None)]
+
+# Home page sections, each capped to `limit` products and cached until the catalog changes
+HOME_SECTIONS = [
+    {'type': 'new_arrivals', 'key': 'new-arrivals', 'title': 'New Arrivals', 'limit': 8},
+    {'type': 'best_sellers', 'key': 'best-sellers', 'title': 'Best Sellers', 'limit': 8},
+    {'type': 'category_rows', 'key': 'category', 'limit': 4, 'max_categories': 6},
+]
+
+# Search results are paged like the store; totals above the cap are shown as "N+".
+SEARCH_RESULTS_PER_PAGE = config('SEARCH_RESULTS_PER_PAGE', default=12, cast=int)
+SEARCH_RESULT_CAP = config('SEARCH_RESULT_CAP', default=1000, cast=int)
+# The "did you mean" index is built and refreshed by a background thread in
+# each process; turn this off to refresh inline (tests, one-off scripts).
+FUZZY_INDEX_BACKGROUND = config('FUZZY_INDEX_BACKGROUND', default=True, cast=bool)
+
+# Navbar autocomplete: a memory-mapped prefix index shared by all workers on a host,
+# rebuilt by `manage.py rebuild_autocomplete_index` and, AUTOCOMPLETE_REBUILD_DELAY
+# seconds after names change, in the background (None: only by the command --if-stale)
+AUTOCOMPLETE_INDEX_PATH = config('AUTOCOMPLETE_INDEX_PATH', default=str(BASE_DIR / 'var' / 'autocomplete.idx'))
+AUTOCOMPLETE_REBUILD_DELAY = config('AUTOCOMPLETE_REBUILD_DELAY', default=30, cast=lambda v: None if v in ('', 'None') else float(v))
+AUTOCOMPLETE_LIMIT = config('AUTOCOMPLETE_LIMIT', default=8, cast=int)
+
+# Precomputed by `manage.py build_recommendations`; the product page shows the best few
+RECOMMENDATIONS_TOP_K = config('RECOMMENDATIONS_TOP_K', default=12, cast=int)
+RECOMMENDATIONS_SHOWN = config('RECOMMENDATIONS_SHOWN', default=4, cast=int)
+
+# Products per sitemap file (the protocol allows up to 50,000)
+SITEMAP_PAGE_SIZE = config('SITEMAP_PAGE_SIZE', default=10000, cast=int)
+
+# Marketplace / ad catalog feeds written by `manage.py export_product_feed`
+SITE_URL = config('SITE_URL', default='http://localhost:8001')
+FEED_CURRENCY = config('FEED_CURRENCY', default='BDT')
+FEED_BRAND = config('FEED_BRAND', default='')
+FEED_STATE_PATH = config('FEED_STATE_PATH', default=str(BASE_DIR / 'var' / 'product_feed.json'))
+
+# Cart count / product ids / subtotal per cart, dropped whenever the cart changes
+CART_SUMMARY_TIMEOUT = config('CART_SUMMARY_TIMEOUT', default=60 * 60, cast=int)
+
+# Largest quantity of one cart line; add_cart rejects anything outside 1..this
+CART_MAX_QUANTITY = config('CART_MAX_QUANTITY', default=99, cast=int)
+
+# Carts of visitors who aren't logged in live in a signed cookie until login (cart.anonymous)
+ANONYMOUS_CART_COOKIE = 'cart'
+ANONYMOUS_CART_MAX_BYTES = config('ANONYMOUS_CART_MAX_BYTES', default=2048, cast=int)
+ANONYMOUS_CART_MAX_AGE = config('ANONYMOUS_CART_MAX_AGE', default=60 * 60 * 24 * 30, cast=int)
+
+# Retention in days for `manage.py purge_stale_data` (sessions: days past their expiry date)
+PURGE_RETENTION_DAYS = {
+    'sessions': config('PURGE_SESSIONS_DAYS', default=0, cast=int),
+    'cart_items': config('PURGE_CART_ITEMS_DAYS', default=30, cast=int),
+    'carts': config('PURGE_CARTS_DAYS', default=30, cast=int),
+    'checkouts': config('PURGE_CHECKOUTS_DAYS', default=90, cast=int),
 }
 
+# Warehouse stock deltas (POST /store/stock/sync/ or `manage.py sync_stock`);
+# the API is disabled while no token is set
+STOCK_SYNC_TOKEN = config('STOCK_SYNC_TOKEN', default='')
+STOCK_SYNC_CHUNK_SIZE = config('STOCK_SYNC_CHUNK_SIZE', default=1000, cast=int)
+
 # ================= SESSION =================
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 1209600
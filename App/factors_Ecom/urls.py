@@ -17,12 +17,16 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from .views import home
+from product import views as product_views
 from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', home, name='home'),
+    path('sitemap.xml', product_views.sitemap_index, name='sitemap'),
+    path('sitemap-categories.xml', product_views.sitemap_categories, name='sitemap_categories'),
+    path('sitemap-products-<int:page>.xml', product_views.sitemap_products, name='sitemap_products'),
     path('store/', include('product.urls')),
     path('cart/', include('cart.urls')),
     path('accounts/', include('accounts.urls')),
@@ -1,9 +1,8 @@
 from django.shortcuts import render
-from product.models import Product
+from product.home_feed import get_home_feed
 
 def home(request):
-    products = Product.objects.all().filter(is_available=True)
     context = {
-        'products':products
+        'sections': get_home_feed(),
     }
     return render(request, 'home.html', context)
@@ -0,0 +1,270 @@
+"""
+Navbar autocomplete backed by a memory-mapped prefix index.
+
+The index is a sorted array of normalized keys written to a single file
+(settings.AUTOCOMPLETE_INDEX_PATH). Every gunicorn worker maps the same file,
+so the operating system keeps one copy in the page cache, and a lookup is a
+binary search plus a short forward scan. Product and category names are
+indexed from every word, so "shirt" also finds "Denim Shirt".
+
+File layout (little endian):
+
+    MAGIC | count: u32 | count x offset: u32 | records
+
+Each record is ``key 0x1f kind 0x1f position 0x1f label 0x1f url \\n`` in
+UTF-8, sorted by the key's bytes. The index is replaced atomically, and
+readers reopen it when the file changes.
+
+Rebuilding scans the whole catalog, so it never runs in a request. When a
+name changes, product.signals calls schedule_rebuild(), which only touches a
+"<index>.stale" marker and arms a per-process timer; after
+AUTOCOMPLETE_REBUILD_DELAY seconds one process (holding "<index>.lock")
+rebuilds, so a burst of edits costs one rebuild. With the delay set to None
+no timer is armed and `rebuild_autocomplete_index --if-stale` (e.g. from
+cron) picks the marker up. While there is no index file, suggestions are
+empty.
+"""
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+
+from category.models import Category
+from .models import Product
+
+try:
+    import fcntl
+except ImportError:  # Windows: rebuilds are not serialized between processes
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'ACIDX1\n'
+SEPARATOR = '\x1f'
+CATEGORY = 'category'
+PRODUCT = 'product'
+MAX_WORDS = 6
+# how many matching keys are looked at before ranking
+SCAN_FACTOR = 8
+
+_whitespace = re.compile(r'\s+')
+
+
+def normalize(text):
+    return _whitespace.sub(' ', text.replace(SEPARATOR, ' ')).strip().casefold()
+
+
+def _clean(text):
+    return _whitespace.sub(' ', str(text).replace(SEPARATOR, ' ')).strip()
+
+
+def _keys(label):
+    """The normalized label starting at each of its first words."""
+    words = normalize(label).split(' ')
+    return [(' '.join(words[i:]), i) for i in range(min(len(words), MAX_WORDS)) if words[i]]
+
+
+def build_entries():
+    """(key, kind, position, label, url) for every category and available product."""
+    entries = []
+    for name, slug in Category.objects.values_list('category_name', 'slug'):
+        url = reverse('category_list_slug', args=[slug])
+        entries.extend((key, CATEGORY, position, _clean(name), url) for key, position in _keys(name))
+
+    products = (
+        Product.objects
+        .filter(is_available=True)
+        .values_list('product_name', 'canonical_path', 'product_slug', 'product_category__slug')
+    )
+    for name, path, slug, category_slug in products.iterator(chunk_size=2000):
+        url = path or reverse('product_detail', args=[category_slug, slug])
+        entries.extend((key, PRODUCT, position, _clean(name), url) for key, position in _keys(name))
+    return entries
+
+
+def write_index(entries, path):
+    records = sorted(
+        SEPARATOR.join((key, kind, str(position), label, url)).encode() + b'\n'
+        for key, kind, position, label, url in entries
+    )
+    offsets = []
+    offset = len(MAGIC) + 4 + 4 * len(records)
+    for record in records:
+        offsets.append(offset)
+        offset += len(record)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(records)))
+            f.write(struct.pack(f'<{len(records)}I', *offsets))
+            f.writelines(records)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return len(records)
+
+
+def rebuild_index(path=None):
+    """Rebuild the index file from the database; returns the number of keys."""
+    return write_index(build_entries(), path or settings.AUTOCOMPLETE_INDEX_PATH)
+
+
+def _marker(path):
+    return f'{path}.stale'
+
+
+def mark_stale(path=None):
+    path = Path(path or settings.AUTOCOMPLETE_INDEX_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Path(_marker(path)).touch()
+
+
+def rebuild_if_stale(path=None):
+    """
+    Rebuild when the index is marked stale or missing; returns the number of
+    keys, or None when there was nothing to do or another process is at it.
+    """
+    path = str(path or settings.AUTOCOMPLETE_INDEX_PATH)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(f'{path}.lock', 'w') as lock:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+        if os.path.exists(path) and not os.path.exists(_marker(path)):
+            return None
+        # changes committed while we build mark the index stale again
+        try:
+            os.unlink(_marker(path))
+        except FileNotFoundError:
+            pass
+        try:
+            return rebuild_index(path)
+        except BaseException:
+            mark_stale(path)
+            raise
+
+
+_timer_lock = threading.Lock()
+_timers = {}
+
+
+def _run_scheduled(path):
+    with _timer_lock:
+        _timers.pop(path, None)
+    try:
+        rebuild_if_stale(path)
+    except Exception:
+        logger.exception('Rebuilding the autocomplete index %s failed', path)
+    finally:
+        connection.close()
+
+
+def schedule_rebuild(path=None):
+    """Mark the index stale and rebuild it outside the request, debounced."""
+    path = str(path or settings.AUTOCOMPLETE_INDEX_PATH)
+    mark_stale(path)
+    delay = settings.AUTOCOMPLETE_REBUILD_DELAY
+    if delay is None:
+        return
+    with _timer_lock:
+        if path not in _timers:
+            timer = _timers[path] = threading.Timer(delay, _run_scheduled, args=[path])
+            timer.daemon = True
+            timer.start()
+
+
+class PrefixIndex:
+    """Read-only view of an index file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{path} is not an autocomplete index')
+        self._count = struct.unpack_from('<I', self._map, len(MAGIC))[0]
+        self._offsets_at = len(MAGIC) + 4
+
+    def __len__(self):
+        return self._count
+
+    def _record(self, i):
+        start = struct.unpack_from('<I', self._map, self._offsets_at + 4 * i)[0]
+        end = self._map.find(b'\n', start)
+        return self._map[start:end]
+
+    def _key(self, i):
+        record = self._record(i)
+        return record[:record.find(SEPARATOR.encode())]
+
+    def __getitem__(self, i):
+        # lets bisect compare keys without loading the whole array
+        return self._key(i)
+
+    def scan(self, prefix, limit):
+        """Up to ``limit`` records whose key starts with ``prefix``, in key order."""
+        needle = prefix.encode()
+        i = bisect_left(self, needle, 0, self._count)
+        records = []
+        while i < self._count and len(records) < limit:
+            record = self._record(i).decode()
+            if not record.startswith(prefix):
+                break
+            records.append(record.split(SEPARATOR))
+            i += 1
+        return records
+
+
+_local = threading.local()
+
+
+def get_index():
+    """The current index, reopened whenever the file has been replaced; None while there is none."""
+    path = settings.AUTOCOMPLETE_INDEX_PATH
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        schedule_rebuild(path)
+        return None
+    signature = (str(path), stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    if getattr(_local, 'signature', None) != signature:
+        _local.index = PrefixIndex(path)
+        _local.signature = signature
+    return _local.index
+
+
+def suggest(prefix, limit=None):
+    """Top categories and products whose name has a word starting with ``prefix``."""
+    prefix = normalize(prefix)
+    if not prefix:
+        return []
+    limit = limit or settings.AUTOCOMPLETE_LIMIT
+    index = get_index()
+    if index is None:
+        return []
+
+    seen = set()
+    matches = []
+    for key, kind, position, label, url in index.scan(prefix, limit * SCAN_FACTOR):
+        if (kind, url) in seen:
+            continue
+        seen.add((kind, url))
+        matches.append((kind != CATEGORY, int(position) != 0, len(label), label.casefold(), kind, label, url))
+
+    matches.sort()
+    return [{'type': kind, 'label': label, 'url': url} for *_, kind, label, url in matches[:limit]]
@@ -0,0 +1,58 @@
+"""
+Cache tags for catalog pages.
+
+- CATALOG: anything that renders category names or the menu; bumped when a
+  category changes.
+- PRODUCTS: listings across all categories (store, search).
+- category:<slug>: a single category listing and its product pages.
+- product:<id>: data of a single product.
+"""
+from django.apps import apps
+
+from factors_Ecom.cache import invalidate_tags
+
+
+CATALOG = 'catalog'
+PRODUCTS = 'products'
+
+
+def product_tag(product_id):
+    return f'product:{product_id}'
+
+
+def category_tag(category_slug):
+    return f'category:{category_slug}'
+
+
+def store_tags(request, category_slug=None):
+    if category_slug:
+        return [CATALOG, category_tag(category_slug)]
+    return [CATALOG, PRODUCTS]
+
+
+def invalidate_products(product_ids, category_slugs=None, listings=True):
+    """
+    Invalidate everything cached for the given products. The category slugs
+    are looked up when not passed in. With ``listings=False`` the listings
+    across all categories (PRODUCTS) are kept.
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    if category_slugs is None:
+        Product = apps.get_model('product', 'Product')
+        category_slugs = (
+            Product.objects
+            .filter(pk__in=product_ids)
+            .values_list('product_category__slug', flat=True)
+            .distinct()
+        )
+    invalidate_tags(
+        *([PRODUCTS] if listings else []),
+        *(product_tag(pk) for pk in product_ids),
+        *(category_tag(slug) for slug in category_slugs if slug),
+    )
+
+
+def invalidate_catalog():
+    invalidate_tags(CATALOG, PRODUCTS)
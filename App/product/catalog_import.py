@@ -0,0 +1,367 @@
+"""
+Bulk catalog import from CSV or JSON Lines.
+
+Rows are streamed from the file and applied a chunk at a time, each chunk in
+its own transaction with a handful of bulk queries: categories, products,
+variations and gallery images are looked up in one query per table and
+written with bulk_create/bulk_update. Memory therefore depends on the chunk
+size, not on the file size.
+
+Columns (CSV header or JSON keys):
+
+    category       category name (created if missing)
+    category_slug  optional, defaults to slugify(category)
+    product_name
+    product_slug   optional, defaults to slugify(product_name); the upsert key
+    description
+    price
+    stock
+    is_available   optional, defaults to stock > 0
+    image          URL or local file to upload, or an existing Cloudinary id
+    colors, sizes  variation values, "|"-separated in CSV or lists in JSON
+    gallery        extra images, same formats as image
+
+Images are uploaded before a chunk's transaction opens, so no row locks are
+held across the network, and are deleted again if the chunk then fails.
+Names that already belong to another product or category are reported as a
+CatalogRowError with their line number before anything is uploaded.
+
+Bulk writes skip model signals, so each chunk reindexes its products for
+search and invalidates their cached pages itself once it commits.
+"""
+import csv
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from cloudinary import uploader
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from category.models import Category
+from .caching import invalidate_catalog, invalidate_products
+from .models import Product, ProductGallery, Variation
+from .search import get_search_backend
+
+
+PRODUCT_UPDATE_FIELDS = [
+    'product_name', 'product_description', 'product_price', 'stock', 'is_available',
+    'product_category', 'product_img', 'canonical_path', 'image_urls',
+]
+
+
+class CatalogRowError(ValueError):
+    """A row that can't be imported; ``line`` is its line number in the file."""
+
+    def __init__(self, line, message):
+        super().__init__(f'line {line}: {message}')
+        self.line = line
+
+
+def read_rows(path, file_format=None):
+    """Yield (line number, dict) from a CSV or JSONL file, one row at a time."""
+    file_format = file_format or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if file_format == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line, text in enumerate(f, 1):
+                if text.strip():
+                    try:
+                        yield line, json.loads(text)
+                    except json.JSONDecodeError as e:
+                        raise CatalogRowError(line, f'invalid JSON ({e.msg})')
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _values(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in str(value).split('|') if v.strip()]
+
+
+def _bool(value):
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+def parse_row(line, raw):
+    """Validate one input row into the fields the importer needs."""
+    name = str(raw.get('product_name') or '').strip()
+    category = str(raw.get('category') or '').strip()
+    if not name:
+        raise CatalogRowError(line, 'product_name is required')
+    if not category:
+        raise CatalogRowError(line, 'category is required')
+    try:
+        price = Decimal(str(raw.get('price', '')).strip())
+        stock = int(str(raw.get('stock', '')).strip())
+    except (InvalidOperation, ValueError):
+        raise CatalogRowError(line, 'price and stock must be numbers')
+
+    available = raw.get('is_available')
+    return {
+        'line': line,
+        'category_name': category,
+        'category_slug': str(raw.get('category_slug') or '').strip() or slugify(category),
+        'name': name,
+        'slug': str(raw.get('product_slug') or '').strip() or slugify(name),
+        'description': str(raw.get('description') or '').strip(),
+        'price': price,
+        'stock': stock,
+        'is_available': stock > 0 if available in (None, '') else _bool(available),
+        'image': str(raw.get('image') or '').strip(),
+        'variations': [('color', v) for v in _values(raw.get('colors'))]
+                      + [('size', v) for v in _values(raw.get('sizes'))],
+        'gallery': _values(raw.get('gallery')),
+    }
+
+
+def _needs_upload(source):
+    return source.startswith(('http://', 'https://')) or os.path.isfile(source)
+
+
+class CatalogImporter:
+    def __init__(self, chunk_size=500, upload_workers=4, dry_run=False, replace_images=False):
+        self.chunk_size = chunk_size
+        self.upload_workers = upload_workers
+        self.dry_run = dry_run
+        self.replace_images = replace_images
+        self.stats = {'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'variations': 0, 'gallery': 0, 'uploads': 0}
+        self.image_field = Product._meta.get_field('product_img')
+        self.gallery_field = ProductGallery._meta.get_field('images')
+
+    # ------------------------------------------------------------ images
+
+    def _upload(self, field, source):
+        options = {'type': field.type, 'resource_type': field.resource_type, **field.options}
+        return uploader.upload_resource(source, **options)
+
+    def resolve_images(self, executor, field, sources):
+        """{source: CloudinaryResource}, uploading URLs and files on the thread pool."""
+        sources = set(filter(None, sources))
+        if self.dry_run:
+            return {source: source for source in sources}
+        resolved = {source: field.to_python(source) for source in sources if not _needs_upload(source)}
+        uploads = [source for source in sources if source not in resolved]
+        for source, resource in zip(uploads, executor.map(lambda s: self._upload(field, s), uploads)):
+            resolved[source] = resource
+        self.stats['uploads'] += len(uploads)
+        return resolved
+
+    def _chunk_images(self, rows, executor):
+        """Product and gallery images of a chunk, resolved outside of its transaction."""
+        with_image = set(
+            Product.objects
+            .filter(product_slug__in=[row['slug'] for row in rows])
+            .exclude(product_img__isnull=True).exclude(product_img='')
+            .values_list('product_slug', flat=True)
+        )
+        images = self.resolve_images(executor, self.image_field, [
+            row['image'] for row in rows
+            if row['image'] and (self.replace_images or row['slug'] not in with_image)
+        ])
+        gallery = self.resolve_images(executor, self.gallery_field, [s for row in rows for s in row['gallery']])
+        return images, gallery
+
+    def _discard_uploads(self, executor, *resolved):
+        """Delete the assets uploaded for a chunk that didn't commit."""
+        resources = [
+            (field, resource)
+            for field, images in zip((self.image_field, self.gallery_field), resolved)
+            for source, resource in images.items() if _needs_upload(source)
+        ]
+        if self.dry_run or not resources:
+            return
+        list(executor.map(
+            lambda item: uploader.destroy(item[1].public_id, type=item[0].type, resource_type=item[0].resource_type),
+            resources,
+        ))
+
+    # ------------------------------------------------------------ names
+
+    def check_names(self, rows):
+        """Raise CatalogRowError for a product or category name another row or record owns."""
+        owners = {}
+        for row in rows:
+            for key, owner in (('product', row['slug']), ('category', row['category_slug'])):
+                name = row['name'] if key == 'product' else row['category_name']
+                if owners.setdefault((key, name), owner) != owner:
+                    raise CatalogRowError(row['line'], f'{key} name "{name}" is used by another row with a different slug')
+
+        product_owners = dict(
+            Product.objects.filter(product_name__in=[row['name'] for row in rows]).values_list('product_name', 'product_slug')
+        )
+        category_slugs = {row['category_slug'] for row in rows}
+        existing_categories = set(Category.objects.filter(slug__in=category_slugs).values_list('slug', flat=True))
+        category_owners = dict(
+            Category.objects.filter(category_name__in=[row['category_name'] for row in rows]).values_list('category_name', 'slug')
+        )
+        for row in rows:
+            if product_owners.get(row['name'], row['slug']) != row['slug']:
+                raise CatalogRowError(row['line'], f'product name "{row["name"]}" belongs to product {product_owners[row["name"]]}')
+            # existing categories keep their name, only new ones are created with it
+            owner = category_owners.get(row['category_name'], row['category_slug'])
+            if row['category_slug'] not in existing_categories and owner != row['category_slug']:
+                raise CatalogRowError(row['line'], f'category name "{row["category_name"]}" belongs to category {owner}')
+
+    # ------------------------------------------------------------ chunks
+
+    def _categories(self, rows):
+        wanted = {row['category_slug']: row['category_name'] for row in rows}
+        categories = Category.objects.in_bulk(list(wanted), field_name='slug')
+        missing = [Category(slug=slug, category_name=name) for slug, name in wanted.items() if slug not in categories]
+        if missing:
+            Category.objects.bulk_create(missing)
+            categories = Category.objects.in_bulk(list(wanted), field_name='slug')
+            transaction.on_commit(invalidate_catalog)
+        return categories
+
+    def _products(self, rows, categories, images):
+        existing = Product.objects.in_bulk([row['slug'] for row in rows], field_name='product_slug')
+
+        now = timezone.now()
+        products, new, changed = {}, {}, {}
+        for row in rows:
+            product = products.get(row['slug']) or existing.get(row['slug'])
+            if product is None:
+                product = new[row['slug']] = Product(product_slug=row['slug'])
+            products[row['slug']] = product
+            before = self._snapshot(product)
+
+            product.product_name = row['name']
+            product.product_description = row['description']
+            product.product_price = row['price']
+            product.stock = row['stock']
+            product.is_available = row['is_available']
+            product.product_category = categories[row['category_slug']]
+            if row['image'] in images:
+                product.product_img = images[row['image']]
+            if not self.dry_run and (row['slug'] in new or product.links_stale()):
+                product.refresh_links()
+
+            if row['slug'] not in new:
+                fields = [name for name, value in self._snapshot(product).items() if before[name] != value]
+                if fields:
+                    product.updated_at = now
+                    changed[row['slug']] = (product, fields)
+
+        if new:
+            Product.objects.bulk_create(new.values())
+        # unchanged rows cost no write, and each UPDATE only sets the columns
+        # that changed: bulk_update's CASE WHEN per column gets slow quickly
+        by_fields = defaultdict(list)
+        for product, fields in changed.values():
+            by_fields[tuple(fields)].append(product)
+        for fields, batch in by_fields.items():
+            Product.objects.bulk_update(batch, [*fields, 'updated_at'], batch_size=100)
+
+        self.stats['created'] += len(new)
+        self.stats['updated'] += len(changed)
+        self.stats['unchanged'] += len(products) - len(new) - len(changed)
+        return products, [product.pk for product in new.values()] + [product.pk for product, _ in changed.values()]
+
+    def _snapshot(self, product):
+        return {
+            name: str(product.product_img) if name == 'product_img' else getattr(product, product._meta.get_field(name).attname)
+            for name in PRODUCT_UPDATE_FIELDS
+        }
+
+    def _variations(self, rows, products):
+        existing = {
+            (product_id, category, value.lower())
+            for product_id, category, value in Variation.objects
+            .filter(product__in=products.values())
+            .values_list('product_id', 'variation_category', 'variation_value')
+        }
+        missing = []
+        for row in rows:
+            product = products[row['slug']]
+            for category, value in row['variations']:
+                key = (product.pk, category, value.lower())
+                if key not in existing:
+                    existing.add(key)
+                    missing.append(Variation(product=product, variation_category=category, variation_value=value))
+        Variation.objects.bulk_create(missing)
+        self.stats['variations'] += len(missing)
+        return {variation.product_id for variation in missing}
+
+    def _gallery(self, rows, products, images):
+        existing = {
+            (product_id, self.gallery_field.get_prep_value(image))
+            for product_id, image in ProductGallery.objects
+            .filter(product__in=products.values())
+            .values_list('product_id', 'images')
+        }
+        missing = []
+        for row in rows:
+            product = products[row['slug']]
+            for source in row['gallery']:
+                image = images[source]
+                key = (product.pk, self.gallery_field.get_prep_value(image))
+                if key not in existing:
+                    existing.add(key)
+                    missing.append(ProductGallery(product=product, images=image))
+        ProductGallery.objects.bulk_create(missing)
+        self.stats['gallery'] += len(missing)
+        return {image.product_id for image in missing}
+
+    def import_chunk(self, rows, executor):
+        self.check_names(rows)
+        images, gallery = self._chunk_images(rows, executor)
+        try:
+            self._write_chunk(rows, images, gallery)
+        except Exception as e:
+            self._discard_uploads(executor, images, gallery)
+            if isinstance(e, IntegrityError):
+                # a concurrent write took a name after check_names()
+                raise CatalogRowError(rows[0]['line'], f'chunk starting here conflicts with existing data ({e})') from e
+            raise
+        self.stats['rows'] += len(rows)
+
+    def _write_chunk(self, rows, images, gallery):
+        with transaction.atomic():
+            categories = self._categories(rows)
+            products, written = self._products(rows, categories, images)
+            touched = {*written, *self._variations(rows, products), *self._gallery(rows, products, gallery)}
+
+            if self.dry_run:
+                transaction.set_rollback(True)
+            elif touched:
+                get_search_backend().index_products(written)
+                # pages of the product's previous category show it too
+                category_ids = {
+                    category_id
+                    for product in products.values() if product.pk in touched
+                    for category_id in (product.product_category_id, product.loaded_value('product_category_id'))
+                }
+                slugs = list(Category.objects.filter(pk__in=category_ids - {None}).values_list('slug', flat=True))
+                transaction.on_commit(lambda: invalidate_products(touched, slugs))
+
+    def run(self, rows, on_chunk=None):
+        """
+        Import parsed ``rows`` (from parse_row). ``on_chunk(rows)`` is called
+        after every committed chunk with the number of rows in it.
+        """
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.upload_workers) as executor:
+            for chunk in chunked(rows, self.chunk_size):
+                self.import_chunk(chunk, executor)
+                if on_chunk:
+                    on_chunk(len(chunk))
+        self.stats['seconds'] = time.monotonic() - started
+        self.stats['rows_per_second'] = self.stats['rows'] / self.stats['seconds'] if self.stats['seconds'] else 0.0
+        return self.stats
@@ -0,0 +1,118 @@
+"""
+Public data of the product detail page.
+
+Everything on the page that is the same for every visitor (product, gallery,
+variations, approved reviews, ratings) is built once into a cached dict under
+the product's category tag, which is bumped whenever the product, its
+variations, gallery or reviews change. The entry only keeps the ids of the
+recommended products; their cards are cached separately under a
+product:<id> tag per recommended product, so renaming, repricing or hiding a
+recommended product refreshes every page that shows it. The view only adds
+the per-user bits on top, so a cache hit renders the page without catalog
+queries.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from factors_Ecom.cache import get_or_set_tagged, tagged_key
+from .caching import CATALOG, category_tag, product_tag
+from .images import image_set
+from .home_feed import product_card
+from .models import Product, ProductGallery, ProductRecommendation, ReviewRating
+from .variations import get_variation_matrix
+
+
+def _gallery_image(gallery):
+    return {
+        'url': gallery.images.url,
+        'thumb': image_set(gallery.images, 'thumb'),
+        'detail': image_set(gallery.images, 'detail'),
+    }
+
+
+def _review(review):
+    return {
+        'user_name': review.user.full_name(),
+        'rating': review.rating,
+        'subject': review.subject,
+        'review': review.review,
+        'updated_at': review.updated_at,
+    }
+
+
+def _recommended_ids(product, kind):
+    """Precomputed neighbours of ``product``, best first, one indexed query."""
+    return list(
+        ProductRecommendation.objects
+        .filter(product=product, kind=kind)
+        .order_by('rank')
+        .values_list('recommended_id', flat=True)
+    )
+
+
+def _recommendations(product_ids):
+    """Cards of the available products among ``product_ids``, in order."""
+    products = Product.objects.filter(is_available=True).select_related('product_category').in_bulk(product_ids)
+    cards = [product_card(products[pk]) for pk in product_ids if pk in products]
+    return cards[:settings.RECOMMENDATIONS_SHOWN]
+
+
+def get_recommendations(product_id, product_ids):
+    """Cached cards of ``product_ids``, dropped when any of those products changes."""
+    if not product_ids:
+        return []
+    return get_or_set_tagged(
+        f'product_recommendations:{product_id}:{",".join(map(str, product_ids))}',
+        [CATALOG, *(product_tag(pk) for pk in product_ids)],
+        lambda: _recommendations(product_ids),
+        settings.CATALOG_CACHE_TIMEOUT,
+    )
+
+
+def build_product_detail(category_slug, product_slug):
+    product = (
+        Product.objects
+        .select_related('product_category')
+        .filter(product_category__slug=category_slug, product_slug=product_slug, is_available=True)
+        .first()
+    )
+    if product is None:
+        return None
+
+    variations = get_variation_matrix(product.id)
+    reviews = (
+        ReviewRating.objects
+        .filter(product=product, status=True)
+        .select_related('user')
+        .order_by('-created_at')
+    )
+    return {
+        'product': product,
+        'gallery': [_gallery_image(gallery) for gallery in ProductGallery.objects.filter(product=product)],
+        'colors': list(variations.get('color', {})),
+        'sizes': list(variations.get('size', {})),
+        'reviews': [_review(review) for review in reviews],
+        'bought_together': _recommended_ids(product, ProductRecommendation.COPURCHASE),
+        'similar': _recommended_ids(product, ProductRecommendation.SIMILAR),
+    }
+
+
+def get_product_detail(category_slug, product_slug):
+    """
+    The cached public detail data, or None when there is no such product.
+    Misses are not cached: any slug can be requested, and caching them would
+    let crawlers fill the cache with empty entries.
+    """
+    key = tagged_key(f'product_detail:{category_slug}:{product_slug}', [CATALOG, category_tag(category_slug)])
+    detail = cache.get(key)
+    if detail is None:
+        detail = build_product_detail(category_slug, product_slug)
+        if detail is None:
+            return None
+        cache.set(key, detail, settings.CATALOG_CACHE_TIMEOUT)
+    product_id = detail['product'].id
+    return {
+        **detail,
+        'bought_together': get_recommendations(product_id, detail['bought_together']),
+        'similar': get_recommendations(product_id, detail['similar']),
+    }
@@ -0,0 +1,136 @@
+"""
+Store filters (price, stock, color, size, rating) and their facet counts.
+
+Facet counts are computed for a whole listing (all products or one category)
+with two grouped queries and cached under the listing's cache tags, so they
+are rebuilt only when products, variations or reviews in it change.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.db.models.functions import Lower
+
+from factors_Ecom.cache import get_or_set_tagged
+from .caching import store_tags
+from .models import Variation
+
+
+RATING_THRESHOLDS = (4, 3, 2, 1)
+
+
+def price_ranges():
+    """[(key, low, high)], high is None for the open-ended top range."""
+    ranges = []
+    for low, high in settings.STORE_PRICE_RANGES:
+        key = f'{low}-{high}' if high is not None else f'{low}-'
+        ranges.append((key, Decimal(low), Decimal(high) if high is not None else None))
+    return ranges
+
+
+def _price_q(low, high):
+    q = Q(product_price__gte=low)
+    if high is not None:
+        q &= Q(product_price__lt=high)
+    return q
+
+
+def parse_filters(params):
+    """Read the active filters from request.GET, ignoring anything malformed."""
+    filters = {
+        'price': None,
+        'in_stock': params.get('in_stock') == '1',
+        'color': sorted({v.strip().lower() for v in params.getlist('color') if v.strip()}),
+        'size': sorted({v.strip().lower() for v in params.getlist('size') if v.strip()}),
+        'rating': None,
+    }
+
+    price = params.get('price')
+    for key, low, high in price_ranges():
+        if price == key:
+            filters['price'] = (key, low, high)
+
+    try:
+        rating = int(params.get('rating', ''))
+        if rating in RATING_THRESHOLDS:
+            filters['rating'] = rating
+    except ValueError:
+        pass
+
+    return filters
+
+
+def has_filters(filters):
+    return any(filters.values())
+
+
+def apply_filters(products, filters):
+    if filters['price']:
+        _, low, high = filters['price']
+        products = products.filter(_price_q(low, high))
+    if filters['in_stock']:
+        products = products.filter(stock__gt=0)
+    if filters['rating']:
+        products = products.filter(rating_average__gte=filters['rating'])
+
+    needs_distinct = False
+    for category in ('color', 'size'):
+        values = filters[category]
+        if values:
+            matches = Q()
+            for value in values:
+                matches |= Q(variation_value__iexact=value)
+            variations = Variation.objects.filter(matches, variation_category=category, is_active=True)
+            products = products.filter(variation__in=variations)
+            needs_distinct = True
+    if needs_distinct:
+        products = products.distinct()
+    return products
+
+
+def _build_facets(products):
+    aggregates = {'in_stock': Count('id', filter=Q(stock__gt=0))}
+    ranges = price_ranges()
+    for key, low, high in ranges:
+        aggregates[f'price:{key}'] = Count('id', filter=_price_q(low, high))
+    for threshold in RATING_THRESHOLDS:
+        aggregates[f'rating:{threshold}'] = Count('id', filter=Q(rating_average__gte=threshold))
+    totals = products.order_by().aggregate(**aggregates)
+
+    variation_rows = (
+        Variation.objects
+        .filter(is_active=True, product__in=products.order_by().values('id'))
+        .annotate(value=Lower('variation_value'))
+        .values('variation_category', 'value')
+        .annotate(count=Count('product', distinct=True))
+        .order_by('variation_category', 'value')
+    )
+    variations = {'color': [], 'size': []}
+    for row in variation_rows:
+        variations.setdefault(row['variation_category'], []).append(
+            {'value': row['value'], 'count': row['count']}
+        )
+
+    return {
+        'price': [
+            {'key': key, 'low': low, 'high': high, 'count': totals[f'price:{key}']}
+            for key, low, high in ranges
+        ],
+        'in_stock': totals['in_stock'],
+        'rating': [
+            {'value': threshold, 'count': totals[f'rating:{threshold}']}
+            for threshold in RATING_THRESHOLDS
+        ],
+        'color': variations['color'],
+        'size': variations['size'],
+    }
+
+
+def facet_counts(products, category_slug=None):
+    """Facet counts of an unfiltered listing, cached per category."""
+    return get_or_set_tagged(
+        f'store_facets:{category_slug or "all"}',
+        store_tags(None, category_slug),
+        lambda: _build_facets(products),
+        settings.CATALOG_CACHE_TIMEOUT,
+    )
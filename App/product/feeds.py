@@ -0,0 +1,107 @@
+"""
+Product feeds for merchant centers and ad catalogs.
+
+One item per product in the Google Merchant Center attribute names (id,
+title, description, link, image_link, price, availability, ...), written as
+RSS 2.0 with the g: namespace or as CSV. Products are read with a chunked
+.iterator() and the variations of each chunk in one more query; links and
+image URLs come precomputed from canonical_path and image_urls, so nothing
+is built per product and memory stays bounded by the chunk size.
+
+A delta feed holds only the products updated since a given time, which
+includes products that went out of stock or were hidden (they are listed
+as "out of stock").
+"""
+import csv
+from collections import defaultdict
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.urls import reverse
+
+from .models import Product, Variation
+
+
+FIELDS = [
+    'id', 'title', 'description', 'link', 'image_link', 'price', 'availability',
+    'product_type', 'color', 'size', 'brand', 'condition',
+]
+MAX_DESCRIPTION = 5000
+
+
+def _variations(first_id, last_id):
+    # an id range is cheaper than a long IN list; extra products are ignored
+    values = defaultdict(lambda: defaultdict(list))
+    rows = (
+        Variation.objects
+        .filter(product_id__gte=first_id, product_id__lte=last_id, is_active=True)
+        .order_by('id')
+        .values_list('product_id', 'variation_category', 'variation_value')
+    )
+    for product_id, category, value in rows:
+        values[product_id][category].append(value)
+    return values
+
+
+def _image(image_urls, preset):
+    image_set = image_urls.get(preset) if image_urls else None
+    return image_set['src'] if image_set else ''
+
+
+def feed_items(base_url, since=None, chunk_size=2000):
+    """Yield one dict of FIELDS per product, by id; only those updated since ``since`` if given."""
+    products = Product.objects.order_by('id')
+    if since is not None:
+        products = products.filter(updated_at__gte=since)
+    rows = products.values_list(
+        'id', 'product_name', 'product_description', 'canonical_path', 'product_slug',
+        'image_urls', 'product_price', 'stock', 'is_available',
+        'product_category__slug', 'product_category__category_name',
+    ).iterator(chunk_size=chunk_size)
+
+    while chunk := list(islice(rows, chunk_size)):
+        variations = _variations(chunk[0][0], chunk[-1][0])
+        for (product_id, name, description, path, slug, image_urls, price, stock,
+             is_available, category_slug, category_name) in chunk:
+            values = variations.get(product_id, {})
+            yield {
+                'id': product_id,
+                'title': name,
+                'description': ' '.join(description.split())[:MAX_DESCRIPTION],
+                'link': base_url + (path or reverse('product_detail', args=[category_slug, slug])),
+                'image_link': _image(image_urls, 'zoom') or _image(image_urls, 'detail'),
+                'price': f'{price:.2f} {settings.FEED_CURRENCY}',
+                'availability': 'in stock' if is_available and stock > 0 else 'out of stock',
+                'product_type': category_name,
+                'color': '/'.join(values.get('color', [])),
+                'size': '/'.join(values.get('size', [])),
+                'brand': settings.FEED_BRAND,
+                'condition': 'new',
+            }
+
+
+def write_csv(items, f):
+    writer = csv.DictWriter(f, fieldnames=FIELDS)
+    writer.writeheader()
+    count = 0
+    for item in items:
+        writer.writerow(item)
+        count += 1
+    return count
+
+
+def write_xml(items, f, title='Products', link=''):
+    f.write(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0">\n<channel>\n'
+        f'<title>{escape(title)}</title>\n<link>{escape(link)}</link>\n'
+    )
+    count = 0
+    for item in items:
+        f.write('<item>')
+        f.write(''.join(f'<g:{field}>{escape(str(item[field]))}</g:{field}>' for field in FIELDS if item[field] != ''))
+        f.write('</item>\n')
+        count += 1
+    f.write('</channel>\n</rss>\n')
+    return count
@@ -0,0 +1,258 @@
+"""
+Typo-tolerant fallback for product search.
+
+Each process keeps an in-memory trigram index over the words of available
+product names and their category names. When the full-text search finds
+nothing, every keyword token that is not a known word is replaced by the
+closest known word (trigram overlap to pick candidates, a bounded edit
+distance to choose between them); the corrected keyword is offered as a
+"did you mean" and searched instead.
+
+The index is never built in a request. The first search that needs it
+starts a background thread that builds it from the Product table; until it
+is ready the fallback finds nothing. When the catalog cache tags change, the
+next search starts a refresh that only re-reads products updated since the
+last one (dropping those that were hidden); a category change, or a product
+count that no longer matches (deleted products), rebuilds it from scratch
+while the old index keeps serving. With FUZZY_INDEX_BACKGROUND off (tests),
+refreshes run inline instead.
+"""
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+
+from factors_Ecom.cache import tag_versions
+from .caching import CATALOG, PRODUCTS
+from .search import get_search_backend, tokenize
+
+logger = logging.getLogger(__name__)
+
+MIN_WORD_LENGTH = 3
+MAX_TOKENS = 6
+# candidates per token ranked by trigram overlap before computing edit distances
+MAX_CANDIDATES = 30
+MIN_SIMILARITY = 0.3
+
+
+def trigrams(word):
+    # padded like pg_trgm, so short words and word starts weigh more
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Edit distance counting a swap of two adjacent letters as one edit, or
+    max_distance + 1 as soon as it is exceeded.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        # a later swap can still cost one more than the previous row
+        if min(min(current), min(previous) + 1) > max_distance:
+            return max_distance + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def max_edits(word):
+    return 1 if len(word) <= 5 else 2
+
+
+class FuzzyIndex:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.word_products = defaultdict(set)
+        self.product_words = {}
+        self.trigram_words = defaultdict(set)
+        self.watermark = None
+        self.versions = None
+
+    def add_product(self, product_id, *texts):
+        self.remove_product(product_id)
+        words = {word for text in texts for word in tokenize(text or '') if len(word) >= MIN_WORD_LENGTH}
+        self.product_words[product_id] = words
+        for word in words:
+            if not self.word_products[word]:
+                for trigram in trigrams(word):
+                    self.trigram_words[trigram].add(word)
+            self.word_products[word].add(product_id)
+
+    def remove_product(self, product_id):
+        for word in self.product_words.pop(product_id, ()):
+            products = self.word_products[word]
+            products.discard(product_id)
+            if not products:
+                del self.word_products[word]
+                for trigram in trigrams(word):
+                    self.trigram_words[trigram].discard(word)
+
+    def load(self, rows):
+        """Apply (id, name, category name, is_available, updated_at) rows."""
+        for product_id, name, category, available, updated_at in rows:
+            if available:
+                self.add_product(product_id, name, category)
+            else:
+                self.remove_product(product_id)
+            if self.watermark is None or updated_at > self.watermark:
+                self.watermark = updated_at
+
+    def correct_word(self, word):
+        """The known word closest to ``word``, or None when nothing is close enough."""
+        if word in self.word_products:
+            return word
+        word_trigrams = trigrams(word)
+        shared = Counter()
+        for trigram in word_trigrams:
+            shared.update(self.trigram_words.get(trigram, ()))
+
+        candidates = []
+        for candidate, count in shared.items():
+            similarity = 2 * count / (len(word_trigrams) + len(candidate) + 1)
+            if similarity >= MIN_SIMILARITY:
+                candidates.append((similarity, candidate))
+        candidates.sort(reverse=True)
+
+        best = None
+        limit = max_edits(word)
+        for similarity, candidate in candidates[:MAX_CANDIDATES]:
+            distance = edit_distance(word, candidate, limit)
+            if distance > limit:
+                continue
+            key = (distance, -similarity, -len(self.word_products[candidate]), candidate)
+            if best is None or key < best[0]:
+                best = (key, candidate)
+        return best[1] if best else None
+
+    def suggest(self, keyword):
+        """Keyword with its misspelled tokens corrected, or None if nothing changed."""
+        tokens = tokenize(keyword)[:MAX_TOKENS]
+        corrected = [self.correct_word(token) or token if len(token) >= MIN_WORD_LENGTH else token for token in tokens]
+        if corrected == tokens:
+            return None
+        return ' '.join(corrected)
+
+    def close_matches(self, keyword, limit=None):
+        """Products sharing the most (corrected) words with ``keyword``."""
+        matches = Counter()
+        for token in tokenize(keyword)[:MAX_TOKENS]:
+            word = self.correct_word(token)
+            if word:
+                matches.update(self.word_products[word])
+        ranked = sorted(matches, key=lambda product_id: (-matches[product_id], -product_id))
+        return ranked[:limit] if limit is not None else ranked
+
+
+def _rows(products):
+    rows = products.values_list('id', 'product_name', 'product_category__category_name', 'is_available', 'updated_at')
+    return rows.iterator(chunk_size=2000)
+
+
+def build_index(versions):
+    Product = apps.get_model('product', 'Product')
+    index = FuzzyIndex()
+    index.load(_rows(Product.objects.filter(is_available=True)))
+    index.versions = versions
+    return index
+
+
+_index = None
+# guards reads and in-place updates of _index
+_lock = threading.Lock()
+# held while a refresh runs, so a process refreshes once at a time
+_refreshing = threading.Lock()
+
+
+def _current_versions():
+    return tuple(tag_versions([CATALOG, PRODUCTS]))
+
+
+def refresh_index():
+    """Bring this process's index up to date with the Product table."""
+    global _index
+    versions = _current_versions()
+    index = _index
+    if index is not None and index.versions == versions:
+        return
+    if index is None or index.versions[0] != versions[0]:
+        index = build_index(versions)
+        with _lock:
+            _index = index
+        return
+
+    Product = apps.get_model('product', 'Product')
+    products = Product.objects.all()
+    if index.watermark is not None:
+        products = products.filter(updated_at__gte=index.watermark)
+    rows = list(_rows(products))
+    live = Product.objects.filter(is_available=True).count()
+    with _lock:
+        index.load(rows)
+        index.versions = versions
+        deleted = len(index.product_words) != live
+    if deleted:
+        index = build_index(versions)
+        with _lock:
+            _index = index
+
+
+def _refresh_in_background():
+    try:
+        refresh_index()
+    except Exception:
+        logger.exception('Refreshing the fuzzy search index failed')
+    finally:
+        _refreshing.release()
+        connection.close()
+
+
+def request_refresh():
+    """Start a refresh unless the index is current or one is already running."""
+    index = _index
+    if index is not None and index.versions == _current_versions():
+        return
+    if not _refreshing.acquire(blocking=False):
+        return
+    if not settings.FUZZY_INDEX_BACKGROUND:
+        try:
+            refresh_index()
+        finally:
+            _refreshing.release()
+        return
+    threading.Thread(target=_refresh_in_background, name='fuzzy-index', daemon=True).start()
+
+
+def index_ready():
+    return _index is not None
+
+
+def fuzzy_search(keyword, limit=None):
+    """
+    (suggestion, product ids) for a keyword the full-text search found
+    nothing for. The suggestion is the corrected keyword, or None. Finds
+    nothing while the index is being built.
+    """
+    request_refresh()
+    with _lock:
+        if _index is None:
+            return None, []
+        suggestion = _index.suggest(keyword)
+        close_matches = _index.close_matches(keyword, limit)
+
+    product_ids = []
+    if suggestion:
+        product_ids = get_search_backend().search(suggestion, limit=limit)
+    return suggestion, product_ids or close_matches
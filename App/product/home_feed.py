@@ -0,0 +1,111 @@
+"""
+Home page feed.
+
+The home page is made of the sections listed in settings.HOME_SECTIONS, each
+capped to a few products. The whole feed is built once into plain dicts and
+cached under the catalog tags, so rendering the home page runs no catalog
+queries until a product or category changes.
+"""
+from django.conf import settings
+from django.db.models import F, Sum, Window
+from django.db.models.functions import RowNumber
+from django.urls import reverse
+
+from category.models import Category
+from factors_Ecom.cache import get_or_set_tagged
+from orders.models import OrderProduct
+from .caching import CATALOG, PRODUCTS
+from .models import Product
+
+
+def product_card(product):
+    return {
+        'id': product.id,
+        'name': product.product_name,
+        'price': product.product_price,
+        'url': product.get_url(),
+        'image': product.image_urls.get('card'),
+    }
+
+
+def _available_products():
+    return Product.objects.filter(is_available=True).select_related('product_category')
+
+
+def new_arrivals(section):
+    products = _available_products().order_by('-created_at', '-id')[:section['limit']]
+    return [{
+        'key': section['key'],
+        'title': section.get('title', 'New Arrivals'),
+        'url': reverse('store'),
+        'products': [product_card(product) for product in products],
+    }]
+
+
+def best_sellers(section):
+    top = (
+        OrderProduct.objects
+        .filter(ordered=True, product__is_available=True)
+        .values('product_id')
+        .annotate(sold=Sum('quantity'))
+        .order_by('-sold', 'product_id')[:section['limit']]
+    )
+    product_ids = [row['product_id'] for row in top]
+    products = _available_products().in_bulk(product_ids)
+    cards = [product_card(products[pk]) for pk in product_ids if pk in products]
+    if not cards:
+        return []
+    return [{
+        'key': section['key'],
+        'title': section.get('title', 'Best Sellers'),
+        'url': reverse('store'),
+        'products': cards,
+    }]
+
+
+def category_rows(section):
+    """One row per category, filled by a single windowed query."""
+    categories = list(Category.objects.order_by('category_name')[:section.get('max_categories', 6)])
+    products = (
+        _available_products()
+        .filter(product_category__in=categories)
+        .annotate(row=Window(
+            RowNumber(),
+            partition_by=F('product_category'),
+            order_by=[F('created_at').desc(), F('id').desc()],
+        ))
+        .filter(row__lte=section['limit'])
+        .order_by('product_category', 'row')
+    )
+    rows = {category.id: [] for category in categories}
+    for product in products:
+        rows[product.product_category_id].append(product_card(product))
+
+    return [
+        {
+            'key': f"{section['key']}:{category.slug}",
+            'title': category.category_name,
+            'url': category.get_url(),
+            'products': rows[category.id],
+        }
+        for category in categories
+        if rows[category.id]
+    ]
+
+
+SECTION_BUILDERS = {
+    'new_arrivals': new_arrivals,
+    'best_sellers': best_sellers,
+    'category_rows': category_rows,
+}
+
+
+def build_home_feed():
+    sections = []
+    for section in settings.HOME_SECTIONS:
+        sections.extend(SECTION_BUILDERS[section['type']](section))
+    return sections
+
+
+def get_home_feed():
+    return get_or_set_tagged('home_feed', [CATALOG, PRODUCTS], build_home_feed, settings.CATALOG_CACHE_TIMEOUT)
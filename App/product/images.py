@@ -0,0 +1,152 @@
+"""
+Responsive product images.
+
+Named presets (settings.PRODUCT_IMAGE_PRESETS) describe the widths an image
+is displayed at. For each preset we build an "image set": a fallback src, a
+srcset and the sizes hint, plus extra <source> srcsets per modern format when
+the backend cannot negotiate formats itself.
+
+- CloudinaryImageBackend: transformation URLs with f_auto/q_auto, so
+  Cloudinary serves AVIF/WebP based on the browser's Accept header.
+- LocalImageBackend: generates the variants with Pillow next to the media
+  files, for development and tests without a Cloudinary account.
+"""
+import os
+from pathlib import Path
+from urllib.parse import urljoin
+
+from cloudinary import CloudinaryResource
+from django.conf import settings
+from PIL import Image, ImageOps, features
+
+
+FORMAT_MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+}
+
+
+def _as_resource(image):
+    if isinstance(image, str):
+        return CloudinaryResource(public_id=image) if image else None
+    return image
+
+
+class CloudinaryImageBackend:
+    options = {'crop': 'limit', 'quality': 'auto', 'fetch_format': 'auto'}
+
+    def __init__(self):
+        self._urls = {}
+
+    def _url(self, image, width):
+        # build_url() is slow and presets share widths, so every URL is built
+        # once per backend; the prep value holds the public id and format
+        key = (image.get_prep_value(), width)
+        if key not in self._urls:
+            self._urls[key] = image.build_url(width=width, **self.options)
+        return self._urls[key]
+
+    def image_set(self, image, preset):
+        widths = preset['widths']
+        srcset = ', '.join(f"{self._url(image, width)} {width}w" for width in widths)
+        return {
+            'src': self._url(image, widths[-1]),
+            'srcset': srcset,
+            'sizes': preset['sizes'],
+            'sources': {},
+        }
+
+
+class LocalImageBackend:
+    variants_dir = 'variants'
+    quality = {'avif': 50, 'webp': 80, 'jpeg': 85, 'png': None}
+
+    def __init__(self, root=None, base_url=None):
+        self.root = Path(root or settings.MEDIA_ROOT)
+        self.base_url = base_url or settings.MEDIA_URL
+        self.formats = [fmt for fmt in ('avif', 'webp') if features.check(fmt)]
+
+    def _name(self, image):
+        name = str(image.public_id)
+        if image.format and not name.endswith(f'.{image.format}'):
+            name = f'{name}.{image.format}'
+        return name
+
+    def _url(self, relative_path):
+        return urljoin(self.base_url, str(relative_path).replace(os.sep, '/'))
+
+    def _variant(self, source, name, width, fmt):
+        """Return the media-relative path of a variant, generating it if missing or outdated."""
+        stem = os.path.splitext(name)[0]
+        relative = Path(self.variants_dir) / str(width) / f'{stem}.{fmt}'
+        target = self.root / relative
+        if target.exists() and target.stat().st_mtime >= source.stat().st_mtime:
+            return relative
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with Image.open(source) as original:
+            picture = ImageOps.exif_transpose(original)
+            if picture.width > width:
+                height = round(picture.height * width / picture.width)
+                picture = picture.resize((width, height), Image.Resampling.LANCZOS)
+            if fmt == 'jpeg' and picture.mode not in ('RGB', 'L'):
+                picture = picture.convert('RGB')
+            options = {'optimize': True} if fmt in ('jpeg', 'png') else {}
+            if self.quality.get(fmt):
+                options['quality'] = self.quality[fmt]
+            tmp = target.with_name(f'.{target.name}.tmp')
+            picture.save(tmp, format=fmt.upper(), **options)
+        os.replace(tmp, target)
+        return relative
+
+    def image_set(self, image, preset):
+        name = self._name(image)
+        source = self.root / name
+        if not source.is_file():
+            # nothing to resize, serve the original path as-is
+            return {'src': self._url(name), 'srcset': '', 'sizes': preset['sizes'], 'sources': {}}
+
+        with Image.open(source) as original:
+            original_width = original.width
+            fallback = 'png' if original.format == 'PNG' else 'jpeg'
+        # never upscale: keep the widths the source can fill, or just its own width
+        widths = [w for w in preset['widths'] if w <= original_width] or [original_width]
+
+        def srcset(fmt):
+            return ', '.join(f"{self._url(self._variant(source, name, w, fmt))} {w}w" for w in widths)
+
+        return {
+            'src': self._url(self._variant(source, name, widths[-1], fallback)),
+            'srcset': srcset(fallback),
+            'sizes': preset['sizes'],
+            'sources': {FORMAT_MIME_TYPES[fmt]: srcset(fmt) for fmt in self.formats},
+        }
+
+
+BACKENDS = {
+    'cloudinary': CloudinaryImageBackend,
+    'local': LocalImageBackend,
+}
+
+
+def get_image_backend():
+    return BACKENDS[settings.PRODUCT_IMAGE_BACKEND]()
+
+
+def image_set(image, preset_name, backend=None):
+    image = _as_resource(image)
+    if not image or not getattr(image, 'public_id', None):
+        return None
+    backend = backend or get_image_backend()
+    return backend.image_set(image, settings.PRODUCT_IMAGE_PRESETS[preset_name])
+
+
+def image_sets(image):
+    """Image sets for every preset, as stored in Product.image_urls."""
+    backend = get_image_backend()
+    sets = {}
+    for preset_name in settings.PRODUCT_IMAGE_PRESETS:
+        variants = image_set(image, preset_name, backend)
+        if variants:
+            sets[preset_name] = variants
+    return sets
@@ -0,0 +1,33 @@
+"""
+Canonical product paths and image URLs.
+
+Both are computed when a product is saved and stored on the row, so product
+cards can be rendered without reverse() calls, category lookups or
+Cloudinary URL building.
+"""
+from django.urls import reverse
+
+from .images import image_sets
+
+
+def product_path(category_slug, product_slug):
+    return reverse('product_detail', args=[category_slug, product_slug])
+
+
+def product_image_urls(image):
+    """{preset: image set} for every preset in settings.PRODUCT_IMAGE_PRESETS."""
+    return image_sets(image)
+
+
+def refresh_category_paths(category):
+    """Rewrite the stored paths of a category's products after its slug changed."""
+    from .models import Product
+
+    stale = []
+    for product in Product.objects.filter(product_category=category).only('id', 'product_slug', 'canonical_path'):
+        path = product_path(category.slug, product.product_slug)
+        if product.canonical_path != path:
+            product.canonical_path = path
+            stale.append(product)
+    Product.objects.bulk_update(stale, ['canonical_path'], batch_size=500)
+    return len(stale)
@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from product import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed product recommendations shown on product pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=['copurchase', 'similar'], help='Which recommendations to build')
+        parser.add_argument(
+            '--top-k', type=int, default=settings.RECOMMENDATIONS_TOP_K,
+            help='Neighbours stored per product (default: %(default)s)',
+        )
+        parser.add_argument(
+            '--changed-only', action='store_true',
+            help='similar: only recompute products changed since their neighbours were stored',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['kind'] == 'copurchase':
+            products, stored = recommendations.build_copurchase(options['top_k'])
+        else:
+            products, stored = recommendations.build_similar(options['top_k'], options['changed_only'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Stored {stored} {options["kind"]} recommendations for {products} products in {elapsed:.2f}s'
+            )
+        )
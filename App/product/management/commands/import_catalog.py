@@ -0,0 +1,98 @@
+import json
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from product.autocomplete import rebuild_index
+from product.catalog_import import CatalogImporter, CatalogRowError, parse_row, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import categories, products, variations and gallery images from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON Lines file, see product/catalog_import.py for the columns')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows per transaction (default: %(default)s)')
+        parser.add_argument('--upload-workers', type=int, default=4, help='Parallel image uploads (default: %(default)s)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and apply every chunk, then roll it back')
+        parser.add_argument('--resume', action='store_true', help='Skip the rows committed by a previous, interrupted run')
+        parser.add_argument('--force', action='store_true', help='With --resume, resume even if the file changed since the checkpoint')
+        parser.add_argument('--replace-images', action='store_true', help='Upload images for products that already have one')
+        parser.add_argument('--checkpoint', help='Progress file (default: <path>.import-state.json)')
+
+    def _signature(self, path):
+        stat = os.stat(path)
+        return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def _load_checkpoint(self, path, checkpoint, signature, force=False):
+        try:
+            with open(checkpoint) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return 0
+        if state.get('file') != signature:
+            # rows inserted or removed above the checkpoint would be skipped or imported twice
+            if not force:
+                raise CommandError(
+                    f'{path} changed since the checkpoint was written. Pass --force to resume after '
+                    f'row {state["rows"]} anyway (only if earlier rows stayed in place), or drop --resume to start over'
+                )
+            self.stderr.write(self.style.WARNING(
+                f'{path} changed since the checkpoint was written; resuming after row {state["rows"]} anyway'
+            ))
+        return state['rows']
+
+    def _save_checkpoint(self, checkpoint, signature, rows):
+        tmp = f'{checkpoint}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'file': signature, 'rows': rows}, f)
+        os.replace(tmp, checkpoint)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'{path} does not exist')
+        checkpoint = options['checkpoint'] or f'{path}.import-state.json'
+        signature = self._signature(path)
+        dry_run = options['dry_run']
+
+        done = self._load_checkpoint(path, checkpoint, signature, options['force']) if options['resume'] else 0
+        if done:
+            self.stdout.write(f'Resuming after {done} committed rows')
+
+        importer = CatalogImporter(
+            chunk_size=options['chunk_size'],
+            upload_workers=options['upload_workers'],
+            dry_run=dry_run,
+            replace_images=options['replace_images'],
+        )
+        rows = (parse_row(line, raw) for line, raw in islice(read_rows(path, options['format']), done, None))
+
+        def on_chunk(count):
+            nonlocal done
+            done += count
+            if not dry_run:
+                self._save_checkpoint(checkpoint, signature, done)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{done} rows')
+
+        try:
+            stats = importer.run(rows, on_chunk)
+        except CatalogRowError as e:
+            if dry_run:
+                raise CommandError(str(e))
+            raise CommandError(f'{e} (rows before this chunk are committed, rerun with --resume)')
+
+        if not dry_run:
+            if os.path.exists(checkpoint):
+                os.remove(checkpoint)
+            rebuild_index()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Checked' if dry_run else 'Imported'} {stats['rows']} rows in {stats['seconds']:.2f}s "
+            f"({stats['rows_per_second']:.0f} rows/s): {stats['created']} products created, "
+            f"{stats['updated']} updated, {stats['unchanged']} unchanged, {stats['variations']} variations, "
+            f"{stats['gallery']} gallery images, {stats['uploads']} uploads"
+        ))
@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from product.autocomplete import rebuild_if_stale, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the memory-mapped navbar autocomplete index from products and categories'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--if-stale', action='store_true',
+            help='Only rebuild when names changed since the last build or the index is missing (for cron)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        keys = rebuild_if_stale() if options['if_stale'] else rebuild_index()
+        elapsed = time.monotonic() - started
+        if keys is None:
+            self.stdout.write('The index is up to date')
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Wrote {keys} keys to {settings.AUTOCOMPLETE_INDEX_PATH} in {elapsed:.2f}s'
+            )
+        )
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from product.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored canonical path and image sets of every product'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        started = time.monotonic()
+        updated = 0
+        batch = []
+        products = Product.objects.select_related('product_category').only(
+            'id', 'product_slug', 'product_img', 'product_category__slug', 'canonical_path', 'image_urls',
+        )
+        for product in products.iterator(chunk_size=batch_size):
+            product.refresh_links()
+            batch.append(product)
+            if len(batch) >= batch_size:
+                Product.objects.bulk_update(batch, ['canonical_path', 'image_urls'])
+                updated += len(batch)
+                batch = []
+        if batch:
+            Product.objects.bulk_update(batch, ['canonical_path', 'image_urls'])
+            updated += len(batch)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt links of {updated} products in {elapsed:.2f}s'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from product.ratings import rebuild_rating_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored rating average, count and star histogram of every product'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        reviewed = rebuild_rating_stats(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt rating stats ({reviewed} products with reviews)')
+        )
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from product.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text product search index from the Product table'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        started = time.monotonic()
+        indexed = backend.rebuild()
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Indexed {indexed} products with {type(backend).__name__} in {elapsed:.2f}s'
+            )
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from product.query_cache import cache_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = 'Show the hit rate of the normalized search result cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        # with a per-process cache (LocMemCache) this only sees the counters of this process;
+        # point CACHES['search'] at a shared backend to read the site-wide numbers
+        stats = cache_stats()
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} hit rate={stats['hit_rate']:.1%}"
+        )
+        if options['reset']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,47 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from product.autocomplete import rebuild_if_stale
+from product.catalog_import import CatalogRowError, read_rows
+from product.stock import apply_stock_deltas, parse_delta
+
+
+class Command(BaseCommand):
+    help = 'Apply warehouse stock deltas (product_slug, delta) from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON Lines file with product_slug and delta columns')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.STOCK_SYNC_CHUNK_SIZE,
+            help='Products per UPDATE (default: %(default)s)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'{path} does not exist')
+        try:
+            # the whole file is validated before anything is applied
+            deltas = [parse_delta(line, raw) for line, raw in read_rows(path, options['format'])]
+        except CatalogRowError as e:
+            raise CommandError(str(e))
+
+        if not settings.SHARED_CACHE:
+            self.stderr.write(self.style.WARNING(
+                'CACHE_URL is not set, so this process cannot invalidate the web workers\' caches; '
+                f'their cached pages expire within {settings.CATALOG_CACHE_TIMEOUT}s'
+            ))
+        stats = apply_stock_deltas(deltas, options['chunk_size'])
+        # don't leave the rebuild to a timer this process may not live to run
+        rebuild_if_stale()
+        if stats['unknown']:
+            self.stderr.write(self.style.WARNING(
+                f"{len(stats['unknown'])} unknown products: {', '.join(stats['unknown'][:20])}"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated stock of {stats['updated']} products, "
+            f"{stats['availability_changed']} changed availability"
+        ))
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:10
+
+import math
+from collections import defaultdict
+
+import product.ratings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rating_stats(apps, schema_editor):
+    # a frozen copy of product.ratings.rebuild_rating_stats, so later changes
+    # to that module can't change what this migration does
+    Product = apps.get_model('product', 'Product')
+    ReviewRating = apps.get_model('product', 'ReviewRating')
+    rows = (
+        ReviewRating.objects
+        .filter(status=True)
+        .values_list('product_id', 'rating')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    totals = defaultdict(lambda: [0.0, 0, {star: 0 for star in '12345'}])
+    for product_id, rating, n in rows.iterator():
+        entry = totals[product_id]
+        entry[0] += float(rating) * n
+        entry[1] += n
+        # half steps round up: 4.5 counts as a 5 star review
+        entry[2][str(min(max(int(math.ceil(rating)), 1), 5))] += n
+
+    Product.objects.bulk_update(
+        [
+            Product(pk=product_id, rating_average=round(rating_sum / count, 2), rating_count=count, rating_histogram=histogram)
+            for product_id, (rating_sum, count, histogram) in totals.items()
+        ],
+        ['rating_average', 'rating_count', 'rating_histogram'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0013_remove_product_product_product_slug_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_average',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_histogram',
+            field=models.JSONField(blank=True, default=product.ratings.empty_histogram),
+        ),
+        migrations.RunPython(backfill_rating_stats, migrations.RunPython.noop),
+    ]
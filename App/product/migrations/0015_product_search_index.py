@@ -0,0 +1,78 @@
+from django.db import migrations
+
+
+SQLITE_TABLE = 'product_search_fts'
+POSTGRES_TABLE = 'product_search_index'
+
+
+def _documents(apps):
+    Product = apps.get_model('product', 'Product')
+    rows = (
+        Product.objects
+        .values_list('id', 'product_name', 'product_description', 'product_category__category_name')
+        .order_by('id')
+    )
+    chunk = []
+    for row in rows.iterator(chunk_size=500):
+        chunk.append(row)
+        if len(chunk) >= 500:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def create_search_index(apps, schema_editor):
+    # the schema of product.search's backends at the time of this migration
+    connection = schema_editor.connection
+    product_table = apps.get_model('product', 'Product')._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} "
+                f"USING fts5(name, description, category, tokenize='porter unicode61')"
+            )
+            insert = f'INSERT INTO {SQLITE_TABLE} (rowid, name, description, category) VALUES (%s, %s, %s, %s)'
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} ('
+                f'product_id bigint PRIMARY KEY REFERENCES {product_table} (id) ON DELETE CASCADE, '
+                f'document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_document_gin ON {POSTGRES_TABLE} USING GIN (document)'
+            )
+            insert = (
+                f'INSERT INTO {POSTGRES_TABLE} (product_id, document) VALUES (%s, '
+                f"setweight(to_tsvector('english', %s), 'A') || "
+                f"setweight(to_tsvector('english', %s), 'C') || "
+                f"setweight(to_tsvector('english', %s), 'B'))"
+            )
+        else:
+            # other databases search with icontains and have nothing to index
+            return
+        for chunk in _documents(apps):
+            cursor.executemany(
+                insert,
+                [(pk, name, description or '', category or '') for pk, name, description, category in chunk],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    table = {'sqlite': SQLITE_TABLE, 'postgresql': POSTGRES_TABLE}.get(connection.vendor)
+    if table:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0014_product_rating_stats'),
+        ('category', '0002_alter_category_category_img'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
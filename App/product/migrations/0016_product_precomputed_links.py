@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:16
+
+from django.db import migrations, models
+
+
+def backfill_links(apps, schema_editor):
+    # The product_detail URL pattern at the time of this migration. Image
+    # sets depend on the image backend and presets in settings, so they are
+    # left empty here: Product.save() fills them in lazily, and
+    # `manage.py rebuild_product_links` fills them all at once.
+    Product = apps.get_model('product', 'Product')
+    batch = []
+    for product in Product.objects.select_related('product_category').only(
+        'id', 'product_slug', 'product_category__slug',
+    ).iterator(chunk_size=500):
+        product.canonical_path = f'/store/category/{product.product_category.slug}/{product.product_slug}/'
+        batch.append(product)
+        if len(batch) >= 500:
+            Product.objects.bulk_update(batch, ['canonical_path'])
+            batch = []
+    if batch:
+        Product.objects.bulk_update(batch, ['canonical_path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0015_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='canonical_path',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_urls',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(backfill_links, migrations.RunPython.noop),
+    ]
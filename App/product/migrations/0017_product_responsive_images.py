@@ -0,0 +1,13 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Used to rebuild Product.image_urls for the responsive image presets.
+    # Image sets depend on settings and the image backend, not on the schema;
+    # run `manage.py rebuild_product_links` after changing them.
+
+    dependencies = [
+        ('product', '0016_product_precomputed_links'),
+    ]
+
+    operations = []
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0017_product_responsive_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('copurchase', 'Frequently bought together')], max_length=20)),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='product.product')),
+                ('recommended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_for', to='product.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'kind', 'rank'], name='product_recommendation_rank')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'kind', 'recommended'), name='unique_product_recommendation')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0018_product_recommendations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productrecommendation',
+            name='computed_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='productrecommendation',
+            name='kind',
+            field=models.CharField(choices=[('copurchase', 'Frequently bought together'), ('similar', 'Similar products')], max_length=20),
+        ),
+    ]
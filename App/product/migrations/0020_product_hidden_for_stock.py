@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0019_product_recommendation_similar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='hidden_for_stock',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
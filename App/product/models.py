@@ -1,11 +1,19 @@
 from django.db import models
-from django.db.models import Avg, Count
 
 from category.models import Category
 from accounts.models import Account
 from django.urls import reverse
+from django.core.files.uploadedfile import UploadedFile
 from cloudinary.models import CloudinaryField
 
+from .links import product_image_urls, product_path
+from .ratings import empty_histogram
+
+
+def _image_id(image):
+    # CloudinaryResource, public id string or None
+    return str(getattr(image, 'public_id', image) or '')
+
 
 class Product(models.Model):
     product_name = models.CharField(max_length=200, unique=True)
@@ -15,30 +23,80 @@ class Product(models.Model):
     product_img = CloudinaryField('product_image')
     stock = models.IntegerField()
     is_available = models.BooleanField(default=True)
+    # set by product.stock when it hid the product for running out of stock,
+    # so a restock only shows products that were hidden that way
+    hidden_for_stock = models.BooleanField(default=False, editable=False)
     product_category = models.ForeignKey(Category, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized review aggregates, maintained by product.signals
+    rating_average = models.FloatField(default=0.0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_histogram = models.JSONField(default=empty_histogram, blank=True)
+
+    # Precomputed on save, see product.links
+    canonical_path = models.CharField(max_length=255, blank=True, editable=False)
+    image_urls = models.JSONField(default=dict, blank=True, editable=False)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember what was loaded so save hooks can tell which fields changed
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def loaded_value(self, attname, default=None):
+        return getattr(self, '_loaded_values', {}).get(attname, default)
+
+    def links_stale(self):
+        if not self.canonical_path or (self.product_img and not self.image_urls):
+            return True
+        return (
+            self.product_slug != self.loaded_value('product_slug')
+            or self.product_category_id != self.loaded_value('product_category_id')
+            or _image_id(self.product_img) != _image_id(self.loaded_value('product_img'))
+        )
+
+    def refresh_links(self):
+        self.canonical_path = product_path(self.product_category.slug, self.product_slug)
+        self.image_urls = product_image_urls(self._meta.get_field('product_img').to_python(self.product_img))
+
+    def save(self, *args, **kwargs):
+        if self.hidden_for_stock and self.is_available != self.loaded_value('is_available', self.is_available):
+            # shown or hidden by hand: a restock must not override it
+            self.hidden_for_stock = False
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'hidden_for_stock'}
+        # a new upload only gets its Cloudinary URL while the row is being saved
+        uploading = isinstance(self.product_img, UploadedFile)
+        if not uploading and self.links_stale():
+            self.refresh_links()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'canonical_path', 'image_urls'}
+        super().save(*args, **kwargs)
+        if uploading:
+            self.refresh_links()
+            Product.objects.filter(pk=self.pk).update(canonical_path=self.canonical_path, image_urls=self.image_urls)
+        self._loaded_values = {f.attname: getattr(self, f.attname) for f in self._meta.concrete_fields}
+
     def get_url(self):
+        if self.canonical_path:
+            return self.canonical_path
         return reverse('product_detail', args=[self.product_category.slug, self.product_slug])
 
+    def detail_image_url(self):
+        return self.image_urls.get('detail', {}).get('src') or self.product_img.url
+
 
     def __str__(self):
         return self.product_name
     
     def averageReview(self):
-        reviews = ReviewRating.objects.filter(product=self,status=True).aggregate(average=Avg('rating'))
-        avg = 0
-        if reviews['average'] is not None:
-            avg = float(reviews['average'])
-        return avg
-    
+        return self.rating_average
+
     def countReviews(self):
-        reviews = ReviewRating.objects.filter(product=self, status=True).aggregate(count=Count('id'))
-        count = 0
-        if reviews['count'] is not None:
-            count = int(reviews['count'])
-        return count
+        return self.rating_count
 
 class VariationManager(models.Manager):
     def colors(self):
@@ -93,3 +151,31 @@ class ProductGallery(models.Model):
     class Meta:
         verbose_name = 'productgallery'
         verbose_name_plural = 'product gallery'
+
+
+class ProductRecommendation(models.Model):
+    """Precomputed top-K neighbours of a product, see product.recommendations."""
+    COPURCHASE = 'copurchase'
+    SIMILAR = 'similar'
+    KIND_CHOICES = (
+        (COPURCHASE, 'Frequently bought together'),
+        (SIMILAR, 'Similar products'),
+    )
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='recommended_for')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+    computed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'kind', 'recommended'], name='unique_product_recommendation'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'kind', 'rank'], name='product_recommendation_rank'),
+        ]
+
+    def __str__(self):
+        return f'{self.product} -> {self.recommended} ({self.kind})'
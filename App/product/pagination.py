@@ -0,0 +1,149 @@
+"""
+Keyset (cursor) pagination for product listings.
+
+Instead of OFFSET paging, each page remembers the sort key of its first and
+last row in an opaque signed token; the next page is fetched with a
+``WHERE (key) > (last key)`` filter, so deep pages cost the same as the
+first one and no COUNT query is needed.
+"""
+import datetime
+import json
+
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+CURSOR_SALT = 'product.pagination.cursor'
+
+
+class CursorPage:
+    """Quacks enough like django.core.paginator.Page for store.html."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Paginate ``queryset`` by ``ordering``, a sequence of field names with an
+    optional leading '-', e.g. ('-created_at', '-id'). The last field must be
+    unique so every row has a distinct position.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('id',)):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+
+    def _fields(self):
+        for name in self.ordering:
+            yield name.lstrip('-'), name.startswith('-')
+
+    def encode(self, obj, direction):
+        values = [getattr(obj, field) for field, _ in self._fields()]
+        return signing.dumps(
+            {'v': values, 'd': direction},
+            salt=CURSOR_SALT,
+            serializer=_CursorSerializer,
+            compress=True,
+        )
+
+    def decode(self, token):
+        """Return (values, direction), or None for a missing or tampered token."""
+        if not token:
+            return None
+        try:
+            data = signing.loads(token, salt=CURSOR_SALT, serializer=_CursorSerializer)
+            raw_values, direction = data['v'], data['d']
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            return None
+        if direction not in ('after', 'before') or len(raw_values) != len(self.ordering):
+            return None
+        opts = self.queryset.model._meta
+        try:
+            values = [
+                opts.get_field(field).to_python(value)
+                for (field, _), value in zip(self._fields(), raw_values)
+            ]
+        except Exception:
+            return None
+        return values, direction
+
+    def _seek(self, values, forward):
+        """
+        Build ``(a, b, c) > (x, y, z)`` as
+        a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z),
+        flipping the comparison for descending fields.
+        """
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(self._fields(), values):
+            lookup = f'{field}__gt' if descending != forward else f'{field}__lt'
+            condition |= equal & Q(**{lookup: value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def page(self, token=None):
+        decoded = self.decode(token)
+        forward = decoded is None or decoded[1] == 'after'
+
+        queryset = self.queryset
+        if decoded is not None:
+            queryset = queryset.filter(self._seek(decoded[0], forward))
+
+        if forward:
+            ordering = self.ordering
+        else:
+            ordering = tuple(name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering)
+
+        # one extra row tells us whether there is another page in this direction
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or not forward:
+                next_cursor = self.encode(rows[-1], 'after')
+            if decoded is not None and (has_more or forward):
+                previous_cursor = self.encode(rows[0], 'before')
+        return CursorPage(rows, next_cursor, previous_cursor)
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder cuts datetimes to milliseconds, which would make
+        # the seek skip or repeat rows
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class _CursorSerializer:
+    """JSON that can also carry dates and decimals used as sort keys."""
+
+    def dumps(self, obj):
+        return _CursorEncoder(separators=(',', ':')).encode(obj).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data.decode('utf-8'))
@@ -0,0 +1,96 @@
+"""
+Search result cache keyed on the normalized query.
+
+"Shirts", " shirt " and "SHIRT" are the same search once case-folded,
+whitespace-collapsed and stemmed, so they share one entry. An entry holds
+only the ordered product ids (and the "did you mean" suggestion), not
+rendered HTML, and lives in the dedicated "search" cache alias so its LRU
+budget (settings.CACHES['search']) doesn't compete with page caches.
+Entries are keyed under the catalog cache tags and go stale as soon as a
+product or category changes. Hits and misses are counted in the same cache.
+"""
+import hashlib
+
+from django.core.cache import caches
+
+from factors_Ecom.cache import tagged_key
+from .caching import CATALOG, PRODUCTS
+from .fuzzy import fuzzy_search, index_ready
+from .search import get_search_backend, tokenize
+
+
+CACHE_ALIAS = 'search'
+STATS_KEYS = {'hits': 'search_cache:hits', 'misses': 'search_cache:misses'}
+
+
+def stem(token):
+    """Strip English plural endings; the search backends stem the rest."""
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if token.endswith(('sses', 'xes', 'ches', 'shes')):
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def normalize_query(keyword):
+    return ' '.join(stem(token) for token in tokenize(keyword.casefold()))
+
+
+def _count(outcome):
+    cache = caches[CACHE_ALIAS]
+    key = STATS_KEYS[outcome]
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+def search_ids(query, limit=None):
+    """(suggestion, product ids) for a normalized query, without caching."""
+    product_ids = get_search_backend().search(query, limit=limit)
+    if product_ids:
+        return None, product_ids
+    return fuzzy_search(query, limit=limit)
+
+
+def cached_search(keyword, limit=None):
+    """(suggestion, product ids) for ``keyword``, best match first."""
+    query = normalize_query(keyword)
+    if not query:
+        return None, []
+
+    cache = caches[CACHE_ALIAS]
+    digest = hashlib.md5(f'{query}|{limit}'.encode()).hexdigest()
+    key = tagged_key(f'search_ids:{digest}', [CATALOG, PRODUCTS])
+    entry = cache.get(key)
+    if entry is not None:
+        _count('hits')
+        return entry
+
+    _count('misses')
+    complete = index_ready()
+    entry = search_ids(query, limit)
+    # an empty result while the fuzzy index is still building is not final
+    if entry[1] or complete:
+        cache.set(key, entry)
+    return entry
+
+
+def cache_stats():
+    values = caches[CACHE_ALIAS].get_many(STATS_KEYS.values())
+    hits = values.get(STATS_KEYS['hits'], 0)
+    misses = values.get(STATS_KEYS['misses'], 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / lookups if lookups else 0.0,
+    }
+
+
+def reset_stats():
+    caches[CACHE_ALIAS].delete_many(STATS_KEYS.values())
@@ -0,0 +1,114 @@
+import math
+from collections import defaultdict
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, Subquery
+
+
+STAR_BUCKETS = ('1', '2', '3', '4', '5')
+
+
+def empty_histogram():
+    return {star: 0 for star in STAR_BUCKETS}
+
+
+def _star_bucket(rating):
+    """Ratings come in half steps (0.5 .. 5.0); 4.5 counts as a 5 star review."""
+    star = min(max(int(math.ceil(rating)), 1), 5)
+    return str(star)
+
+
+def _stats_from_rows(rows):
+    """
+    Build {product_id: (average, count, histogram)} from grouped
+    (product_id, rating, n) rows.
+    """
+    totals = defaultdict(lambda: [0.0, 0, empty_histogram()])
+    for product_id, rating, n in rows:
+        entry = totals[product_id]
+        entry[0] += float(rating) * n
+        entry[1] += n
+        entry[2][_star_bucket(rating)] += n
+
+    stats = {}
+    for product_id, (rating_sum, count, histogram) in totals.items():
+        average = round(rating_sum / count, 2) if count else 0.0
+        stats[product_id] = (average, count, histogram)
+    return stats
+
+
+def _grouped_ratings(review_model, **filters):
+    return (
+        review_model.objects
+        .filter(status=True, **filters)
+        .values_list('product_id', 'rating')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+
+
+def refresh_rating_stats(product_id):
+    """
+    Recompute the stored rating aggregates for a single product.
+
+    The product row is locked first so concurrent review writes for the same
+    product are applied one after another instead of overwriting each other.
+    """
+    Product = apps.get_model('product', 'Product')
+    ReviewRating = apps.get_model('product', 'ReviewRating')
+
+    with transaction.atomic():
+        locked = list(
+            Product.objects.select_for_update().filter(pk=product_id).values_list('pk', flat=True)
+        )
+        if not locked:
+            return
+
+        stats = _stats_from_rows(_grouped_ratings(ReviewRating, product_id=product_id))
+        average, count, histogram = stats.get(product_id, (0.0, 0, empty_histogram()))
+        Product.objects.filter(pk=product_id).update(
+            rating_average=average,
+            rating_count=count,
+            rating_histogram=histogram,
+        )
+
+
+def rebuild_rating_stats(product_model=None, review_model=None, batch_size=1000):
+    """
+    Rebuild the aggregates of every product in one grouped pass over the
+    reviews table. Returns the number of products that have reviews.
+
+    Model classes can be passed in so data migrations can use historical models.
+    """
+    Product = product_model or apps.get_model('product', 'Product')
+    ReviewRating = review_model or apps.get_model('product', 'ReviewRating')
+
+    with transaction.atomic():
+        stats = _stats_from_rows(_grouped_ratings(ReviewRating).iterator())
+
+        # Products that lost all their visible reviews go back to zero. A
+        # subquery rather than the ids in ``stats``, which can exceed the
+        # database's limit on query parameters.
+        reviewed = ReviewRating.objects.filter(status=True).values('product_id')
+        Product.objects.filter(rating_count__gt=0).exclude(pk__in=Subquery(reviewed)).update(
+            rating_average=0.0,
+            rating_count=0,
+            rating_histogram=empty_histogram(),
+        )
+
+        products = []
+        for product_id, (average, count, histogram) in stats.items():
+            products.append(Product(
+                pk=product_id,
+                rating_average=average,
+                rating_count=count,
+                rating_histogram=histogram,
+            ))
+        Product.objects.bulk_update(
+            products,
+            ['rating_average', 'rating_count', 'rating_histogram'],
+            batch_size=batch_size,
+        )
+
+    return len(stats)
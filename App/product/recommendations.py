@@ -0,0 +1,239 @@
+"""
+Batch computation of product recommendations.
+
+"Frequently bought together" comes from purchase history: every ordered
+OrderProduct line is a (order, product) cell of a sparse basket matrix B,
+and B.T @ B counts, for every pair of products, the orders containing
+both. The top-K neighbours of each product are stored in
+ProductRecommendation, so the product page reads them with one indexed
+query. Everything runs on NumPy/SciPy arrays; the only Python loop is one
+iteration per product to pick its top K.
+
+"Similar products" covers products nobody has bought yet: each product is
+a TF-IDF vector over the words of its name, description, category and
+variation values, rows are L2-normalized, and cosine similarities are
+computed in batches as sparse products X[batch] @ X.T. An incremental run
+recomputes only the products changed since their neighbours were stored,
+against the whole current catalog; their appearance in other products'
+lists is refreshed by the next full run.
+"""
+from array import array
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Max, Q
+from scipy import sparse
+
+from orders.models import OrderProduct
+from .caching import invalidate_catalog
+from .models import Product, ProductRecommendation, Variation
+from .search import tokenize
+
+
+# how many times a word counts depending on where it appears
+FIELD_WEIGHTS = {'name': 3, 'category': 2, 'variation': 1, 'description': 1}
+SIMILARITY_BATCH_SIZE = 1000
+
+
+def _order_lines(chunk_size=50000):
+    """(order ids, product ids) of every ordered line, as int64 arrays."""
+    orders, products = array('q'), array('q')
+    lines = OrderProduct.objects.filter(ordered=True).values_list('order_id', 'product_id')
+    for order_id, product_id in lines.iterator(chunk_size=chunk_size):
+        orders.append(order_id)
+        products.append(product_id)
+    return np.frombuffer(orders, dtype=np.int64), np.frombuffer(products, dtype=np.int64)
+
+
+def copurchase_matrix(order_ids, product_ids):
+    """
+    (product ids, co-occurrence matrix) where cell (i, j) is the number of
+    orders containing both products i and j, and the diagonal is zero.
+    """
+    orders, order_index = np.unique(order_ids, return_inverse=True)
+    products, product_index = np.unique(product_ids, return_inverse=True)
+    baskets = sparse.csr_matrix(
+        (np.ones(len(order_index), dtype=np.float32), (order_index, product_index)),
+        shape=(len(orders), len(products)),
+    )
+    # a product bought twice in one order still counts once
+    baskets.data[:] = 1
+    cooccurrence = (baskets.T @ baskets).tocsr()
+    cooccurrence.setdiag(0)
+    cooccurrence.eliminate_zeros()
+    return products, cooccurrence
+
+
+def top_k(matrix, k):
+    """Yield (row, columns, scores) with the k best columns of every non-empty row."""
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        if start == end:
+            continue
+        columns = matrix.indices[start:end]
+        scores = matrix.data[start:end]
+        if len(scores) > k:
+            keep = np.argpartition(-scores, k - 1)[:k]
+            columns, scores = columns[keep], scores[keep]
+        # best score first, lower column (older product) breaks ties
+        order = np.lexsort((columns, -scores))
+        yield row, columns[order], scores[order]
+
+
+def neighbours(product_ids, matrix, k):
+    """Yield (product id, [(neighbour id, score), ...]) from a product x product matrix."""
+    for row, columns, scores in top_k(matrix, k):
+        yield int(product_ids[row]), list(zip(product_ids[columns].tolist(), scores.tolist()))
+
+
+def store_recommendations(kind, rows, product_ids=None, batch_size=5000):
+    """
+    Replace the stored recommendations of ``kind`` with ``rows``. When
+    ``product_ids`` is given only those products' rows are replaced.
+    """
+    stored = 0
+    with transaction.atomic():
+        existing = ProductRecommendation.objects.filter(kind=kind)
+        if product_ids is not None:
+            existing = existing.filter(product_id__in=list(product_ids))
+        existing.delete()
+
+        batch = []
+        for product_id, recommended in rows:
+            for rank, (recommended_id, score) in enumerate(recommended, 1):
+                batch.append(ProductRecommendation(
+                    product_id=product_id,
+                    recommended_id=recommended_id,
+                    kind=kind,
+                    score=score,
+                    rank=rank,
+                ))
+            if len(batch) >= batch_size:
+                ProductRecommendation.objects.bulk_create(batch)
+                stored += len(batch)
+                batch = []
+        if batch:
+            ProductRecommendation.objects.bulk_create(batch)
+            stored += len(batch)
+        # product pages embed their recommendations
+        transaction.on_commit(invalidate_catalog)
+    return stored
+
+
+def build_copurchase(k):
+    """Recompute "frequently bought together" for every product; returns (products, rows stored)."""
+    order_ids, product_ids = _order_lines()
+    if not len(order_ids):
+        return 0, store_recommendations(ProductRecommendation.COPURCHASE, [])
+    products, matrix = copurchase_matrix(order_ids, product_ids)
+    stored = store_recommendations(ProductRecommendation.COPURCHASE, neighbours(products, matrix, k))
+    return len(products), stored
+
+
+def product_documents():
+    """(product ids, [Counter of weighted words]) for every product, ordered by id."""
+    variations = defaultdict(list)
+    for product_id, value in Variation.objects.filter(is_active=True).values_list('product_id', 'variation_value'):
+        variations[product_id].append(value)
+
+    product_ids, documents = [], []
+    rows = (
+        Product.objects
+        .order_by('id')
+        .values_list('id', 'product_name', 'product_description', 'product_category__category_name')
+    )
+    for product_id, name, description, category in rows.iterator(chunk_size=5000):
+        words = Counter()
+        fields = [
+            ('name', name),
+            ('category', category),
+            ('description', description),
+            ('variation', ' '.join(variations.get(product_id, ()))),
+        ]
+        for field, text in fields:
+            for word in tokenize(text or ''):
+                words[word] += FIELD_WEIGHTS[field]
+        product_ids.append(product_id)
+        documents.append(words)
+    return np.array(product_ids, dtype=np.int64), documents
+
+
+def tfidf_matrix(documents):
+    """L2-normalized TF-IDF rows (sublinear tf, smoothed idf) as a CSR matrix."""
+    vocabulary = {}
+    indptr, indices, counts = [0], array('q'), array('d')
+    for words in documents:
+        for word, count in words.items():
+            indices.append(vocabulary.setdefault(word, len(vocabulary)))
+            counts.append(count)
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix(
+        (np.frombuffer(counts, dtype=np.float64), np.frombuffer(indices, dtype=np.int64), np.array(indptr)),
+        shape=(len(documents), len(vocabulary)),
+    )
+    document_frequency = np.bincount(matrix.indices, minlength=len(vocabulary))
+    idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+    matrix.data = (1 + np.log(matrix.data)) * idf[matrix.indices]
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / norms) @ matrix)
+
+
+def similar_neighbours(product_ids, matrix, k, rows=None):
+    """
+    Yield (product id, [(neighbour id, cosine), ...]) for the given matrix
+    rows (all by default), computing similarities a batch at a time.
+    """
+    rows = np.arange(matrix.shape[0]) if rows is None else np.asarray(rows)
+    for start in range(0, len(rows), SIMILARITY_BATCH_SIZE):
+        batch = rows[start:start + SIMILARITY_BATCH_SIZE]
+        similarities = (matrix[batch] @ matrix.T).tocsr()
+        for row, columns, scores in top_k(similarities, k + 1):
+            # a product is not its own neighbour
+            keep = columns != batch[row]
+            columns, scores = columns[keep][:k], scores[keep][:k]
+            if len(columns):
+                yield int(product_ids[batch[row]]), list(zip(product_ids[columns].tolist(), scores.tolist()))
+
+
+def changed_since_last_build():
+    """Ids of products whose similar products are missing or older than the product."""
+    last_build = Max('recommendations__computed_at', filter=Q(recommendations__kind=ProductRecommendation.SIMILAR))
+    return set(
+        Product.objects
+        .annotate(last_build=last_build)
+        .filter(
+            Q(last_build__isnull=True)
+            | Q(updated_at__gt=F('last_build'))
+            | Q(variation__created_at__gt=F('last_build'))
+        )
+        .values_list('id', flat=True)
+    )
+
+
+def build_similar(k, changed_only=False):
+    """
+    Recompute "similar products", for every product or only the changed
+    ones; returns (products computed, rows stored).
+    """
+    changed = changed_since_last_build() if changed_only else None
+    if changed is not None and not changed:
+        return 0, 0
+
+    product_ids, documents = product_documents()
+    if not documents:
+        return 0, store_recommendations(ProductRecommendation.SIMILAR, [])
+    matrix = tfidf_matrix(documents)
+    rows = None
+    if changed is not None:
+        rows = np.flatnonzero(np.isin(product_ids, list(changed)))
+    computed = len(product_ids) if rows is None else len(rows)
+    stored = store_recommendations(
+        ProductRecommendation.SIMILAR,
+        similar_neighbours(product_ids, matrix, k, rows),
+        product_ids=changed,
+    )
+    return computed, stored
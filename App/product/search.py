@@ -0,0 +1,238 @@
+"""
+Full-text product search.
+
+Products are indexed into a shadow table owned by the active database
+backend: an FTS5 virtual table on SQLite and a tsvector table with a GIN
+index on PostgreSQL. Both rank matches by relevance (bm25 / ts_rank) and
+index the product name, description and category name. Any other database
+falls back to the old icontains scan so the store keeps working.
+"""
+import abc
+import re
+
+from django.apps import apps
+from django.db import connection
+from django.db.models import Q
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(keyword):
+    return TOKEN_RE.findall(keyword.lower())
+
+
+def _documents(product_model, product_ids=None):
+    products = product_model.objects.all()
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+    return products.values_list(
+        'id', 'product_name', 'product_description', 'product_category__category_name'
+    ).order_by('id')
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BaseSearchBackend(abc.ABC):
+    chunk_size = 500
+
+    def create_schema(self, cursor):
+        pass
+
+    def drop_schema(self, cursor):
+        pass
+
+    def index_products(self, product_ids=None, product_model=None):
+        """(Re)index the given products, or every product when no ids are passed."""
+        Product = product_model or apps.get_model('product', 'Product')
+        rows = _documents(Product, product_ids).iterator(chunk_size=self.chunk_size)
+        indexed = 0
+        with connection.cursor() as cursor:
+            for chunk in _chunks(rows, self.chunk_size):
+                self.remove_rows(cursor, [row[0] for row in chunk])
+                self.insert_rows(cursor, chunk)
+                indexed += len(chunk)
+        return indexed
+
+    def remove_products(self, product_ids):
+        with connection.cursor() as cursor:
+            self.remove_rows(cursor, list(product_ids))
+
+    def rebuild(self, product_model=None):
+        with connection.cursor() as cursor:
+            self.clear(cursor)
+        return self.index_products(product_model=product_model)
+
+    def remove_rows(self, cursor, product_ids):
+        pass
+
+    def insert_rows(self, cursor, rows):
+        pass
+
+    def clear(self, cursor):
+        pass
+
+    @abc.abstractmethod
+    def search(self, keyword, limit=None):
+        """Return the ids of available products matching keyword, best match first."""
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    table = 'product_search_fts'
+    # bm25 column weights: name, description, category
+    weights = (10.0, 1.0, 4.0)
+
+    def create_schema(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+            f"USING fts5(name, description, category, tokenize='porter unicode61')"
+        )
+
+    def drop_schema(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def remove_rows(self, cursor, product_ids):
+        if not product_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(product_ids))
+        cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', product_ids)
+
+    def insert_rows(self, cursor, rows):
+        cursor.executemany(
+            f'INSERT INTO {self.table} (rowid, name, description, category) VALUES (%s, %s, %s, %s)',
+            [(pk, name, description or '', category or '') for pk, name, description, category in rows],
+        )
+
+    def clear(self, cursor):
+        cursor.execute(f'DELETE FROM {self.table}')
+
+    def search(self, keyword, limit=None):
+        tokens = tokenize(keyword)
+        if not tokens:
+            return []
+        # Quote every token so user input can't inject FTS5 query syntax.
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        # FTS5 auxiliary functions and MATCH need the real table name, not an alias.
+        rank = 'bm25(%s, %s)' % (self.table, ', '.join(str(w) for w in self.weights))
+        product_table = apps.get_model('product', 'Product')._meta.db_table
+        sql = (
+            f'SELECT {self.table}.rowid FROM {self.table} '
+            f'JOIN {product_table} p ON p.id = {self.table}.rowid '
+            f'WHERE {self.table} MATCH %s AND p.is_available '
+            f'ORDER BY {rank}, {self.table}.rowid DESC'
+        )
+        params = [match]
+        if limit is not None:
+            sql += ' LIMIT %s'
+            params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    table = 'product_search_index'
+    config = 'english'
+
+    def create_schema(self, cursor):
+        product_table = apps.get_model('product', 'Product')._meta.db_table
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ('
+            f'product_id bigint PRIMARY KEY REFERENCES {product_table} (id) ON DELETE CASCADE, '
+            f'document tsvector NOT NULL)'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {self.table}_document_gin ON {self.table} USING GIN (document)'
+        )
+
+    def drop_schema(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def remove_rows(self, cursor, product_ids):
+        if product_ids:
+            cursor.execute(f'DELETE FROM {self.table} WHERE product_id = ANY(%s)', [product_ids])
+
+    def insert_rows(self, cursor, rows):
+        cursor.executemany(
+            f'INSERT INTO {self.table} (product_id, document) VALUES (%s, '
+            f"setweight(to_tsvector('{self.config}', %s), 'A') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'B') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'C'))",
+            [(pk, name, category or '', description or '') for pk, name, description, category in rows],
+        )
+
+    def clear(self, cursor):
+        cursor.execute(f'TRUNCATE {self.table}')
+
+    def search(self, keyword, limit=None):
+        tokens = tokenize(keyword)
+        if not tokens:
+            return []
+        query = ' & '.join(f'{token}:*' for token in tokens)
+        product_table = apps.get_model('product', 'Product')._meta.db_table
+        sql = (
+            f"SELECT s.product_id FROM {self.table} s "
+            f"JOIN {product_table} p ON p.id = s.product_id, "
+            f"to_tsquery('{self.config}', %s) q "
+            f"WHERE s.document @@ q AND p.is_available "
+            f"ORDER BY ts_rank(s.document, q) DESC, s.product_id DESC"
+        )
+        params = [query]
+        if limit is not None:
+            sql += ' LIMIT %s'
+            params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class BasicSearchBackend(BaseSearchBackend):
+    """icontains fallback for databases without a full-text engine."""
+
+    def index_products(self, product_ids=None, product_model=None):
+        return 0
+
+    def remove_products(self, product_ids):
+        pass
+
+    def rebuild(self, product_model=None):
+        return 0
+
+    def search(self, keyword, limit=None):
+        keyword = keyword.strip()
+        if not keyword:
+            return []
+        Product = apps.get_model('product', 'Product')
+        ids = (
+            Product.objects
+            .filter(is_available=True)
+            .filter(
+                Q(product_name__icontains=keyword) |
+                Q(product_description__icontains=keyword) |
+                Q(product_category__category_name__icontains=keyword)
+            )
+            .order_by('-created_at')
+            .values_list('id', flat=True)
+        )
+        if limit is not None:
+            ids = ids[:limit]
+        return list(ids)
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend(vendor=None):
+    return BACKENDS.get(vendor or connection.vendor, BasicSearchBackend)()
@@ -0,0 +1,95 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from category.models import Category
+from .links import refresh_category_paths
+from .caching import category_tag, invalidate_catalog, invalidate_products
+from .models import Product, ProductGallery, ReviewRating, Variation
+from .ratings import refresh_rating_stats
+from .search import get_search_backend
+from . import autocomplete
+from factors_Ecom.cache import invalidate_tags
+
+
+@receiver(post_save, sender=ReviewRating)
+@receiver(post_delete, sender=ReviewRating)
+def update_product_rating_stats(sender, instance, **kwargs):
+    """Keep Product.rating_* in sync when a review is created, edited, moderated or deleted."""
+    refresh_rating_stats(instance.product_id)
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().index_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    get_search_backend().remove_products([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_product_paths(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        refresh_category_paths(instance)
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created=False, raw=False, **kwargs):
+    """Category names are part of the search document of every product in them."""
+    if created or raw:
+        return
+    product_ids = list(Product.objects.filter(product_category=instance).values_list('id', flat=True))
+    if product_ids:
+        get_search_backend().index_products(product_ids)
+
+
+# ---------------------------------------------------------------- cache tags
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_pages(sender, instance, **kwargs):
+    category_ids = {instance.product_category_id, instance.loaded_value('product_category_id')}
+    category_slugs = Category.objects.filter(pk__in=[pk for pk in category_ids if pk]).values_list('slug', flat=True)
+    invalidate_products([instance.pk], category_slugs)
+
+
+@receiver(post_save, sender=Variation)
+@receiver(post_delete, sender=Variation)
+@receiver(post_save, sender=ProductGallery)
+@receiver(post_delete, sender=ProductGallery)
+@receiver(post_save, sender=ReviewRating)
+@receiver(post_delete, sender=ReviewRating)
+def invalidate_related_product_pages(sender, instance, **kwargs):
+    invalidate_products([instance.product_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_pages(sender, instance, **kwargs):
+    invalidate_catalog()
+    invalidate_tags(category_tag(instance.slug))
+
+
+# ---------------------------------------------------------------- autocomplete
+
+AUTOCOMPLETE_FIELDS = ('product_name', 'product_slug', 'product_category_id', 'is_available')
+
+
+@receiver(post_save, sender=Product)
+def refresh_autocomplete_for_product(sender, instance, created=False, raw=False, **kwargs):
+    """Stock and price updates leave the index alone; only name/URL/visibility changes schedule a rebuild."""
+    if raw:
+        return
+    if created or any(getattr(instance, f) != instance.loaded_value(f) for f in AUTOCOMPLETE_FIELDS):
+        transaction.on_commit(autocomplete.schedule_rebuild)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def refresh_autocomplete(sender, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(autocomplete.schedule_rebuild)
@@ -0,0 +1,126 @@
+"""
+XML sitemaps for crawlers.
+
+/sitemap.xml is an index pointing at one category sitemap and the product
+sitemaps, SITEMAP_PAGE_SIZE available products each (ordered by id). Each
+sitemap is streamed while it is generated, reading rows with .iterator(),
+and the finished document is cached under the catalog cache tags, so it is
+served from the cache until a product or category changes.
+"""
+import hashlib
+from math import ceil
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+
+from category.models import Category
+from factors_Ecom.cache import get_or_set_tagged, tagged_key
+from .caching import CATALOG, PRODUCTS
+from .models import Product
+
+
+CONTENT_TYPE = 'application/xml; charset=utf-8'
+HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+# entries joined into one chunk of the streamed response
+CHUNK_ENTRIES = 500
+
+
+def _lastmod(value):
+    return value.replace(microsecond=0).isoformat() if value else None
+
+
+def _entry(tag, location, lastmod=None):
+    lastmod = f'<lastmod>{lastmod}</lastmod>' if lastmod else ''
+    return f'<{tag}><loc>{escape(location)}</loc>{lastmod}</{tag}>\n'
+
+
+def _document(root, entries):
+    yield f'{HEADER}<{root} xmlns="{NAMESPACE}">\n'
+    chunk = []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) >= CHUNK_ENTRIES:
+            yield ''.join(chunk)
+            chunk = []
+    yield ''.join(chunk) + f'</{root}>\n'
+
+
+def available_products():
+    return Product.objects.filter(is_available=True).order_by('id')
+
+
+def page_count():
+    """Number of product sitemaps (at least one, possibly empty)."""
+    return get_or_set_tagged(
+        'sitemap_pages',
+        [CATALOG, PRODUCTS],
+        lambda: max(1, ceil(available_products().count() / settings.SITEMAP_PAGE_SIZE)),
+        settings.CATALOG_CACHE_TIMEOUT,
+    )
+
+
+def index_entries(base_url):
+    """The category sitemap and every product sitemap, with their newest lastmod."""
+    size = settings.SITEMAP_PAGE_SIZE
+    page_lastmods = []
+    updated = available_products().values_list('updated_at', flat=True)
+    for i, updated_at in enumerate(updated.iterator(chunk_size=5000)):
+        if i % size == 0:
+            page_lastmods.append(updated_at)
+        elif updated_at > page_lastmods[-1]:
+            page_lastmods[-1] = updated_at
+
+    yield _entry('sitemap', base_url + reverse('sitemap_categories'), _lastmod(max(page_lastmods, default=None)))
+    for page, lastmod in enumerate(page_lastmods or [None], 1):
+        yield _entry('sitemap', base_url + reverse('sitemap_products', args=[page]), _lastmod(lastmod))
+
+
+def category_entries(base_url):
+    categories = (
+        Category.objects
+        .annotate(lastmod=Max('product__updated_at', filter=Q(product__is_available=True)))
+        .order_by('id')
+        .values_list('slug', 'lastmod')
+    )
+    for slug, lastmod in categories.iterator(chunk_size=2000):
+        yield _entry('url', base_url + reverse('category_list_slug', args=[slug]), _lastmod(lastmod))
+
+
+def product_entries(base_url, page):
+    size = settings.SITEMAP_PAGE_SIZE
+    products = (
+        available_products()
+        .values_list('canonical_path', 'product_slug', 'product_category__slug', 'updated_at')
+        [(page - 1) * size:page * size]
+    )
+    for path, slug, category_slug, updated_at in products.iterator(chunk_size=2000):
+        path = path or reverse('product_detail', args=[category_slug, slug])
+        yield _entry('url', base_url + path, _lastmod(updated_at))
+
+
+def sitemap_response(request, name, root, entries):
+    """
+    The cached sitemap ``name`` for this host, or a response streaming
+    ``entries(base_url)`` that caches the document once it is complete.
+    """
+    base_url = request.build_absolute_uri('/').rstrip('/')
+    host = hashlib.md5(base_url.encode()).hexdigest()
+    key = tagged_key(f'sitemap:{name}:{host}', [CATALOG, PRODUCTS])
+    body = cache.get(key)
+    if body is not None:
+        return HttpResponse(body, content_type=CONTENT_TYPE)
+
+    def stream():
+        parts = []
+        for part in _document(root, entries(base_url)):
+            parts.append(part)
+            yield part
+        # only a fully sent document is cached
+        cache.set(key, ''.join(parts), settings.CATALOG_CACHE_TIMEOUT)
+
+    return StreamingHttpResponse(stream(), content_type=CONTENT_TYPE)
@@ -0,0 +1,114 @@
+"""
+Stock deltas from the warehouse system.
+
+A delta file or API payload is a list of ``{"product_slug": ..., "delta": n}``
+rows. Deltas for the same product are summed, then applied a chunk at a
+time: the chunk's rows are locked and read once, and a single UPDATE sets
+``stock = stock + CASE id WHEN ... END`` for all of them, so concurrent
+orders decrementing stock are never overwritten. A visible product whose
+stock drops to zero is hidden in the same UPDATE and marked
+hidden_for_stock; a restock only shows products marked that way, never
+those an admin hid.
+
+Bulk updates skip model signals, so each chunk invalidates the cached pages
+of its own products once it commits. The listings across all categories
+and the autocomplete index (rebuilt in the background) only change when
+availability flipped.
+"""
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .autocomplete import schedule_rebuild
+from .caching import invalidate_products
+from .catalog_import import CatalogRowError, chunked
+from .models import Product
+
+
+def parse_delta(line, raw):
+    """(product slug, delta) from one input row."""
+    slug = str(raw.get('product_slug') or '').strip()
+    if not slug:
+        raise CatalogRowError(line, 'product_slug is required')
+    try:
+        delta = int(str(raw.get('delta', '')).strip())
+    except ValueError:
+        raise CatalogRowError(line, 'delta must be an integer')
+    return slug, delta
+
+
+def merge_deltas(deltas):
+    """Sum the deltas of each product slug, keeping first-seen order."""
+    merged = OrderedDict()
+    for slug, delta in deltas:
+        merged[slug] = merged.get(slug, 0) + delta
+    return merged
+
+
+def apply_chunk(deltas):
+    """
+    Apply {product slug: delta} in one transaction; returns (updated ids,
+    ids whose availability flipped, unknown slugs).
+    """
+    with transaction.atomic():
+        rows = (
+            Product.objects
+            .select_for_update(of=('self',))
+            .filter(product_slug__in=list(deltas))
+            .values_list('id', 'product_slug', 'stock', 'is_available', 'hidden_for_stock', 'product_category__slug')
+        )
+        changes, flips, category_slugs, found = {}, {}, set(), set()
+        for product_id, slug, stock, is_available, hidden_for_stock, category_slug in rows:
+            found.add(slug)
+            delta = deltas[slug]
+            if not delta:
+                continue
+            changes[product_id] = delta
+            category_slugs.add(category_slug)
+            if is_available and stock > 0 >= stock + delta:
+                flips[product_id] = False
+            elif hidden_for_stock and stock + delta > 0:
+                flips[product_id] = True
+
+        if changes:
+            update = {
+                'stock': F('stock') + Case(
+                    *(When(pk=pk, then=Value(delta)) for pk, delta in changes.items()),
+                    output_field=IntegerField(),
+                ),
+                'updated_at': timezone.now(),
+            }
+            if flips:
+                update['is_available'] = Case(
+                    *(When(pk=pk, then=Value(available)) for pk, available in flips.items()),
+                    default=F('is_available'),
+                )
+                update['hidden_for_stock'] = Case(
+                    *(When(pk=pk, then=Value(not available)) for pk, available in flips.items()),
+                    default=F('hidden_for_stock'),
+                )
+            Product.objects.filter(pk__in=list(changes)).update(**update)
+
+            ids, listings = list(changes), bool(flips)
+            transaction.on_commit(lambda: invalidate_products(ids, category_slugs, listings=listings))
+    return list(changes), list(flips), [slug for slug in deltas if slug not in found]
+
+
+def apply_stock_deltas(deltas, chunk_size=1000):
+    """
+    Apply an iterable of (product slug, delta). Returns a dict with the
+    number of products updated and flipped, and the unknown slugs.
+    """
+    merged = merge_deltas(deltas)
+    stats = {'updated': 0, 'availability_changed': 0, 'unknown': []}
+    for slugs in chunked(merged, chunk_size):
+        updated, flipped, unknown = apply_chunk({slug: merged[slug] for slug in slugs})
+        stats['updated'] += len(updated)
+        stats['availability_changed'] += len(flipped)
+        stats['unknown'].extend(unknown)
+    if stats['availability_changed']:
+        # hidden products drop out of the suggestions, restocked ones come back
+        transaction.on_commit(schedule_rebuild)
+    return stats
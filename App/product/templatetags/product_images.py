@@ -0,0 +1,56 @@
+import json
+
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from product.images import image_set
+
+
+register = template.Library()
+
+
+def _variants(image, preset):
+    """Accept a stored image set, a Product or a raw Cloudinary image."""
+    if isinstance(image, dict):
+        return image or None
+    image_urls = getattr(image, 'image_urls', None)
+    if image_urls is not None:
+        return image_urls.get(preset) or image_set(image.product_img, preset)
+    return image_set(image, preset)
+
+
+@register.simple_tag
+def responsive_image(image, preset='card', alt='', css_class='', eager=False):
+    """
+    Render an <img> with srcset/sizes (wrapped in <picture> when the backend
+    provides per-format sources). Images are lazy-loaded unless eager=True,
+    which is meant for the main image above the fold.
+    """
+    variants = _variants(image, preset)
+    if not variants:
+        return ''
+
+    loading = format_html('loading="eager" fetchpriority="high"') if eager else format_html('loading="lazy"')
+    img = format_html(
+        '<img src="{}"{}{} alt="{}"{} {} decoding="async">',
+        variants['src'],
+        format_html(' srcset="{}"', variants['srcset']) if variants['srcset'] else '',
+        format_html(' sizes="{}"', variants['sizes']) if variants['srcset'] else '',
+        alt,
+        format_html(' class="{}"', css_class) if css_class else '',
+        loading,
+    )
+    if not variants['sources']:
+        return img
+
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((mime, srcset, variants['sizes']) for mime, srcset in variants['sources'].items()),
+    )
+    return format_html('<picture>{}{}</picture>', sources, img)
+
+
+@register.simple_tag
+def image_variants_json(image, preset='detail'):
+    """Image set as JSON, for scripts that swap the main product image."""
+    return json.dumps(_variants(image, preset) or {})
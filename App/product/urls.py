@@ -6,6 +6,8 @@ urlpatterns = [
     path('category/<slug:category_slug>/', views.store, name='category_list_slug'),
     path('category/<slug:category_slug>/<slug:product_slug>/', views.product_detail, name='product_detail'),
     path('search/', views.search, name='search'),
+    path('search/autocomplete/', views.autocomplete, name='autocomplete'),
+    path('stock/sync/', views.stock_sync, name='stock_sync'),
 
     path('submit_review/<int:product_id>', views.submit_review, name='submit_review'),
 ]
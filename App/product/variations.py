@@ -0,0 +1,53 @@
+"""
+Per-product variation matrix.
+
+{variation_category: {variation_value: variation_id}} for the active
+variations of a product, read with one query and cached under the product's
+tag (bumped whenever one of its variations is saved or deleted). It feeds the
+swatches on the detail page and resolves the options posted to add_cart.
+"""
+from django.conf import settings
+
+from factors_Ecom.cache import get_or_set_tagged
+from .caching import product_tag
+from .models import Variation
+
+
+def build_variation_matrix(product_id):
+    rows = (
+        Variation.objects
+        .filter(product_id=product_id, is_active=True)
+        .order_by('id')
+        .values_list('id', 'variation_category', 'variation_value')
+    )
+    matrix = {}
+    for variation_id, category, value in rows:
+        matrix.setdefault(category, {}).setdefault(value, variation_id)
+    return matrix
+
+
+def get_variation_matrix(product_id):
+    return get_or_set_tagged(
+        f'variation_matrix:{product_id}',
+        [product_tag(product_id)],
+        lambda: build_variation_matrix(product_id),
+        settings.CATALOG_CACHE_TIMEOUT,
+    )
+
+
+def resolve_variations(product_id, data):
+    """
+    Variation ids chosen in ``data`` (e.g. request.POST). Keys and values are
+    matched case-insensitively; anything that is not a variation of the
+    product (csrf token, quantity, unknown values) is ignored.
+    """
+    matrix = {
+        category.lower(): {value.lower(): variation_id for value, variation_id in values.items()}
+        for category, values in get_variation_matrix(product_id).items()
+    }
+    variation_ids = []
+    for key, value in data.items():
+        variation_id = matrix.get(key.lower(), {}).get(str(value).strip().lower())
+        if variation_id is not None and variation_id not in variation_ids:
+            variation_ids.append(variation_id)
+    return variation_ids
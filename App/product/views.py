@@ -1,19 +1,42 @@
+import hmac
+import json
+
 from django.shortcuts import render, get_object_or_404, redirect
+from django.conf import settings
 from django.contrib import messages
-from django.db.models import Q
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.core.paginator import Paginator
-from django.views.decorators.cache import cache_page, never_cache
-from django.core.cache import cache
+from django.views.decorators.cache import cache_control, never_cache
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from factors_Ecom.cache import cache_page_tagged, get_or_set_tagged
 from category.models import Category
-from .models import Product, ReviewRating, ProductGallery
+from .models import Product, ReviewRating
 from orders.models import OrderProduct
+from cart.summary import get_cart_summary
 from .forms import Reviewform
-from cart.models import CartItems
-from cart.views import _cart_id
+from .pagination import CursorPaginator
+from .caching import store_tags
+from .detail import get_product_detail
+from .autocomplete import suggest
+from .query_cache import cached_search
+from .facets import apply_filters, facet_counts, has_filters, parse_filters
+from .stock import apply_stock_deltas, parse_delta
+from . import sitemaps
+
+
+def _store_product_count(products, category):
+    """Exact listing counts are cheap once cached per category."""
+    category_slug = category.slug if category else None
+    return get_or_set_tagged(
+        f'store_count:{category_slug or "all"}',
+        store_tags(None, category_slug),
+        products.count,
+        settings.CATALOG_CACHE_TIMEOUT,
+    )
 
 
-@cache_page(60 * 15)  # Cache for 15 minutes
+@cache_page_tagged(settings.CATALOG_CACHE_TIMEOUT, store_tags)
 def store(request, category_slug=None):
     category = None
 
@@ -23,84 +46,153 @@ def store(request, category_slug=None):
         category = get_object_or_404(Category, slug=category_slug)
         products = products.filter(product_category=category)
 
-    paginator = Paginator(products, 3)  
-    page = request.GET.get('page')
-    paged_products = paginator.get_page(page)
+    facets = facet_counts(products, category_slug)
+    filters = parse_filters(request.GET)
+    if has_filters(filters):
+        products = apply_filters(products, filters)
+        product_count = products.count()
+    else:
+        product_count = _store_product_count(products, category)
+
+    cursor = request.GET.get('after') or request.GET.get('before')
+    cursor_pagination = settings.STORE_PAGINATION == 'cursor' or bool(cursor)
+    if cursor_pagination:
+        paged_products = CursorPaginator(products, settings.STORE_PAGE_SIZE, ordering=('id',)).page(cursor)
+    else:
+        paginator = Paginator(products, settings.STORE_PAGE_SIZE)
+        # reuse the cached count instead of letting the paginator run COUNT(*)
+        paginator.count = product_count
+        paged_products = paginator.get_page(request.GET.get('page'))
 
     context = {
         'products': paged_products,
-        'product_count': products.count(),
+        'product_count': product_count,
         'category': category,
+        'cursor_pagination': cursor_pagination,
+        'facets': facets,
+        'filters': filters,
     }
     return render(request, 'store/store.html', context)
 
 
-@never_cache
+@cache_control(private=True, max_age=0, must_revalidate=True)
 def product_detail(request, category_slug, product_slug):
-    single_product = get_object_or_404(
-        Product.objects.select_related('product_category'),
-        product_category__slug=category_slug,
-        product_slug=product_slug,
-        is_available=True
-    )
-
-    in_cart = CartItems.objects.filter(
-        cart__cart_id=_cart_id(request),
-        product=single_product
-    ).exists()
+    detail = get_product_detail(category_slug, product_slug)
+    if detail is None:
+        raise Http404('No product matches the given query.')
+    single_product = detail['product']
+
+    # the only per-user parts of the page; anonymous visitors cost no query
+    # and no session is created for them
+    in_cart = single_product.id in get_cart_summary(request)['product_ids']
+    orderproduct = None
     if request.user.is_authenticated:
-        
-        try:
-            orderproduct = OrderProduct.objects.filter(user=request.user, product_id=single_product.id).exists()
-        except OrderProduct.DoesNotExist:
-            orderproduct = None
-    else:
-        orderproduct = None
-    reviews = ReviewRating.objects.filter(
-        product_id=single_product.id, 
-        status=True
-    ).select_related('user').order_by('-created_at')
-    #get the product gallery here :
-    product_gallery = ProductGallery.objects.filter(product_id=single_product.id).select_related('product')
+        orderproduct = OrderProduct.objects.filter(user=request.user, product_id=single_product.id).exists()
 
     context = {
         'single_product': single_product,
         'in_cart': in_cart,
-        'orderproduct':orderproduct,
-        'reviews':reviews,
-        'product_gallery':product_gallery
+        'orderproduct': orderproduct,
+        'reviews': detail['reviews'],
+        'product_gallery': detail['gallery'],
+        'colors': detail['colors'],
+        'sizes': detail['sizes'],
+        'bought_together': detail['bought_together'],
+        'similar': detail['similar'],
     }
     return render(request, 'store/product_detail.html', context)
 
 
-@cache_page(60 * 30)  # Cache for 30 minutes
 def search(request):
     keyword = request.GET.get('keyword', '').strip()
 
-    products = Product.objects.none()
+    products = []
     product_count = 0
+    product_count_capped = False
+    suggestion = None
 
     if keyword:
-        products = (
+        cap = settings.SEARCH_RESULT_CAP
+        # fetch one id past the cap to know whether there are more results
+        suggestion, product_ids = cached_search(keyword, limit=cap + 1)
+        product_count_capped = len(product_ids) > cap
+        product_ids = product_ids[:cap]
+        product_count = len(product_ids)
+
+        paginator = Paginator(product_ids, settings.SEARCH_RESULTS_PER_PAGE)
+        products = paginator.get_page(request.GET.get('page'))
+        products_by_id = (
             Product.objects
-            .filter(
-                Q(product_name__icontains=keyword) |
-                Q(product_description__icontains=keyword)
-            )
             .select_related('product_category')
-            .order_by('-created_at')
+            .in_bulk(products.object_list)
         )
-        product_count = products.count()
+        # keep the relevance order returned by the search backend
+        products.object_list = [products_by_id[pk] for pk in products.object_list if pk in products_by_id]
 
     context = {
         'products': products,
         'product_count': product_count,
+        'product_count_capped': product_count_capped,
         'keyword': keyword,
+        'suggestion': suggestion,
     }
     return render(request, 'store/store.html', context)
 
 
 
+@cache_control(public=True, max_age=60)
+def autocomplete(request):
+    """Navbar typeahead: ?q=<prefix> -> matching category and product names."""
+    query = request.GET.get('q', '')[:100]
+    return JsonResponse({'query': query, 'results': suggest(query)})
+
+
+SITEMAP_CACHE_CONTROL = cache_control(public=True, max_age=60 * 60)
+
+
+@SITEMAP_CACHE_CONTROL
+def sitemap_index(request):
+    return sitemaps.sitemap_response(request, 'index', 'sitemapindex', sitemaps.index_entries)
+
+
+@SITEMAP_CACHE_CONTROL
+def sitemap_categories(request):
+    return sitemaps.sitemap_response(request, 'categories', 'urlset', sitemaps.category_entries)
+
+
+@SITEMAP_CACHE_CONTROL
+def sitemap_products(request, page):
+    if not 1 <= page <= sitemaps.page_count():
+        raise Http404('No such sitemap page')
+    return sitemaps.sitemap_response(
+        request, f'products-{page}', 'urlset', lambda base_url: sitemaps.product_entries(base_url, page),
+    )
+
+
+def _stock_token_valid(request):
+    token = settings.STOCK_SYNC_TOKEN
+    supplied = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode())
+
+
+@csrf_exempt
+@require_POST
+def stock_sync(request):
+    """
+    Warehouse stock deltas, authenticated with ``Authorization: Bearer
+    <STOCK_SYNC_TOKEN>``. Body: {"deltas": [{"product_slug": ..., "delta": n}, ...]}.
+    """
+    if not _stock_token_valid(request):
+        return JsonResponse({'error': 'invalid token'}, status=401)
+    try:
+        rows = json.loads(request.body)['deltas']
+        deltas = [parse_delta(line, row) for line, row in enumerate(rows, 1)]
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return JsonResponse({'error': f'invalid payload: {e}'}, status=400)
+    return JsonResponse(apply_stock_deltas(deltas, settings.STOCK_SYNC_CHUNK_SIZE))
+
+
+
 
 
 from django.contrib.auth.decorators import login_required
@@ -128,9 +220,6 @@ def submit_review(request, product_id):
                 review.review = cleaned_data.get('review', '')
                 review.save()
                 
-                # Clear cache for this product
-                cache.delete(f'product_detail_{product_id}')
-                
                 messages.success(request, f"Your review has been updated. Rating: {review.rating} stars")
             else:
                 messages.error(request, f"Invalid review data. Errors: {form.errors}")
@@ -147,9 +236,6 @@ def submit_review(request, product_id):
                 
                 data.save()
                 
-                # Clear cache for this product
-                cache.delete(f'product_detail_{product_id}')
-                
                 messages.success(request, f"Your review has been submitted successfully! Rating: {data.rating} stars")
             else:
                 messages.error(request, f"Invalid review data. Errors: {form.errors}")
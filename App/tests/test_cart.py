@@ -0,0 +1,146 @@
+from decimal import Decimal
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from cart.models import Cart, CartItems
+from cart.summary import get_cart_summary
+from category.models import Category
+from product.models import Product
+
+User = get_user_model()
+
+
+class CartSummaryTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(category_name='Outdoor', slug='outdoor')
+        self.tent, self.stove = [
+            Product.objects.create(
+                product_name=name,
+                product_slug=name.lower(),
+                product_description=name,
+                product_price=price,
+                product_category=self.category,
+                stock=10,
+            )
+            for name, price in [('Tent', 100), ('Stove', 25.50)]
+        ]
+
+    def add(self, product, quantity=1):
+        return self.client.post(f'/cart/add_to_cart/{product.id}/', {'quantity': quantity})
+
+    def cart_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [q['sql'] for q in queries if 'cart_cartitems' in q['sql']]
+
+    def login(self):
+        user = User.objects.create_user(
+            username='camper', email='camper@example.com', password='pass123',
+            first_name='Test', last_name='User',
+        )
+        user.is_active = True
+        user.save()
+        self.client.post('/accounts/login/', {'email': 'camper@example.com', 'password': 'pass123'})
+        return user
+
+    def test_summary_cached_until_cart_changes(self):
+        """Signed-in pages read the cart count and in-cart state from the cached summary"""
+        self.login()
+        self.add(self.tent, 2)
+        response, queries = self.cart_queries(self.tent.get_url())
+        self.assertEqual(response.context['cart_count'], 2)
+        self.assertTrue(response.context['in_cart'])
+        self.assertEqual(len(queries), 1)
+
+        response, queries = self.cart_queries(self.stove.get_url())
+        self.assertFalse(response.context['in_cart'])
+        self.assertEqual(queries, [])
+
+        self.add(self.stove, 1)
+        response, queries = self.cart_queries(self.stove.get_url())
+        self.assertEqual(response.context['cart_count'], 3)
+        self.assertTrue(response.context['in_cart'])
+        self.assertEqual(len(queries), 1)
+
+    def test_store_page_count_follows_cart(self):
+        """The store page's navbar count changes with the cart, not with the page cache"""
+        self.login()
+        self.add(self.tent, 2)
+        self.assertEqual(self.client.get('/store/').context['cart_count'], 2)
+        self.add(self.stove, 5)
+        self.assertEqual(self.client.get('/store/').context['cart_count'], 7)
+
+    def test_subtotal_follows_price_changes(self):
+        """A signed-in user's cached subtotal is rebuilt when a product price changes"""
+        self.login()
+        self.add(self.tent, 2)
+        self.assertEqual(self.client.get('/store/').context['cart_count'], 2)
+        self.tent.product_price = 80
+        self.tent.save()
+        response = self.client.get(self.tent.get_url())
+        self.assertEqual(get_cart_summary(response.wsgi_request)['subtotal'], Decimal('160.00'))
+
+    def test_anonymous_cart_lives_in_a_cookie(self):
+        """Anonymous carts write no session, Cart or CartItems rows"""
+        self.add(self.tent, 2)
+        self.add(self.stove, 1)
+        self.add(self.tent, 1)
+        self.assertFalse(Session.objects.exists())
+        self.assertFalse(Cart.objects.exists() or CartItems.objects.exists())
+
+        response, queries = self.cart_queries(self.tent.get_url())
+        self.assertEqual(response.context['cart_count'], 4)
+        self.assertTrue(response.context['in_cart'])
+        self.assertEqual(queries, [])
+
+        response = self.client.get('/cart/')
+        self.assertEqual([(item.product, item.quantity) for item in response.context['cart_items']],
+                         [(self.tent, 3), (self.stove, 1)])
+        self.assertEqual(response.context['total'], Decimal('325.50'))
+
+        self.client.get(f'/cart/remove_cart/{self.tent.id}/1/')
+        self.client.get(f'/cart/remove_cart_item/{self.stove.id}/2/')
+        response = self.client.get('/cart/')
+        self.assertEqual([(item.product, item.quantity) for item in response.context['cart_items']], [(self.tent, 2)])
+
+    def test_anonymous_visitor_without_cart_costs_nothing(self):
+        """Browsing without a cart creates no session and runs no cart query"""
+        response, queries = self.cart_queries(self.tent.get_url())
+        self.assertEqual(response.context['cart_count'], 0)
+        self.assertEqual(queries, [])
+        self.assertNotIn('sessionid', response.cookies)
+
+    def test_login_merges_cookie_cart(self):
+        """Items added before logging in become the user's cart items"""
+        self.add(self.tent, 2)
+        self.client.get(self.tent.get_url())
+        user = self.login()
+        self.assertEqual(list(CartItems.objects.filter(user=user).values_list('product', 'quantity')), [(self.tent.id, 2)])
+        self.assertEqual(self.client.cookies['cart'].value, '')
+
+        response = self.client.get(self.tent.get_url())
+        self.assertEqual(response.context['cart_count'], 2)
+        self.assertTrue(response.context['in_cart'])
+
+    @override_settings(CART_MAX_QUANTITY=5)
+    def test_invalid_quantities_are_rejected(self):
+        """Non-numeric, zero, negative or too large quantities get a 400 and change nothing"""
+        for quantity in ['abc', '', '0', '-3', '6']:
+            self.assertEqual(self.add(self.tent, quantity).status_code, 400, quantity)
+        self.assertNotIn('cart', self.client.cookies)
+
+        self.add(self.tent, 4)
+        self.add(self.tent, 4)
+        response = self.client.get('/cart/')
+        self.assertEqual([item.quantity for item in response.context['cart_items']], [5])
+
+        user = self.login()
+        self.assertEqual(self.add(self.stove, -1).status_code, 400)
+        self.add(self.stove, 3)
+        self.add(self.stove, 3)
+        self.assertEqual(CartItems.objects.get(user=user, product=self.stove).quantity, 5)
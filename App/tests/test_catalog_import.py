@@ -0,0 +1,148 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from cloudinary import CloudinaryResource
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connections
+from django.test import TestCase, override_settings
+from category.models import Category
+from product.models import Product, ProductGallery, Variation
+from product.search import get_search_backend
+
+
+class ImportCatalogTestCase(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        settings_override = override_settings(
+            AUTOCOMPLETE_INDEX_PATH=os.path.join(tmp.name, 'autocomplete.idx'),
+            AUTOCOMPLETE_REBUILD_DELAY=None,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def write_csv(self, rows):
+        path = os.path.join(self.dir, 'catalog.csv')
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['category', 'product_name', 'description', 'price', 'stock', 'image', 'colors', 'sizes', 'gallery'])
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def row(self, i, **kwargs):
+        return {
+            'category': 'Shirts' if i % 2 else 'Shoes',
+            'product_name': f'Item {i}',
+            'description': f'Description {i}',
+            'price': '10.50',
+            'stock': str(i % 3),
+            'image': f'catalog/item-{i}',
+            'colors': 'Red|Blue',
+            'sizes': 'M',
+            'gallery': f'catalog/item-{i}-back',
+            **kwargs,
+        }
+
+    def import_catalog(self, path, *args):
+        out = StringIO()
+        call_command('import_catalog', path, '--chunk-size', '4', *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_import_creates_and_updates_in_chunks(self):
+        """Rows are upserted by slug with their variations, gallery and search index"""
+        path = self.write_csv([self.row(i) for i in range(10)])
+        output = self.import_catalog(path)
+        self.assertIn('Imported 10 rows', output)
+        self.assertEqual(Category.objects.count(), 2)
+        self.assertEqual(Product.objects.count(), 10)
+        self.assertEqual(Variation.objects.count(), 30)
+        self.assertEqual(ProductGallery.objects.count(), 10)
+
+        item = Product.objects.get(product_slug='item-1')
+        self.assertEqual(item.get_url(), '/store/category/shirts/item-1/')
+        self.assertTrue(item.image_urls)
+        self.assertFalse(Product.objects.get(product_slug='item-3').is_available)
+        self.assertEqual(get_search_backend().search('item 7'), [Product.objects.get(product_slug='item-7').id])
+
+        path = self.write_csv([self.row(1, price='99.00', colors='Red|Green')])
+        self.assertIn('0 products created, 1 updated, 0 unchanged, 1 variations', self.import_catalog(path))
+        self.assertEqual(Product.objects.get(product_slug='item-1').product_price, 99)
+        self.assertEqual(ProductGallery.objects.count(), 10)
+
+    def test_dry_run_writes_nothing(self):
+        """A dry run validates every row and rolls back"""
+        path = self.write_csv([self.row(i) for i in range(5)])
+        self.assertIn('Checked 5 rows', self.import_catalog(path, '--dry-run'))
+        self.assertFalse(Product.objects.exists())
+
+    def test_resume_skips_committed_chunks(self):
+        """A failing row keeps earlier chunks and --resume continues after them once the fix is forced"""
+        rows = [self.row(i) for i in range(10)]
+        rows[5]['price'] = 'free'
+        path = self.write_csv(rows)
+        with self.assertRaisesMessage(CommandError, 'line 7: price and stock must be numbers'):
+            self.import_catalog(path)
+        self.assertEqual(Product.objects.count(), 4)
+        with open(f'{path}.import-state.json') as f:
+            self.assertEqual(json.load(f)['rows'], 4)
+
+        rows[5]['price'] = '5'
+        path = self.write_csv(rows)
+        with self.assertRaisesMessage(CommandError, 'changed since the checkpoint was written. Pass --force'):
+            self.import_catalog(path, '--resume')
+        self.assertEqual(Product.objects.count(), 4)
+        self.assertIn('Imported 6 rows', self.import_catalog(path, '--resume', '--force'))
+        self.assertEqual(Product.objects.count(), 10)
+        self.assertFalse(os.path.exists(f'{path}.import-state.json'))
+
+    def test_taken_names_reported_with_line(self):
+        """A product or category name owned by another slug is a row error, not an IntegrityError"""
+        path = self.write_csv([self.row(i) for i in range(4)])
+        self.import_catalog(path)
+
+        rows = [self.row(i) for i in range(4, 8)]
+        rows[2]['product_name'] = 'Item 1'
+        rows[2]['product_slug'] = 'item-one'
+        path = os.path.join(self.dir, 'catalog.jsonl')
+        with open(path, 'w') as f:
+            f.writelines(json.dumps(row) + '\n' for row in rows)
+        with self.assertRaisesMessage(CommandError, 'line 3: product name "Item 1" belongs to product item-1'):
+            self.import_catalog(path)
+
+        path = os.path.join(self.dir, 'categories.csv')
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['category', 'category_slug', 'product_name', 'price', 'stock'])
+            writer.writeheader()
+            writer.writerow({'category': 'Shoes', 'category_slug': 'footwear', 'product_name': 'Item 8', 'price': '1', 'stock': '1'})
+        with self.assertRaisesMessage(CommandError, 'line 2: category name "Shoes" belongs to category shoes'):
+            self.import_catalog(path)
+        self.assertEqual(Product.objects.count(), 4)
+
+    def test_uploads_outside_transaction_and_discarded_on_failure(self):
+        """Images upload before the chunk's transaction and are deleted when it fails"""
+        depths = []
+        # uploads run on worker threads, look at the importing thread's connection
+        importing = connections['default']
+
+        def upload(source, **options):
+            depths.append(len(importing.atomic_blocks))
+            return CloudinaryResource(source.rsplit('/', 1)[-1], type='upload', resource_type='image')
+
+        rows = [self.row(i, image=f'https://img.example/item-{i}.jpg', gallery='') for i in range(2)]
+        path = self.write_csv(rows)
+        with mock.patch('product.catalog_import.uploader.upload_resource', side_effect=upload), \
+                mock.patch('product.catalog_import.uploader.destroy') as destroy, \
+                mock.patch('product.catalog_import.Variation.objects.bulk_create', side_effect=IntegrityError('boom')):
+            with self.assertRaisesMessage(CommandError, 'line 2: chunk starting here conflicts'):
+                self.import_catalog(path)
+        # TestCase wraps each test in two atomic blocks
+        self.assertEqual(depths, [2, 2])
+        self.assertEqual(sorted(call.args[0] for call in destroy.call_args_list), ['item-0.jpg', 'item-1.jpg'])
+        self.assertFalse(Product.objects.exists())
@@ -0,0 +1,37 @@
+from django.core.cache import cache
+from django.test import TestCase
+from category.menu import get_menu
+from category.models import Category
+from product.models import Product
+
+
+class CategoryMenuTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.outdoor = Category.objects.create(category_name='Outdoor', slug='outdoor')
+        self.kitchen = Category.objects.create(category_name='Kitchen', slug='kitchen')
+        self.tent = Product.objects.create(
+            product_name='Tent', product_slug='tent', product_description='Tent',
+            product_price=100, product_category=self.outdoor, stock=1,
+        )
+
+    def test_menu_cached_with_counts(self):
+        """The menu is built once with available-product counts and URLs"""
+        menu = get_menu()
+        self.assertEqual(
+            [(item['category_name'], item['url'], item['product_count']) for item in menu],
+            [('Outdoor', '/store/category/outdoor/', 1), ('Kitchen', '/store/category/kitchen/', 0)],
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(get_menu(), menu)
+
+    def test_menu_rebuilt_on_product_and_category_changes(self):
+        """Saving a product or category rebuilds the menu"""
+        get_menu()
+        self.tent.is_available = False
+        self.tent.save()
+        self.assertEqual(get_menu()[0]['product_count'], 0)
+
+        self.kitchen.category_name = 'Cookware'
+        self.kitchen.save()
+        self.assertEqual(get_menu()[1]['category_name'], 'Cookware')
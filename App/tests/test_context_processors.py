@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.template import engines
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from accounts.models import UserProfile
+from factors_Ecom.context import skip_context_processors
+
+User = get_user_model()
+
+
+class LazyContextProcessorTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='camper', email='camper@example.com', password='pass123',
+            first_name='Test', last_name='User',
+        )
+
+    def render(self, source, view=None):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        request.session = self.client.session
+
+        def default_view(request):
+            return HttpResponse(engines['django'].from_string(source).render({}, request))
+
+        with CaptureQueriesContext(connection) as queries:
+            content = (view or default_view)(request).content.decode()
+        return content, [q['sql'] for q in queries]
+
+    def test_profile_created_with_account(self):
+        """Accounts get their UserProfile on creation, not on a page view"""
+        self.assertTrue(UserProfile.objects.filter(user=self.user).exists())
+
+    def test_values_computed_only_when_used(self):
+        """Unused context processor values run no query"""
+        content, queries = self.render('hello')
+        self.assertEqual((content, queries), ('hello', []))
+
+        content, queries = self.render('{{ cart_count }} {{ userprofile.get_profile_picture_url }}')
+        self.assertEqual(content, '0 /media/default/images.png')
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any(sql.startswith('INSERT') for sql in queries))
+
+    def test_views_can_opt_out(self):
+        """@skip_context_processors leaves the custom variables out"""
+        @skip_context_processors
+        def view(request):
+            return HttpResponse(engines['django'].from_string('[{{ cart_count }}]').render({}, request))
+
+        content, queries = self.render('', view)
+        self.assertEqual((content, queries), ('[]', []))
@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import TestCase
+from category.models import Category
+from product.facets import apply_filters, facet_counts, parse_filters
+from product.models import Product, Variation
+
+
+class StoreFacetsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.outdoor = Category.objects.create(category_name='Outdoor', slug='outdoor')
+        self.kitchen = Category.objects.create(category_name='Kitchen', slug='kitchen')
+        self.tent = self.create_product('Tent', 300, 5, self.outdoor, rating=4.5)
+        self.stove = self.create_product('Stove', 700, 0, self.outdoor, rating=3.2)
+        self.lamp = self.create_product('Lamp', 6000, 2, self.kitchen)
+        for product, category, value, active in [
+            (self.tent, 'color', 'Green', True),
+            (self.tent, 'color', 'Blue', True),
+            (self.tent, 'size', 'L', True),
+            (self.stove, 'color', 'green', True),
+            (self.lamp, 'size', 'M', True),
+            (self.lamp, 'color', 'Red', False),
+        ]:
+            Variation.objects.create(product=product, variation_category=category, variation_value=value, is_active=active)
+
+    def create_product(self, name, price, stock, category, rating=0):
+        product = Product.objects.create(
+            product_name=name,
+            product_slug=name.lower(),
+            product_description=name,
+            product_price=price,
+            product_category=category,
+            stock=stock,
+        )
+        Product.objects.filter(pk=product.pk).update(rating_average=rating)
+        return product
+
+    def filtered(self, query):
+        products = Product.objects.filter(is_available=True).order_by('id')
+        return list(apply_filters(products, parse_filters(QueryDict(query))))
+
+    def test_filters(self):
+        """Price, stock, color, size and rating filters narrow the listing"""
+        self.assertEqual(self.filtered('price=0-500'), [self.tent])
+        self.assertEqual(self.filtered('price=5000-'), [self.lamp])
+        self.assertEqual(self.filtered('in_stock=1'), [self.tent, self.lamp])
+        self.assertEqual(self.filtered('color=GREEN'), [self.tent, self.stove])
+        self.assertEqual(self.filtered('color=green&color=blue'), [self.tent, self.stove])
+        self.assertEqual(self.filtered('color=green&size=l'), [self.tent])
+        self.assertEqual(self.filtered('color=red'), [])
+        self.assertEqual(self.filtered('rating=3'), [self.tent, self.stove])
+        self.assertEqual(self.filtered('rating=4&in_stock=1'), [self.tent])
+
+    def test_malformed_filters_ignored(self):
+        """Unknown price ranges and ratings are dropped instead of failing"""
+        filters = parse_filters(QueryDict('price=1-2&rating=five&color=%20'))
+        self.assertEqual(filters, {'price': None, 'in_stock': False, 'color': [], 'size': [], 'rating': None})
+        self.assertEqual(len(self.filtered('price=1-2&rating=7')), 3)
+
+    def test_facet_counts(self):
+        """Counts cover the whole listing and skip inactive variations"""
+        facets = facet_counts(Product.objects.filter(is_available=True))
+        self.assertEqual([(f['key'], f['count']) for f in facets['price']],
+                         [('0-500', 1), ('500-1000', 1), ('1000-5000', 0), ('5000-', 1)])
+        self.assertEqual(facets['in_stock'], 2)
+        self.assertEqual([(f['value'], f['count']) for f in facets['rating']], [(4, 1), (3, 2), (2, 2), (1, 2)])
+        self.assertEqual(facets['color'], [{'value': 'blue', 'count': 1}, {'value': 'green', 'count': 2}])
+        self.assertEqual(facets['size'], [{'value': 'l', 'count': 1}, {'value': 'm', 'count': 1}])
+
+        outdoor = facet_counts(Product.objects.filter(product_category=self.outdoor), 'outdoor')
+        self.assertEqual(outdoor['size'], [{'value': 'l', 'count': 1}])
+
+    def test_facet_counts_cached_until_products_change(self):
+        """Cached counts are rebuilt once a product in the listing changes"""
+        self.assertEqual(facet_counts(Product.objects.all())['in_stock'], 2)
+        with self.assertNumQueries(0):
+            facet_counts(Product.objects.all())
+        self.stove.stock = 4
+        self.stove.save()
+        self.assertEqual(facet_counts(Product.objects.all())['in_stock'], 3)
+
+    def test_store_view(self):
+        """The store page applies filters and shows the facets"""
+        response = self.client.get('/store/category/outdoor/', {'color': 'blue'})
+        self.assertEqual(list(response.context['products']), [self.tent])
+        self.assertEqual(response.context['product_count'], 1)
+        self.assertEqual(response.context['facets']['in_stock'], 1)
+        self.assertContains(response, 'value="blue" checked')
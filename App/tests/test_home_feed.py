@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from category.models import Category
+from product.home_feed import get_home_feed
+from product.models import Product
+
+SECTIONS = [
+    {'type': 'new_arrivals', 'key': 'new-arrivals', 'title': 'New Arrivals', 'limit': 3},
+    {'type': 'best_sellers', 'key': 'best-sellers', 'title': 'Best Sellers', 'limit': 3},
+    {'type': 'category_rows', 'key': 'category', 'limit': 2, 'max_categories': 2},
+]
+
+
+@override_settings(HOME_SECTIONS=SECTIONS)
+class HomeFeedTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.categories = [
+            Category.objects.create(category_name=name, slug=name.lower())
+            for name in ['Bags', 'Camping', 'Shoes']
+        ]
+        self.products = [
+            Product.objects.create(
+                product_name=f'Item {i}',
+                product_slug=f'item-{i}',
+                product_description='Item',
+                product_price=10,
+                product_category=self.categories[i % 3],
+                stock=1,
+            )
+            for i in range(9)
+        ]
+
+    def test_sections_are_bounded(self):
+        """Every section holds at most its limit, and at most max_categories rows"""
+        feed = get_home_feed()
+        self.assertEqual([section['key'] for section in feed],
+                         ['new-arrivals', 'category:bags', 'category:camping'])
+        self.assertEqual([card['name'] for card in feed[0]['products']], ['Item 8', 'Item 7', 'Item 6'])
+        self.assertEqual([card['name'] for card in feed[1]['products']], ['Item 6', 'Item 3'])
+        self.assertEqual(feed[1]['products'][0]['url'], '/store/category/bags/item-6/')
+
+    def test_feed_cached_until_catalog_changes(self):
+        """The feed is served from the cache until a product save bumps its tags"""
+        get_home_feed()
+        with self.assertNumQueries(0):
+            feed = get_home_feed()
+        self.assertEqual(feed[0]['products'][0]['name'], 'Item 8')
+
+        newest = self.products[8]
+        newest.product_name = 'Renamed'
+        newest.save()
+        self.assertEqual(get_home_feed()[0]['products'][0]['name'], 'Renamed')
+
+        newest.is_available = False
+        newest.save()
+        self.assertEqual([card['name'] for card in get_home_feed()[0]['products']], ['Item 7', 'Item 6', 'Item 5'])
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from category.models import Category
+from product.models import Product
+
+User = get_user_model()
+
+
+class StorePageCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(category_name='Outdoor', slug='outdoor')
+        self.tent = Product.objects.create(
+            product_name='Tent',
+            product_slug='tent',
+            product_description='Tent',
+            product_price=100,
+            product_category=self.category,
+            stock=10,
+        )
+        user = User.objects.create_user(
+            username='alice', email='alice@example.com', password='pass123',
+            first_name='Alice', last_name='Camper',
+        )
+        user.is_active = True
+        user.save()
+
+    def test_cached_page_is_not_shared_with_signed_in_users(self):
+        """A second client never sees the first client's name or cart count"""
+        alice = Client()
+        alice.post('/accounts/login/', {'email': 'alice@example.com', 'password': 'pass123'})
+        alice.post(f'/cart/add_to_cart/{self.tent.id}/', {'quantity': 2})
+        response = alice.get('/store/')
+        self.assertContains(response, 'Hi, Alice!')
+        self.assertEqual(response.context['cart_count'], 2)
+
+        visitor = Client()
+        response = visitor.get('/store/')
+        self.assertNotContains(response, 'Alice')
+        self.assertEqual(response.context['cart_count'], 0)
+        # the visitor's page is cached, and still not served to Alice
+        response = alice.get('/store/')
+        self.assertContains(response, 'Hi, Alice!')
+
+    def test_anonymous_pages_served_from_cache(self):
+        """Visitors without cookies share the cached store page"""
+        self.client.get('/store/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/store/')
+        self.assertContains(response, 'Tent')
+        self.assertEqual(len(queries), 0)
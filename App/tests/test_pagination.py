@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from category.models import Category
+from product.models import Product
+from product.pagination import CursorPaginator
+
+
+class CursorPaginatorTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(category_name='Outdoor', slug='outdoor')
+        # several products share a price, so pages split inside the ties
+        self.products = [
+            Product.objects.create(
+                product_name=f'Item {i}',
+                product_slug=f'item-{i}',
+                product_description='Item',
+                product_price=price,
+                product_category=category,
+                stock=1,
+            )
+            for i, price in enumerate([50, 20, 20, 20, 10, 20, 50])
+        ]
+        self.paginator = CursorPaginator(Product.objects.all(), 3, ordering=('-product_price', 'id'))
+        self.expected = sorted(self.products, key=lambda p: (-p.product_price, p.id))
+
+    def test_cursor_round_trip(self):
+        """A cursor decodes to the sort key of the row it was made from"""
+        product = Product.objects.get(pk=self.products[1].pk)
+        token = self.paginator.encode(product, 'after')
+        self.assertEqual(self.paginator.decode(token), ([Decimal('20.00'), product.id], 'after'))
+
+        paginator = CursorPaginator(Product.objects.all(), 3, ordering=('-created_at', '-id'))
+        self.assertEqual(paginator.decode(paginator.encode(product, 'before')), ([product.created_at, product.id], 'before'))
+
+    def test_pages_through_ties_and_back(self):
+        """Walking forward and back visits every row once, in order, across ties"""
+        pages = [self.paginator.page()]
+        while pages[-1].has_next():
+            pages.append(self.paginator.page(pages[-1].next_cursor))
+        self.assertEqual([list(page) for page in pages],
+                         [self.expected[0:3], self.expected[3:6], self.expected[6:]])
+        self.assertFalse(pages[0].has_previous())
+        # the last page is short and has no next page
+        self.assertEqual(len(pages[-1]), 1)
+        self.assertFalse(pages[-1].has_next())
+
+        page = pages[-1]
+        back = []
+        while page.has_previous():
+            page = self.paginator.page(page.previous_cursor)
+            back.append(list(page))
+        self.assertEqual(back, [self.expected[3:6], self.expected[0:3]])
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        """Tampered, foreign or garbage cursors return page one"""
+        token = self.paginator.encode(self.products[1], 'after')
+        foreign = CursorPaginator(Product.objects.all(), 3, ordering=('id',)).encode(self.products[1], 'after')
+        for cursor in [token[:-2] + 'xx', foreign, 'garbage', '']:
+            page = self.paginator.page(cursor)
+            self.assertEqual(list(page), self.expected[0:3])
+            self.assertFalse(page.has_previous())
+
+        response = self.client.get('/store/', {'after': 'garbage'})
+        self.assertTrue(response.context['cursor_pagination'])
+        self.assertEqual(len(response.context['products']), 7)
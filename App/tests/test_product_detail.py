@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from category.models import Category
+from product.models import Product, Variation
+
+User = get_user_model()
+
+
+class ProductDetailTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(category_name='Outdoor', slug='outdoor')
+        self.tent = Product.objects.create(
+            product_name='Tent',
+            product_slug='tent',
+            product_description='A tent',
+            product_price=100,
+            product_category=self.category,
+            stock=10,
+        )
+        Variation.objects.create(product=self.tent, variation_category='color', variation_value='Green')
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [q['sql'] for q in queries]
+
+    def test_cached_render_runs_no_catalog_queries(self):
+        """Once the public data is cached, only per-user queries remain"""
+        url = self.tent.get_url()
+        self.client.get(url)
+        response, queries = self.queries(url)
+        self.assertContains(response, 'Green')
+        self.assertEqual(queries, [])
+
+        user = User.objects.create_user(
+            username='camper', email='camper@example.com', password='pass123', first_name='Test', last_name='User',
+        )
+        user.is_active = True
+        user.save()
+        self.client.post('/accounts/login/', {'email': 'camper@example.com', 'password': 'pass123'})
+        self.client.get(url)
+        response, queries = self.queries(url)
+        self.assertContains(response, 'Green')
+        # session, user, cart summary is cached, whether the user bought it
+        self.assertEqual(len(queries), 3, queries)
+        self.assertIn('orders_orderproduct', queries[-1])
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_cached_data_follows_product_changes(self):
+        """Editing the product or its variations rebuilds the cached data"""
+        url = self.tent.get_url()
+        self.client.get(url)
+        Variation.objects.create(product=self.tent, variation_category='color', variation_value='Orange')
+        self.tent.product_description = 'A bigger tent'
+        self.tent.save()
+        response = self.client.get(url)
+        self.assertContains(response, 'Orange')
+        self.assertContains(response, 'A bigger tent')
+
+    def test_unknown_slugs_are_not_cached(self):
+        """A 404 stores nothing, so made-up slugs can't fill the cache"""
+        url = '/store/category/outdoor/no-such-tent/'
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response, queries = self.queries(url)
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(any('product_product' in sql for sql in queries), queries)
@@ -0,0 +1,71 @@
+import csv
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from xml.etree import ElementTree
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from category.models import Category
+from product.models import Product, Variation
+
+G = '{http://base.google.com/ns/1.0}'
+
+
+class ProductFeedTestCase(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.state = os.path.join(tmp.name, 'state.json')
+        self.category = Category.objects.create(category_name='Outdoor', slug='outdoor')
+        self.tent, self.stove = [
+            Product.objects.create(
+                product_name=name,
+                product_slug=name.lower(),
+                product_description=f'A  good\n{name} & more',
+                product_price=100.50,
+                product_category=self.category,
+                stock=stock,
+            )
+            for name, stock in [('Tent', 3), ('Stove', 0)]
+        ]
+        Variation.objects.create(product=self.tent, variation_category='color', variation_value='Green')
+        Variation.objects.create(product=self.tent, variation_category='color', variation_value='Blue')
+
+    def export(self, name, *args):
+        path = os.path.join(self.dir, name)
+        out = StringIO()
+        call_command(
+            'export_product_feed', path, '--state', self.state, '--base-url', 'https://shop.example/',
+            '--chunk-size', '1', *args, stdout=out,
+        )
+        return path, out.getvalue()
+
+    def test_xml_feed(self):
+        """Every product becomes an RSS item with g: attributes"""
+        path, output = self.export('feed.xml')
+        self.assertIn('Wrote 2 products', output)
+        items = ElementTree.parse(path).getroot().findall('channel/item')
+        tent = {child.tag.replace(G, ''): child.text for child in items[0]}
+        self.assertEqual(tent['link'], 'https://shop.example/store/category/outdoor/tent/')
+        self.assertEqual(tent['price'], '100.50 BDT')
+        self.assertEqual(tent['availability'], 'in stock')
+        self.assertEqual(tent['color'], 'Green/Blue')
+        self.assertEqual(tent['description'], 'A good Tent & more')
+        self.assertEqual(items[1].find(f'{G}availability').text, 'out of stock')
+
+    def test_delta_feed_since_last_export(self):
+        """A delta feed only holds products updated after the previous export"""
+        self.export('feed.csv')
+        self.tent.product_price = 90
+        self.tent.save()
+        Product.objects.filter(pk=self.stove.pk).update(updated_at=timezone.now() - timedelta(days=1))
+
+        path, output = self.export('delta.csv', '--delta')
+        self.assertIn('Wrote 1 products', output)
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([(row['id'], row['price']) for row in rows], [(str(self.tent.id), '90.00 BDT')])
@@ -0,0 +1,93 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image, features
+from category.models import Category
+from product.images import CloudinaryImageBackend, image_set
+from product.models import Product
+
+
+class ResponsiveImageTestCase(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.media = tmp.name
+        settings_override = override_settings(PRODUCT_IMAGE_BACKEND='local', MEDIA_ROOT=tmp.name, MEDIA_URL='/media/')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        os.makedirs(os.path.join(tmp.name, 'catalog'))
+        Image.new('RGB', (1000, 500), 'green').save(os.path.join(tmp.name, 'catalog', 'tent.jpg'))
+        self.category = Category.objects.create(category_name='Outdoor', slug='outdoor')
+
+    def create_product(self, image):
+        return Product.objects.create(
+            product_name='Tent',
+            product_slug='tent',
+            product_description='Tent',
+            product_price=100,
+            product_category=self.category,
+            stock=1,
+            product_img=image,
+        )
+
+    def render(self, product, preset):
+        template = Template("{% load product_images %}{% responsive_image product preset alt='A tent' %}")
+        return template.render(Context({'product': product, 'preset': preset}))
+
+    def test_local_backend_renders_picture(self):
+        """The local fallback writes resized variants and renders srcset and <picture>"""
+        product = self.create_product('catalog/tent.jpg')
+        card = product.image_urls['card']
+        self.assertEqual(card['src'], '/media/variants/600/catalog/tent.jpeg')
+        self.assertEqual(card['srcset'].split(', ')[0], '/media/variants/200/catalog/tent.jpeg 200w')
+        with Image.open(os.path.join(self.media, 'variants', '200', 'catalog', 'tent.jpeg')) as variant:
+            self.assertEqual(variant.size, (200, 100))
+        # never upscaled past the 1000px source
+        self.assertEqual(product.image_urls['zoom']['srcset'], '/media/variants/1000/catalog/tent.jpeg 1000w')
+
+        html = self.render(product, 'card')
+        self.assertIn('srcset="/media/variants/200/catalog/tent.jpeg 200w, ', html)
+        self.assertIn('sizes="(max-width: 576px) 50vw', html)
+        self.assertIn('alt="A tent"', html)
+        self.assertIn('loading="lazy"', html)
+        if features.check('webp'):
+            self.assertTrue(html.startswith('<picture><source type="image/'))
+            self.assertIn('<source type="image/webp" srcset="/media/variants/200/catalog/tent.webp 200w', html)
+
+    def test_missing_local_file_serves_original(self):
+        """Without a source file the local fallback links the original path"""
+        product = self.create_product('catalog/missing.jpg')
+        self.assertEqual(product.image_urls['card'], {
+            'src': '/media/catalog/missing.jpg', 'srcset': '', 'sizes': product.image_urls['card']['sizes'], 'sources': {},
+        })
+        self.assertEqual(self.render(product, 'card'),
+                         '<img src="/media/catalog/missing.jpg" alt="A tent" loading="lazy" decoding="async">')
+
+    def test_no_image_renders_nothing(self):
+        """Products without an image render no tag"""
+        product = self.create_product('')
+        self.assertEqual(product.image_urls, {})
+        self.assertEqual(self.render(product, 'card'), '')
+
+    def test_cloudinary_backend(self):
+        """Cloudinary image sets use f_auto/q_auto URLs per width"""
+        variants = image_set('catalog/tent.jpg', 'thumb', CloudinaryImageBackend())
+        first, second = variants['srcset'].split(', ')
+        self.assertIn('w_80', first)
+        self.assertTrue(first.endswith(' 80w') and second.endswith(' 160w'))
+        self.assertIn('f_auto', variants['src'])
+        self.assertEqual(variants['sources'], {})
+
+    def test_cloudinary_urls_built_once_per_width(self):
+        """Every width is a real build_url() call, memoized across presets"""
+        backend = CloudinaryImageBackend()
+        with mock.patch('cloudinary.CloudinaryResource.build_url', autospec=True,
+                        side_effect=lambda image, width, **options: f'{image.public_id}@{width}') as build_url:
+            thumb = image_set('catalog/tent.jpg', 'thumb', backend)
+            image_set('catalog/tent.jpg', 'thumb', backend)
+        self.assertEqual(thumb['srcset'], 'catalog/tent.jpg@80 80w, catalog/tent.jpg@160 160w')
+        self.assertEqual(thumb['src'], 'catalog/tent.jpg@160')
+        self.assertEqual(sorted(call.kwargs['width'] for call in build_url.call_args_list), [80, 160])
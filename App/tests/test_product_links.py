@@ -0,0 +1,44 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from category.models import Category
+from product.models import Product
+
+
+class ProductLinksTestCase(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(category_name='Outdoor', slug='outdoor')
+        self.tent = Product.objects.create(
+            product_name='Tent',
+            product_slug='tent',
+            product_description='Tent',
+            product_price=100,
+            product_category=self.category,
+            stock=10,
+        )
+
+    def test_resave_product_without_image(self):
+        """A product loaded without product_img can be saved again"""
+        product = Product.objects.get(pk=self.tent.pk)
+        self.assertFalse(product.product_img)
+        product.stock = 5
+        product.save()
+        self.assertEqual(Product.objects.get(pk=self.tent.pk).stock, 5)
+
+    def test_path_follows_slug_and_category(self):
+        """canonical_path is recomputed when the slug or category changes"""
+        self.assertEqual(self.tent.canonical_path, '/store/category/outdoor/tent/')
+        product = Product.objects.get(pk=self.tent.pk)
+        product.product_slug = 'big-tent'
+        product.product_category = Category.objects.create(category_name='Camping', slug='camping')
+        product.save()
+        self.assertEqual(Product.objects.get(pk=self.tent.pk).canonical_path, '/store/category/camping/big-tent/')
+
+    def test_rebuild_command_fills_empty_links(self):
+        """rebuild_product_links recomputes paths left empty, e.g. by a data migration"""
+        Product.objects.update(canonical_path='', image_urls={})
+        out = StringIO()
+        call_command('rebuild_product_links', stdout=out)
+        self.assertIn('Rebuilt links of 1 products', out.getvalue())
+        self.assertEqual(Product.objects.get(pk=self.tent.pk).canonical_path, '/store/category/outdoor/tent/')
@@ -0,0 +1,67 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from cart.models import Cart, CartItems, CheckoutDB
+from category.models import Category
+from product.models import Product
+
+User = get_user_model()
+
+
+class PurgeStaleDataTestCase(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        old = now - timedelta(days=60)
+        category = Category.objects.create(category_name='Outdoor', slug='outdoor')
+        product = Product.objects.create(
+            product_name='Tent', product_slug='tent', product_description='Tent',
+            product_price=100, product_category=category, stock=10,
+        )
+        self.user = User.objects.create_user(
+            username='camper', email='camper@example.com', password='pass123',
+            first_name='Test', last_name='User',
+        )
+
+        Session.objects.create(session_key='expired', session_data='', expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='live', session_data='', expire_date=now + timedelta(days=1))
+
+        self.abandoned, self.recent, self.shared = [Cart.objects.create(cart_id=cart_id) for cart_id in ['abandoned', 'recent', 'shared']]
+        Cart.objects.filter(cart_id__in=['abandoned', 'shared']).update(created_at=old)
+        for cart in [self.abandoned, self.recent, self.abandoned]:
+            CartItems.objects.create(product=product, cart=cart, quantity=1)
+        self.user_item = CartItems.objects.create(product=product, cart=self.shared, user=self.user, quantity=1)
+
+        CheckoutDB.objects.create(user=self.user, total_amount=100)
+        CheckoutDB.objects.create(user=self.user, total_amount=200)
+        CheckoutDB.objects.filter(total_amount=100).update(updated_at=now - timedelta(days=120))
+
+    def purge(self, *args):
+        out = StringIO()
+        call_command('purge_stale_data', '--batch-size', '1', '--sleep', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_purge_in_batches(self):
+        """Only rows past their retention go, signed-in users' carts stay"""
+        output = self.purge()
+        self.assertIn('sessions: deleted 1 rows', output)
+        self.assertIn('cart_items: deleted 2 rows', output)
+        self.assertIn('carts: deleted 1 rows', output)
+        self.assertIn('checkouts: deleted 1 rows', output)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+        self.assertEqual(set(Cart.objects.values_list('cart_id', flat=True)), {'recent', 'shared'})
+        self.assertTrue(CartItems.objects.filter(pk=self.user_item.pk).exists())
+        self.assertEqual(CartItems.objects.count(), 2)
+        self.assertEqual(CheckoutDB.objects.count(), 1)
+
+    def test_dry_run_counts_only(self):
+        """--dry-run reports what would be deleted and keeps it"""
+        output = self.purge('--dry-run', '--only', 'cart_items', 'carts')
+        self.assertIn('cart_items: would delete 2 rows', output)
+        self.assertIn('carts: would delete 1 rows', output)
+        self.assertNotIn('sessions', output)
+        self.assertEqual(CartItems.objects.count(), 4)
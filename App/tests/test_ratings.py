@@ -0,0 +1,90 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from product.models import Product, ReviewRating
+from product.ratings import rebuild_rating_stats
+from category.models import Category
+
+User = get_user_model()
+
+
+class RatingStatsTestCase(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(
+            category_name='Test Category',
+            slug='test-category'
+        )
+        self.product = Product.objects.create(
+            product_name='Test Product',
+            product_slug='test-product',
+            product_description='Test Description',
+            product_price=100.00,
+            product_category=self.category,
+            stock=10
+        )
+        self.users = [
+            User.objects.create_user(
+                username=f'user{i}',
+                email=f'user{i}@example.com',
+                password='pass123',
+                first_name='Test',
+                last_name='User'
+            )
+            for i in range(3)
+        ]
+
+    def review(self, user, rating, **kwargs):
+        return ReviewRating.objects.create(user=user, product=self.product, rating=rating, **kwargs)
+
+    def test_stats_follow_review_changes(self):
+        """Create, edit, moderate and delete all keep the stored aggregates current"""
+        first = self.review(self.users[0], 4.0)
+        second = self.review(self.users[1], 2.5)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rating_count, 2)
+        self.assertAlmostEqual(self.product.rating_average, 3.25)
+        self.assertEqual(self.product.rating_histogram['4'], 1)
+        self.assertEqual(self.product.rating_histogram['3'], 1)
+
+        first.rating = 5.0
+        first.save()
+        second.status = False
+        second.save()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rating_count, 1)
+        self.assertEqual(self.product.averageReview(), 5.0)
+        self.assertEqual(self.product.rating_histogram['5'], 1)
+
+        first.delete()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.countReviews(), 0)
+        self.assertEqual(self.product.rating_average, 0.0)
+
+    def test_rebuild_matches_incremental(self):
+        """The set-based rebuild produces the same numbers as the signals"""
+        self.review(self.users[0], 5.0)
+        self.review(self.users[1], 3.5)
+        self.review(self.users[2], 1.0, status=False)
+        Product.objects.update(rating_average=0, rating_count=0, rating_histogram={})
+
+        self.assertEqual(rebuild_rating_stats(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rating_count, 2)
+        self.assertAlmostEqual(self.product.rating_average, 4.25)
+        self.assertEqual(self.product.rating_histogram, {'1': 0, '2': 0, '3': 0, '4': 1, '5': 1})
+
+    def test_rebuild_resets_products_without_reviews(self):
+        """Stale aggregates go back to zero through a subquery, not a list of ids"""
+        self.review(self.users[0], 4.0)
+        stale = Product.objects.create(
+            product_name='Stale', product_slug='stale', product_description='Stale', product_price=10,
+            product_category=self.category, stock=1, rating_average=3.0, rating_count=2,
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(rebuild_rating_stats(), 1)
+        stale.refresh_from_db()
+        self.assertEqual((stale.rating_count, stale.rating_average), (0, 0.0))
+        self.assertEqual(Product.objects.get(pk=self.product.pk).rating_count, 1)
+        reset = next(q['sql'] for q in queries if q['sql'].startswith('UPDATE') and 'rating_count" > 0' in q['sql'])
+        self.assertIn('SELECT', reset)
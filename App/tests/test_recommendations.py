@@ -0,0 +1,129 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from orders.models import Order, OrderProduct
+from product.models import Product, ProductRecommendation, Variation
+from product.recommendations import build_copurchase, build_similar
+from category.models import Category
+
+User = get_user_model()
+
+
+class CopurchaseRecommendationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(category_name='Outdoor', slug='outdoor')
+        self.tent, self.stove, self.lamp, self.rope = [
+            Product.objects.create(
+                product_name=name,
+                product_slug=name.lower(),
+                product_description=name,
+                product_price=100.00,
+                product_category=self.category,
+                stock=10,
+            )
+            for name in ['Tent', 'Stove', 'Lamp', 'Rope']
+        ]
+        self.user = User.objects.create_user(
+            username='camper', email='camper@example.com', password='pass123',
+            first_name='Test', last_name='User',
+        )
+
+    def order(self, *products, ordered=True):
+        order = Order.objects.create(
+            user=self.user, order_number='1', first_name='Test', last_name='User',
+            phone='1', email='camper@example.com', address_line_1='x', country='x',
+            state='x', city='x', order_total=0, tax=0,
+        )
+        for product in products:
+            OrderProduct.objects.create(
+                order=order, user=self.user, product=product, quantity=1,
+                product_price=product.product_price, ordered=ordered,
+            )
+
+    def test_neighbours_are_ranked_by_shared_orders(self):
+        """Products bought in more of the same orders rank higher; unpaid lines are ignored"""
+        self.order(self.tent, self.stove, self.lamp)
+        self.order(self.tent, self.stove, self.stove)
+        self.order(self.tent, self.rope, ordered=False)
+
+        self.assertEqual(build_copurchase(k=5), (3, 6))
+        tent = ProductRecommendation.objects.filter(product=self.tent).order_by('rank')
+        self.assertEqual(
+            [(r.recommended_id, r.score) for r in tent],
+            [(self.stove.id, 2.0), (self.lamp.id, 1.0)],
+        )
+
+        build_copurchase(k=1)
+        self.assertEqual(ProductRecommendation.objects.filter(product=self.tent).count(), 1)
+
+    def test_product_page_shows_bought_together(self):
+        """The detail page lists available recommendations only"""
+        self.order(self.tent, self.stove, self.lamp)
+        self.lamp.is_available = False
+        self.lamp.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            build_copurchase(k=5)
+
+        response = self.client.get(self.tent.get_url())
+        self.assertEqual([p['id'] for p in response.context['bought_together']], [self.stove.id])
+
+    def test_product_page_follows_recommended_product_changes(self):
+        """Renaming or hiding a recommended product from another category refreshes the cached page"""
+        self.stove.product_category = Category.objects.create(category_name='Kitchen', slug='kitchen')
+        self.stove.save()
+        self.order(self.tent, self.stove)
+        with self.captureOnCommitCallbacks(execute=True):
+            build_copurchase(k=5)
+        self.assertEqual(self.client.get(self.tent.get_url()).context['bought_together'][0]['name'], 'Stove')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stove.product_name = 'Camp Stove'
+            self.stove.save()
+        self.assertEqual(self.client.get(self.tent.get_url()).context['bought_together'][0]['name'], 'Camp Stove')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stove.is_available = False
+            self.stove.save()
+        self.assertEqual(self.client.get(self.tent.get_url()).context['bought_together'], [])
+
+
+class SimilarProductsTestCase(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(category_name='Shirts', slug='shirts')
+        self.oxford = self.create_product('Blue Oxford Shirt', 'Cotton oxford weave with button down collar')
+        self.linen = self.create_product('White Linen Shirt', 'Breathable linen for summer')
+        self.button_down = self.create_product('Oxford Button Down', 'Cotton oxford, regular fit')
+
+    def create_product(self, name, description):
+        return Product.objects.create(
+            product_name=name,
+            product_slug=name.lower().replace(' ', '-'),
+            product_description=description,
+            product_price=100.00,
+            product_category=self.category,
+            stock=10,
+        )
+
+    def similar(self, product):
+        return list(
+            ProductRecommendation.objects
+            .filter(product=product, kind=ProductRecommendation.SIMILAR)
+            .order_by('rank')
+            .values_list('recommended_id', flat=True)
+        )
+
+    def test_products_sharing_words_are_most_similar(self):
+        """Shared name and description words outrank the category alone"""
+        self.assertEqual(build_similar(k=5)[0], 3)
+        self.assertEqual(self.similar(self.oxford), [self.button_down.id, self.linen.id])
+
+    def test_changed_only_recomputes_changed_products(self):
+        """An incremental run skips products that did not change since the last build"""
+        build_similar(k=5)
+        self.assertEqual(build_similar(k=5, changed_only=True), (0, 0))
+
+        Variation.objects.create(product=self.linen, variation_category='color', variation_value='oxford')
+        computed, stored = build_similar(k=5, changed_only=True)
+        self.assertEqual((computed, stored), (1, 2))
+        self.assertEqual(self.similar(self.linen)[0], self.oxford.id)
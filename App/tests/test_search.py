@@ -0,0 +1,185 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.core.cache import cache
+from product.models import Product
+from product.search import get_search_backend
+from product.autocomplete import rebuild_if_stale, rebuild_index, suggest
+from product import fuzzy
+from product.fuzzy import fuzzy_search
+from product.query_cache import cache_stats, cached_search, reset_stats
+from category.models import Category
+
+
+@override_settings(FUZZY_INDEX_BACKGROUND=False)
+class ProductSearchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.shirts = Category.objects.create(category_name='Shirts', slug='shirts')
+        self.shoes = Category.objects.create(category_name='Shoes', slug='shoes')
+        self.blue_shirt = self.create_product('Blue Oxford Shirt', 'Cotton button down', self.shirts)
+        self.runner = self.create_product('Trail Runner', 'Lightweight running shoe', self.shoes)
+        self.hidden = self.create_product('Hidden Shirt', 'Not for sale', self.shirts, is_available=False)
+
+    def create_product(self, name, description, category, **kwargs):
+        return Product.objects.create(
+            product_name=name,
+            product_slug=name.lower().replace(' ', '-'),
+            product_description=description,
+            product_price=100.00,
+            product_category=category,
+            stock=10,
+            **kwargs
+        )
+
+    def test_search_ranks_name_matches_and_skips_unavailable(self):
+        """Name matches rank first and unavailable products never show up"""
+        results = get_search_backend().search('shirt')
+        self.assertEqual(results, [self.blue_shirt.id])
+
+    def test_index_follows_product_and_category_changes(self):
+        """Signals keep the index current for edits, deletes and category renames"""
+        backend = get_search_backend()
+        self.runner.product_name = 'Trail Sneaker'
+        self.runner.save()
+        self.assertEqual(backend.search('sneaker'), [self.runner.id])
+
+        self.shoes.category_name = 'Footwear'
+        self.shoes.save()
+        self.assertEqual(backend.search('footwear'), [self.runner.id])
+
+        self.runner.delete()
+        self.assertEqual(backend.search('sneaker'), [])
+
+    def test_search_view(self):
+        """The search page renders matches for a keyword"""
+        response = self.client.get(reverse('search'), {'keyword': 'running'})
+        self.assertContains(response, 'Trail Runner')
+        self.assertNotContains(response, 'Blue Oxford Shirt')
+
+    @override_settings(SEARCH_RESULTS_PER_PAGE=1, SEARCH_RESULT_CAP=2)
+    def test_search_view_pages_and_caps_results(self):
+        """Results are paged and the total stops at the configured cap"""
+        for i in range(3):
+            self.create_product(f'Linen Shirt {i}', 'Summer', self.shirts)
+
+        response = self.client.get(reverse('search'), {'keyword': 'shirt'})
+        self.assertEqual(len(response.context['products']), 1)
+        self.assertEqual(response.context['product_count'], 2)
+        self.assertTrue(response.context['product_count_capped'])
+        self.assertContains(response, '2+')
+        self.assertContains(response, '?keyword=shirt&amp;page=2')
+
+    def test_misspelled_keyword_falls_back_to_suggestion(self):
+        """A typo is corrected into a "did you mean" and its results are shown"""
+        response = self.client.get(reverse('search'), {'keyword': 'oxfrod shrit'})
+        self.assertEqual(response.context['suggestion'], 'oxford shirt')
+        self.assertEqual([p.id for p in response.context['products']], [self.blue_shirt.id])
+
+    def test_fuzzy_index_picks_up_new_products(self):
+        """Products added after the index was built can be found by a misspelling"""
+        self.assertEqual(fuzzy_search('sandal')[1], [])
+        sandal = self.create_product('Leather Sandal', 'Summer', self.shoes)
+        self.assertEqual(fuzzy_search('sandl'), ('sandal', [sandal.id]))
+
+    def test_fuzzy_index_drops_hidden_and_deleted_products(self):
+        """Refreshes drop products that were hidden or deleted since the last one"""
+        self.assertEqual(fuzzy_search('runnr')[1], [self.runner.id])
+        self.runner.is_available = False
+        self.runner.save()
+        self.assertEqual(fuzzy_search('runnr')[1], [])
+
+        self.assertEqual(fuzzy_search('oxfrd')[1], [self.blue_shirt.id])
+        self.blue_shirt.delete()
+        self.assertEqual(fuzzy_search('oxfrd')[1], [])
+
+    @override_settings(FUZZY_INDEX_BACKGROUND=True)
+    def test_fuzzy_index_is_built_outside_the_request(self):
+        """Until the background build is done the fallback finds nothing, and that isn't cached"""
+        fuzzy._index = None
+        with mock.patch('product.fuzzy.threading.Thread') as thread:
+            self.assertEqual(cached_search('oxfrod'), (None, []))
+            self.assertEqual(cached_search('oxfrod'), (None, []))
+        thread.return_value.start.assert_called_once()
+
+        # run the thread's work here, on the test's connection
+        with mock.patch('product.fuzzy.connection'):
+            thread.call_args.kwargs['target']()
+        self.assertEqual(cached_search('oxfrod'), ('oxford', [self.blue_shirt.id]))
+
+    def test_equivalent_queries_share_a_cached_result(self):
+        """Case, spacing and plurals don't create separate cache entries"""
+        reset_stats()
+        for keyword in ['Shirts', '  shirt ', 'SHIRT']:
+            self.assertEqual(cached_search(keyword), (None, [self.blue_shirt.id]))
+        self.assertEqual(cache_stats()['hits'], 2)
+        self.assertEqual(cache_stats()['misses'], 1)
+
+        self.create_product('Linen Shirt', 'Summer', self.shirts)
+        self.assertEqual(len(cached_search('shirt')[1]), 2)
+
+
+class AutocompleteTestCase(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / 'autocomplete.idx'
+        settings_override = override_settings(AUTOCOMPLETE_INDEX_PATH=str(self.path), AUTOCOMPLETE_REBUILD_DELAY=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.shirts = Category.objects.create(category_name='Shirts', slug='shirts')
+        for name, available in [('Denim Shirt', True), ('Shirt Dress', True), ('Hidden Shirt', False)]:
+            Product.objects.create(
+                product_name=name,
+                product_slug=name.lower().replace(' ', '-'),
+                product_description=name,
+                product_price=100.00,
+                product_category=self.shirts,
+                stock=10,
+                is_available=available,
+            )
+        rebuild_index()
+
+    def test_suggest_matches_word_prefixes(self):
+        """Categories come first, then names starting with the prefix, then inner words"""
+        labels = [result['label'] for result in suggest('shi')]
+        self.assertEqual(labels, ['Shirts', 'Shirt Dress', 'Denim Shirt'])
+        self.assertEqual(suggest('  DENIM   sh')[0]['url'], '/store/category/shirts/denim-shirt/')
+        self.assertEqual(suggest('xyz'), [])
+
+    def test_index_is_rebuilt_when_names_change(self):
+        """Renaming a product marks the index stale; the rebuild runs outside the request"""
+        suggest('shi')
+        product = Product.objects.get(product_slug='denim-shirt')
+        with self.captureOnCommitCallbacks(execute=True):
+            product.product_name = 'Chambray Shirt'
+            product.save()
+        self.assertEqual(suggest('chamb'), [])
+        self.assertTrue(Path(f'{self.path}.stale').exists())
+
+        self.assertEqual(rebuild_if_stale(), 5)
+        self.assertEqual(suggest('chamb')[0]['label'], 'Chambray Shirt')
+        self.assertEqual(suggest('denim'), [])
+        self.assertIsNone(rebuild_if_stale())
+
+    def test_missing_index_is_never_built_in_a_request(self):
+        """Without an index file suggestions are empty until the command builds it"""
+        self.path.unlink()
+        self.assertEqual(self.client.get(reverse('autocomplete'), {'q': 'dress'}).json()['results'], [])
+        self.assertFalse(self.path.exists())
+
+        out = StringIO()
+        call_command('rebuild_autocomplete_index', '--if-stale', stdout=out)
+        self.assertIn('Wrote 5 keys', out.getvalue())
+        self.assertEqual(suggest('dress')[0]['label'], 'Shirt Dress')
+
+    def test_autocomplete_view(self):
+        """The endpoint returns JSON results for ?q="""
+        response = self.client.get(reverse('autocomplete'), {'q': 'dress'})
+        self.assertEqual(response.json()['results'][0]['label'], 'Shirt Dress')
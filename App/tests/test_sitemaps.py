@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from category.models import Category
+from product.models import Product
+
+
+@override_settings(SITEMAP_PAGE_SIZE=2)
+class SitemapTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(category_name='Outdoor', slug='outdoor')
+        self.products = [
+            Product.objects.create(
+                product_name=f'Tent {i}',
+                product_slug=f'tent-{i}',
+                product_description='Tent',
+                product_price=100.00,
+                product_category=self.category,
+                stock=1,
+                is_available=i != 3,
+            )
+            for i in range(4)
+        ]
+
+    def get(self, url):
+        response = self.client.get(url)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body.decode()
+
+    def test_index_lists_paginated_sitemaps(self):
+        """The index points at the category sitemap and one sitemap per page of products"""
+        response, body = self.get('/sitemap.xml')
+        self.assertEqual(response['Content-Type'], 'application/xml; charset=utf-8')
+        self.assertIn('<loc>http://testserver/sitemap-categories.xml</loc><lastmod>', body)
+        self.assertIn('<loc>http://testserver/sitemap-products-2.xml</loc>', body)
+        self.assertNotIn('sitemap-products-3.xml', body)
+
+    def test_product_sitemap_pages(self):
+        """Available products are listed by id with their lastmod, hidden ones are left out"""
+        response, body = self.get('/sitemap-products-2.xml')
+        self.assertTrue(response.streaming)
+        self.assertIn('<loc>http://testserver/store/category/outdoor/tent-2/</loc><lastmod>', body)
+        self.assertNotIn('tent-3', body)
+        self.assertEqual(self.client.get('/sitemap-products-3.xml').status_code, 404)
+
+    def test_sitemap_cached_until_catalog_changes(self):
+        """A complete sitemap is served from the cache until a product changes"""
+        _, first = self.get('/sitemap-categories.xml')
+        self.assertIn('<loc>http://testserver/store/category/outdoor/</loc>', first)
+        with self.assertNumQueries(0):
+            response, cached = self.get('/sitemap-categories.xml')
+        self.assertFalse(response.streaming)
+        self.assertEqual(cached, first)
+
+        product = self.products[0]
+        product.product_description = 'Bigger tent'
+        product.save()
+        with self.assertNumQueries(1):
+            self.get('/sitemap-categories.xml')
@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from category.models import Category
+from factors_Ecom.cache import tag_versions
+from product.caching import PRODUCTS, category_tag, product_tag
+from product.models import Product
+
+
+class StockSyncTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        settings_override = override_settings(
+            AUTOCOMPLETE_INDEX_PATH=os.path.join(tmp.name, 'autocomplete.idx'),
+            AUTOCOMPLETE_REBUILD_DELAY=None,
+            STOCK_SYNC_TOKEN='secret',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.category = Category.objects.create(category_name='Outdoor', slug='outdoor')
+        self.tent, self.stove = [
+            Product.objects.create(
+                product_name=name,
+                product_slug=name.lower(),
+                product_description=name,
+                product_price=100.00,
+                product_category=self.category,
+                stock=stock,
+                is_available=stock > 0,
+                hidden_for_stock=stock == 0,
+            )
+            for name, stock in [('Tent', 5), ('Stove', 0)]
+        ]
+
+    def post(self, payload, token='secret'):
+        return self.client.post(
+            reverse('stock_sync'), json.dumps(payload), content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {token}',
+        )
+
+    def test_api_applies_deltas_and_flips_availability(self):
+        """Deltas are summed per product and availability follows stock across zero"""
+        before = tag_versions([PRODUCTS, product_tag(self.tent.id), category_tag('outdoor')])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post({'deltas': [
+                {'product_slug': 'tent', 'delta': -3},
+                {'product_slug': 'tent', 'delta': -2},
+                {'product_slug': 'stove', 'delta': 4},
+                {'product_slug': 'lantern', 'delta': 1},
+            ]})
+        self.assertEqual(response.json(), {'updated': 2, 'availability_changed': 2, 'unknown': ['lantern']})
+        self.tent.refresh_from_db()
+        self.stove.refresh_from_db()
+        self.assertEqual((self.tent.stock, self.tent.is_available), (0, False))
+        self.assertEqual((self.stove.stock, self.stove.is_available), (4, True))
+        after = tag_versions([PRODUCTS, product_tag(self.tent.id), category_tag('outdoor')])
+        self.assertTrue(all(a != b for a, b in zip(before, after)))
+
+    def test_stock_change_without_flip_keeps_listings(self):
+        """Only the product's own pages are invalidated when availability stays the same"""
+        products_version = tag_versions([PRODUCTS])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post({'deltas': [{'product_slug': 'tent', 'delta': 7}]})
+        self.assertEqual(Product.objects.get(pk=self.tent.pk).stock, 12)
+        self.assertEqual(tag_versions([PRODUCTS]), products_version)
+
+    def test_restock_keeps_products_hidden_by_hand(self):
+        """Only products hidden for running out of stock are shown again"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post({'deltas': [{'product_slug': 'tent', 'delta': -5}]})
+        tent = Product.objects.get(pk=self.tent.pk)
+        self.assertEqual((tent.is_available, tent.hidden_for_stock), (False, True))
+
+        # an admin keeps the sold-out tent off the shop, the stove is shown by hand
+        stove = Product.objects.get(pk=self.stove.pk)
+        stove.is_available = True
+        stove.save()
+        Product.objects.filter(pk=self.stove.pk).update(stock=3)
+        tent.save()
+        self.assertTrue(Product.objects.get(pk=self.tent.pk).hidden_for_stock)
+        tent.is_available = True
+        tent.save()
+        tent.is_available = False
+        tent.save()
+        self.assertFalse(Product.objects.get(pk=self.tent.pk).hidden_for_stock)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post({'deltas': [{'product_slug': 'tent', 'delta': 2}, {'product_slug': 'stove', 'delta': 1}]})
+        self.assertEqual(response.json()['availability_changed'], 0)
+        self.assertFalse(Product.objects.get(pk=self.tent.pk).is_available)
+        self.assertTrue(Product.objects.get(pk=self.stove.pk).is_available)
+
+    def test_api_rejects_bad_token_and_payload(self):
+        """The API needs the configured token and a list of valid deltas"""
+        self.assertEqual(self.post({'deltas': []}, token='wrong').status_code, 401)
+        with override_settings(STOCK_SYNC_TOKEN=''):
+            self.assertEqual(self.post({'deltas': []}, token='').status_code, 401)
+        self.assertEqual(self.post({'deltas': [{'product_slug': 'tent', 'delta': 'x'}]}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('stock_sync')).status_code, 405)
+        self.assertEqual(Product.objects.get(pk=self.tent.pk).stock, 5)
+
+    def test_sync_stock_command(self):
+        """The command reads deltas from a CSV file in chunks"""
+        path = os.path.join(self.dir, 'deltas.csv')
+        with open(path, 'w') as f:
+            f.write('product_slug,delta\ntent,-1\nstove,2\n')
+        out, err = StringIO(), StringIO()
+        call_command('sync_stock', path, '--chunk-size', '1', stdout=out, stderr=err)
+        self.assertIn('Updated stock of 2 products, 1 changed availability', out.getvalue())
+        # the test settings have no CACHE_URL
+        self.assertIn('CACHE_URL is not set', err.getvalue())
+        self.assertEqual(
+            dict(Product.objects.values_list('product_slug', 'stock')),
+            {'tent': 4, 'stove': 2},
+        )
@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import TestCase
+from category.models import Category
+from product.models import Product, Variation
+from product.variations import get_variation_matrix, resolve_variations
+
+
+class VariationMatrixTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(category_name='Shirts', slug='shirts')
+        self.shirt = Product.objects.create(
+            product_name='Shirt',
+            product_slug='shirt',
+            product_description='Shirt',
+            product_price=20,
+            product_category=category,
+            stock=5,
+        )
+        self.red, self.blue, self.medium = [
+            Variation.objects.create(product=self.shirt, variation_category=category, variation_value=value)
+            for category, value in [('color', 'Red'), ('color', 'Blue'), ('size', 'M')]
+        ]
+        self.hidden = Variation.objects.create(
+            product=self.shirt, variation_category='size', variation_value='XL', is_active=False,
+        )
+
+    def test_posted_options_resolve_to_variation_ids(self):
+        """Only known, active values of the product are used; other keys are ignored"""
+        data = QueryDict('csrfmiddlewaretoken=abc&quantity=3&Color=%20red%20&size=m')
+        self.assertEqual(resolve_variations(self.shirt.id, data), [self.red.id, self.medium.id])
+        self.assertEqual(resolve_variations(self.shirt.id, {'size': 'XL', 'color': 'Green'}), [])
+        self.assertEqual(resolve_variations(self.shirt.id, {'quantity': 'red'}), [])
+
+    def test_matrix_cached_until_a_variation_changes(self):
+        """Saving a Variation refreshes the cached matrix"""
+        self.assertEqual(get_variation_matrix(self.shirt.id), {
+            'color': {'Red': self.red.id, 'Blue': self.blue.id},
+            'size': {'M': self.medium.id},
+        })
+        with self.assertNumQueries(0):
+            get_variation_matrix(self.shirt.id)
+
+        self.hidden.is_active = True
+        self.hidden.save()
+        self.blue.delete()
+        self.assertEqual(get_variation_matrix(self.shirt.id), {
+            'color': {'Red': self.red.id},
+            'size': {'M': self.medium.id, 'XL': self.hidden.id},
+        })
+        self.assertEqual(resolve_variations(self.shirt.id, {'size': 'xl'}), [self.hidden.id])